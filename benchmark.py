@@ -0,0 +1,294 @@
+"""
+SuperChis 烧卡器传输基准测试
+
+基于testcart.py的命令函数，测量顺序/随机读写在不同帧大小、Flash/SDRAM映射模式
+(CONFIG_MAP_DDR) 和地址区域下的吞吐量：
+- low:   低地址 (0x00000000起)
+- half:  跨越0x01000000 (两个16MB半区的分界)
+- magic: 紧邻魔术地址0x01FFFFFE之下 (不写入魔术地址本身)
+
+--layout测量SDRAM行/Bank布局的代价：同一行内、跨行、换行和换Bank访问的每帧耗时。
+
+结果以表格打印，并可写入JSON文件，便于比较每次传输优化前后的数字。
+真实硬件和模拟烧卡器 (--sim) 均可运行。
+
+Flash模式下的写入会向Flash芯片发出总线写周期，可能被当作Flash命令，
+因此默认只测量Flash模式的读取，加--flash-writes才测量写入。
+"""
+import argparse
+import datetime
+import json
+import random
+import time
+
+import testcart
+from testcart import (BUS_WINDOW_BYTES, MAGIC_ADDRESS, SDRAM_BANK_BYTES, SDRAM_ROW_BYTES, commandStats,
+                      flushCommands, readRomAsync, set_sc_mode, writeRom)
+
+BENCH_SIZES = (2, 64, 512, 4096, 32768)  # 帧大小 (字节)
+BENCH_BYTES = 256 * 1024                 # 每项测量的目标传输量
+BENCH_MIN_FRAMES = 64                    # 每项测量的最少帧数
+BENCH_MAX_FRAMES = 2048                  # 每项测量的最多帧数 (限制小帧的测量时间)
+BENCH_RANDOM_SPAN = 1024 * 1024          # 随机访问的地址范围
+BENCH_MODES = {"flash": 0, "sdram": 1}   # 模式名 -> CONFIG_MAP_DDR
+BENCH_OPS = ("seq-write", "seq-read", "rand-write", "rand-read")
+
+# 区域名 -> (顺序访问的起始地址函数, 随机访问的基地址)，地址均为字节地址
+BENCH_REGIONS = {
+    "low": (lambda span: 0, 0),
+    "half": (lambda span: 0x01000000 - span // 2 & ~1, 0x01000000 - BENCH_RANDOM_SPAN // 2),
+    "magic": (lambda span: MAGIC_ADDRESS - span, 0x02000000 - BENCH_RANDOM_SPAN),
+}
+
+def frameCount(size, total_bytes=BENCH_BYTES):
+    """每项测量的帧数"""
+    return max(BENCH_MIN_FRAMES, min(BENCH_MAX_FRAMES, total_bytes // size))
+
+def sequentialFrames(start_addr, size, count):
+    """
+    顺序访问的帧列表 [(字节地址, 长度)]，帧不跨越128KB总线窗口
+    """
+    frames = []
+    addr = start_addr
+    end = start_addr + size * count
+    while addr < end:
+        length = min(size, end - addr, BUS_WINDOW_BYTES - addr % BUS_WINDOW_BYTES)
+        frames.append((addr, length))
+        addr += length
+    return frames
+
+def randomFrames(base_addr, size, count, rng):
+    """
+    随机访问的帧列表 [(字节地址, 长度)]，地址按帧大小对齐，跳过包含魔术地址的位置
+    """
+    frames = []
+    while len(frames) < count:
+        addr = base_addr + rng.randrange(BENCH_RANDOM_SPAN // size) * size
+        if not addr <= MAGIC_ADDRESS < addr + size:
+            frames.append((addr, size))
+    return frames
+
+def timeFrames(frames, write, payload, scratch):
+    """
+    提交所有帧并等待完成
+
+    Returns:
+        耗时 (秒)
+    """
+    payload_view = memoryview(payload)
+    scratch_view = memoryview(scratch)
+    start_time = time.perf_counter()
+    if write:
+        for addr, length in frames:
+            writeRom(addr >> 1, payload_view[:length])
+    else:
+        for addr, length in frames:
+            readRomAsync(addr >> 1, length, scratch_view[:length])
+    flushCommands()
+    return time.perf_counter() - start_time
+
+def runCase(mode, region, op, size, rng, total_bytes=BENCH_BYTES):
+    """
+    运行一项测量 (调用前已切换到对应模式)
+
+    Returns:
+        结果字典
+    """
+    count = frameCount(size, total_bytes)
+    seq_start, random_base = BENCH_REGIONS[region]
+    if op.startswith("seq"):
+        frames = sequentialFrames(seq_start(size * count), size, count)
+    else:
+        frames = randomFrames(random_base, size, count, rng)
+
+    payload = rng.randbytes(size) if size > 2 else bytes([0x34, 0x12])
+    elapsed = timeFrames(frames, op.endswith("write"), payload, bytearray(size))
+    nbytes = sum(length for _, length in frames)
+    return {
+        "mode": mode,
+        "region": region,
+        "op": op,
+        "frame_size": size,
+        "frames": len(frames),
+        "bytes": nbytes,
+        "start_addr": frames[0][0],
+        "seconds": elapsed,
+        "bytes_per_second": nbytes / elapsed if elapsed else None,
+        "frames_per_second": len(frames) / elapsed if elapsed else None,
+    }
+
+# 布局测量: 名称 -> 第i帧的字节地址 (帧大小size不超过半行)
+LAYOUT_BASE = 0x00400000
+LAYOUT_CASES = {
+    "same-row": lambda i, size: LAYOUT_BASE + (i * size) % SDRAM_ROW_BYTES,
+    "row-cross": lambda i, size: LAYOUT_BASE + (i % 64) * SDRAM_ROW_BYTES + SDRAM_ROW_BYTES - size // 2,
+    "row-switch": lambda i, size: LAYOUT_BASE + (i % 64) * SDRAM_ROW_BYTES,
+    "bank-switch": lambda i, size: LAYOUT_BASE % SDRAM_BANK_BYTES + (i % 4) * SDRAM_BANK_BYTES
+                                   + (i // 4 % 16) * SDRAM_ROW_BYTES,
+}
+
+def runLayoutBenchmark(size=512, count=1024, ops=("read", "write")):
+    """
+    测量SDRAM行/Bank布局的代价
+    
+    - same-row:    所有帧落在同一行内
+    - row-cross:   每帧跨越一个行边界
+    - row-switch:  相邻帧访问同一Bank的不同行
+    - bank-switch: 相邻帧轮流访问4个Bank
+    
+    Args:
+        size: 帧大小 (字节，不超过半行)
+        count: 每项测量的帧数
+        ops: "read"/"write"
+        
+    Returns:
+        结果列表，per_frame_delta为相对same-row的每帧额外耗时 (秒)
+    """
+    if size > SDRAM_ROW_BYTES // 2:
+        raise ValueError(f"帧大小 {size} 超过半行")
+    set_sc_mode(sdram=1, sd_enable=0, write_enable=1)
+    rng = random.Random(1)
+    payload = rng.randbytes(size)
+    results = []
+    for op in ops:
+        baseline = None
+        for case, address in LAYOUT_CASES.items():
+            frames = [(address(i, size), size) for i in range(count)]
+            elapsed = timeFrames(frames, op == "write", payload, bytearray(size))
+            per_frame = elapsed / count
+            if baseline is None:
+                baseline = per_frame
+            result = {
+                "layout": case,
+                "op": op,
+                "frame_size": size,
+                "frames": count,
+                "seconds": elapsed,
+                "per_frame": per_frame,
+                "per_frame_delta": per_frame - baseline,
+            }
+            results.append(result)
+            print(f"{case:<14}{op:<7}{size:>8}{count:>8}{elapsed:>10.3f}{per_frame * 1e6:>12.1f}us"
+                  f"{(per_frame - baseline) * 1e6:>+12.1f}us")
+    return results
+
+def runBenchmark(modes=tuple(BENCH_MODES), regions=tuple(BENCH_REGIONS), ops=BENCH_OPS,
+                 sizes=BENCH_SIZES, total_bytes=BENCH_BYTES, flash_writes=False, seed=1):
+    """
+    运行所有测量组合
+
+    Args:
+        modes: 映射模式 ("flash"/"sdram")
+        regions: 地址区域 ("low"/"half"/"magic")
+        ops: 访问类型 (顺序/随机 读/写)
+        sizes: 帧大小 (字节，偶数)
+        total_bytes: 每项测量的目标传输量
+        flash_writes: Flash模式下也测量写入
+        seed: 随机地址和数据的种子
+
+    Returns:
+        结果列表
+    """
+    rng = random.Random(seed)
+    results = []
+    for mode in modes:
+        sdram = BENCH_MODES[mode]
+        mode_ops = [op for op in ops if sdram or flash_writes or not op.endswith("write")]
+        if not mode_ops:
+            continue
+        set_sc_mode(sdram=sdram, sd_enable=0, write_enable=1 if sdram or flash_writes else 0)
+        for region in regions:
+            for op in mode_ops:
+                for size in sizes:
+                    result = runCase(mode, region, op, size, rng, total_bytes)
+                    results.append(result)
+                    printResult(result)
+    return results
+
+def printHeader():
+    """打印结果表头"""
+    print(f"{'模式':<6}{'区域':<7}{'访问':<11}{'帧大小':>8}{'帧数':>7}{'用时(秒)':>10}{'吞吐量':>13}{'帧/秒':>10}")
+
+def printResult(result):
+    """打印一行结果"""
+    rate = result["bytes_per_second"]
+    rate_text = f"{rate / 1024:.1f}KB/s" if rate else "-"
+    fps = result["frames_per_second"]
+    print(f"{result['mode']:<8}{result['region']:<9}{result['op']:<12}{result['frame_size']:>9}"
+          f"{result['frames']:>9}{result['seconds']:>12.3f}{rate_text:>14}{fps or 0:>11.0f}")
+
+def writeReport(path, results, device, sim=None):
+    """把结果和命令统计写入JSON文件"""
+    report = {
+        "device": device,
+        "sim": sim,
+        "time": datetime.datetime.now().isoformat(timespec="seconds"),
+        "results": results,
+        "stats": commandStats.summary(),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+def parseList(text, choices=None, convert=str):
+    """解析逗号分隔的参数列表"""
+    values = [convert(item.strip()) for item in text.split(",") if item.strip()]
+    if choices is not None:
+        for value in values:
+            if value not in choices:
+                raise argparse.ArgumentTypeError(f"{value} 不是 {', '.join(choices)} 之一")
+    return values
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SuperChis 烧卡器传输基准测试")
+    parser.add_argument("--sim", action="store_true", help="使用模拟烧卡器 (无需硬件)")
+    parser.add_argument("--sim-latency", type=float, default=0.001, help="模拟USB往返延迟 (秒)")
+    parser.add_argument("--sim-bandwidth", type=float, default=1_000_000, help="模拟链路带宽 (字节/秒)")
+    parser.add_argument("--port", help="烧卡器串口，默认使用找到的第一个烧卡器")
+    parser.add_argument("--modes", type=lambda x: parseList(x, BENCH_MODES), default=list(BENCH_MODES),
+                        help="映射模式 (flash,sdram)")
+    parser.add_argument("--regions", type=lambda x: parseList(x, BENCH_REGIONS), default=list(BENCH_REGIONS),
+                        help="地址区域 (low,half,magic)")
+    parser.add_argument("--ops", type=lambda x: parseList(x, BENCH_OPS), default=list(BENCH_OPS),
+                        help="访问类型 (seq-write,seq-read,rand-write,rand-read)")
+    parser.add_argument("--sizes", type=lambda x: parseList(x, convert=int), default=list(BENCH_SIZES),
+                        help="帧大小 (字节，逗号分隔)")
+    parser.add_argument("--bytes", type=int, default=BENCH_BYTES, help="每项测量的目标传输量 (字节)")
+    parser.add_argument("--flash-writes", action="store_true", help="Flash模式下也测量写入 (会向Flash发出写周期)")
+    parser.add_argument("--seed", type=int, default=1, help="随机地址和数据的种子")
+    parser.add_argument("--json", metavar="PATH", help="把结果写入JSON文件")
+    parser.add_argument("--layout", action="store_true", help="测量SDRAM跨行/换行/换Bank的代价")
+    parser.add_argument("--layout-size", type=int, default=512, help="布局测量的帧大小 (字节，不超过半行)")
+    parser.add_argument("--layout-frames", type=int, default=1024, help="布局测量每项的帧数")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        if size <= 0 or size % 2 or size > 0xFFFF or BUS_WINDOW_BYTES % size:
+            parser.error(f"帧大小 {size} 必须是能整除128KB的偶数，且不超过读长度字段")
+    if args.layout_size <= 0 or args.layout_size % 2 or args.layout_size > SDRAM_ROW_BYTES // 2:
+        parser.error(f"布局测量的帧大小 {args.layout_size} 必须是不超过半行 ({SDRAM_ROW_BYTES // 2}字节) 的正偶数")
+    if args.layout_frames <= 0:
+        parser.error(f"布局测量的帧数必须大于0: {args.layout_frames}")
+
+    testcart.ser = testcart.connectDevice(args.sim, args.sim_latency, args.sim_bandwidth, port_name=args.port)
+    if testcart.ser is None:
+        exit(-1)
+    commandStats.reset()
+
+    try:
+        if args.layout:
+            print("\n=== SDRAM布局测量 ===")
+            print(f"{'布局':<12}{'访问':<5}{'帧大小':>6}{'帧数':>6}{'用时(秒)':>8}{'每帧':>12}{'额外':>12}")
+            results = runLayoutBenchmark(args.layout_size, args.layout_frames)
+        else:
+            print("\n=== 传输基准测试 ===")
+            printHeader()
+            results = runBenchmark(args.modes, args.regions, args.ops, args.sizes, args.bytes,
+                                   args.flash_writes, args.seed)
+        if args.json:
+            sim = {"latency": args.sim_latency, "bandwidth": args.sim_bandwidth} if args.sim else None
+            writeReport(args.json, results, testcart.ser.port, sim)
+            print(f"\n结果已写入: {args.json}")
+    except KeyboardInterrupt:
+        print("\n测试被用户中断")
+    finally:
+        testcart.ser.close()
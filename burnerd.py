@@ -0,0 +1,686 @@
+"""
+SuperChis 烧卡器守护进程
+
+常驻进程独占烧卡器串口 (只在启动时枚举和复位一次) 并记住卡带当前的SuperChis配置，
+通过Unix套接字上的紧凑二进制协议为多个客户端执行ROM/RAM读写、模式切换和SRAM Bank选择。
+脚本和短时运行的客户端不必每次枚举串口、打开设备和切换DTR (会复位烧卡器)。
+
+协议 (小端，与烧卡器命令帧一致)：
+- 请求: 12字节头 <BBHII (命令, 标志, 标签, 字节地址, 长度)，写命令后跟长度字节的数据
+- 应答: 8字节头 <BBHI (状态, 命令, 标签, 长度)，后跟长度字节的数据，出错时为UTF-8错误信息
+每个连接的应答按请求顺序返回，客户端可以连续发送多个请求后再依次收取应答。
+
+所有客户端的请求进入同一个队列，由设备线程成批执行：一批是上一批执行期间到达的全部请求。
+批内连续的同类请求合并为尽量少的命令帧 (重叠或相邻的读合并为一段读取，首尾相接的写合并为一帧，
+分散的单字ROM写合并为一次突发发送)，整批流水线发送，只在最后等待一次应答。
+模式切换和SRAM Bank选择按请求顺序执行，配置已生效时不再发送解锁序列；
+客户端直接写入魔术地址或Bank切换地址后，守护进程把对应的状态记为未知。
+
+用法:
+    python burnerd.py serve [--sim]                 启动守护进程
+    python burnerd.py read 0x0 0x100 [-o PATH]      读取ROM (--ram读取SRAM)
+    python burnerd.py write 0x0 PATH                写入ROM (--ram写入SRAM)
+    python burnerd.py mode --sdram 1 --write-enable 1   切换模式 (不带参数时显示当前模式)
+    python burnerd.py bench --clients 8             测量多个并发客户端的请求吞吐量
+"""
+import argparse
+import itertools
+import json
+import os
+import queue
+import random
+import signal
+import socket
+import struct
+import tempfile
+import threading
+import time
+from collections import deque
+
+import testcart
+from testcart import (BULK_CHUNK_SIZES, CONFIG_BANK_SHIFT, CONFIG_MAP_DDR, MAGIC_ADDRESS, SRAM_BANK_ADDRESS,
+                      SRAM_BANK_BYTES, SRAM_BANKS, SRAM_FRAME_BYTES, commandStats, deviceSize)
+
+# 协议
+REQUEST_HEADER = struct.Struct("<BBHII")  # 命令, 标志, 标签, 地址, 长度
+RESPONSE_HEADER = struct.Struct("<BBHI")  # 状态, 命令, 标签, 长度
+
+OP_CLOSE = 0x00       # 内部使用：连接的请求已读完，回复之前的请求后关闭连接
+OP_READ_ROM = 0x01    # 地址/长度: 字节 (偶数)，应答为读出的数据
+OP_WRITE_ROM = 0x02   # 地址: 字节 (偶数)，数据长度为偶数
+OP_READ_RAM = 0x03    # 地址/长度: 当前SRAM Bank内的字节
+OP_WRITE_RAM = 0x04
+OP_SET_MODE = 0x05    # 地址: 配置值 (sdram | sd_enable << 1 | write_enable << 2 | bank << 3)
+OP_GET_MODE = 0x06    # 应答为1字节配置值，未知时为空
+OP_SRAM_BANK = 0x07   # 地址: SRAM Bank号
+OP_STATS = 0x08       # 应答为守护进程和命令统计的JSON
+
+FLAG_FORCE = 0x01     # OP_SET_MODE: 配置已生效时也重新发送解锁序列
+
+STATUS_OK = 0
+STATUS_BAD_REQUEST = 1
+STATUS_DEVICE_ERROR = 2
+
+# 守护进程配置
+DAEMON_SOCKET = os.path.join(tempfile.gettempdir(), "superchis-burnerd.sock")
+DAEMON_MAX_LENGTH = deviceSize          # 单个请求的最大数据长度
+DAEMON_BATCH_BYTES = 4 * 1024 * 1024    # 一批请求的数据量达到该值后，其余请求留到下一批
+DAEMON_FRAME_BYTES = BULK_CHUNK_SIZES[-1]  # 合并后每帧的最大长度
+DAEMON_BURST_WORDS = 1024               # 一次突发发送的最多单字写入数
+
+# 基准测试
+BENCH_CLIENTS = 8
+BENCH_REQUESTS = 2000
+BENCH_SIZE = 64
+BENCH_SPAN = 1024 * 1024
+
+class BurnerdError(IOError):
+    """守护进程返回的错误应答"""
+
+    def __init__(self, status, message):
+        self.status = status
+        super().__init__(message)
+
+class _Client:
+    """守护进程一侧的客户端连接"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.alive = True
+
+    def send(self, data):
+        """发送应答，连接已断开时忽略"""
+        if not self.alive:
+            return
+        try:
+            self.conn.sendall(data)
+        except OSError:
+            self.alive = False
+
+    def close(self):
+        self.alive = False
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+
+class _Request:
+    """队列中的一个请求"""
+
+    def __init__(self, client, op, flags=0, tag=0, addr=0, length=0, data=None, error=None):
+        self.client = client
+        self.op = op
+        self.flags = flags
+        self.tag = tag
+        self.addr = addr
+        self.length = length
+        self.data = data
+        self.error = error
+        self.status = None
+        self.payload = b""
+
+def _checkRequest(op, addr, length):
+    """
+    检查请求参数
+
+    Returns:
+        错误信息，参数有效时为None
+    """
+    if op in (OP_READ_ROM, OP_WRITE_ROM):
+        if addr % 2 or length % 2 or not 0 < length <= DAEMON_MAX_LENGTH or addr + length > deviceSize:
+            return f"ROM访问范围无效: 0x{addr:08X} + 0x{length:X}"
+    elif op in (OP_READ_RAM, OP_WRITE_RAM):
+        if not 0 < length <= SRAM_BANK_BYTES or addr + length > SRAM_BANK_BYTES:
+            return f"SRAM访问范围无效: 0x{addr:04X} + 0x{length:X}"
+    elif op == OP_SET_MODE:
+        if addr > 0xFF:
+            return f"配置值无效: 0x{addr:X}"
+    elif op == OP_SRAM_BANK:
+        if addr >= SRAM_BANKS:
+            return f"SRAM Bank超出范围: {addr}"
+    elif op not in (OP_GET_MODE, OP_STATS):
+        return f"未知命令: 0x{op:02X}"
+    return None
+
+def _frameLength(addr, remaining, ram):
+    """合并后一帧的长度：ROM帧不跨越128KB窗口，SRAM帧不跨越最大帧长度的边界"""
+    if ram:
+        return min(remaining, SRAM_FRAME_BYTES - addr % SRAM_FRAME_BYTES)
+    return testcart._chunkLength(addr, DAEMON_FRAME_BYTES, remaining)
+
+class BurnerDaemon:
+    """
+    烧卡器守护进程
+
+    使用testcart的全局烧卡器连接 (testcart.ser)。每个客户端连接一个读线程，只解析请求并放入队列；
+    烧卡器只由设备线程访问，因此testcart中的卡带客户端、流水线和模式记录不需要加锁。
+    """
+
+    def __init__(self, path=DAEMON_SOCKET):
+        self.path = path
+        self.queue = queue.Queue()
+        self.stats = {"clients": 0, "requests": 0, "batches": 0, "merged": 0, "max_batch": 0, "resyncs": 0}
+        self.desynced = False  # 上次出错后应答流尚未重新同步
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if os.path.exists(path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+            except OSError:
+                os.unlink(path)  # 上次未正常退出留下的套接字文件
+            else:
+                raise OSError(f"守护进程已在运行: {path}")
+            finally:
+                probe.close()
+        # 套接字文件只允许本用户连接
+        umask = os.umask(0o177)
+        try:
+            self.sock.bind(path)
+        finally:
+            os.umask(umask)
+        self.sock.listen()
+
+    def serve(self):
+        """接受客户端连接，直到close()或被中断"""
+        threading.Thread(target=self._worker, daemon=True).start()
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                break
+            self.stats["clients"] += 1
+            threading.Thread(target=self._readRequests, args=(_Client(conn),), daemon=True).start()
+
+    def close(self):
+        """停止服务并删除套接字文件"""
+        self.queue.put(None)
+        self.sock.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def summary(self):
+        """返回守护进程统计 (连接数、请求数、批数、合并到其他请求帧中的请求数、最大批大小、重新同步次数)"""
+        cart = testcart.getCart()
+        return dict(self.stats, mode=cart.mode, sram_bank=cart.sram_bank, port=testcart.ser.port)
+
+    def _readRequests(self, client):
+        """客户端读线程：解析请求放入队列，连接结束时放入关闭请求"""
+        reader = client.conn.makefile("rb")
+        try:
+            while True:
+                header = reader.read(REQUEST_HEADER.size)
+                if len(header) < REQUEST_HEADER.size:
+                    break
+                op, flags, tag, addr, length = REQUEST_HEADER.unpack(header)
+                request = _Request(client, op, flags, tag, addr, length, error=_checkRequest(op, addr, length))
+                if op in (OP_WRITE_ROM, OP_WRITE_RAM):
+                    if length > DAEMON_MAX_LENGTH:
+                        # 无法跳过过长的数据，回复错误后关闭连接
+                        self.queue.put(request)
+                        break
+                    request.data = reader.read(length)
+                    if len(request.data) < length:
+                        break
+                self.queue.put(request)
+        except OSError:
+            pass
+        finally:
+            reader.close()
+            self.queue.put(_Request(client, OP_CLOSE))
+
+    def _worker(self):
+        """设备线程：取出队列中的全部请求 (不超过DAEMON_BATCH_BYTES) 成批执行并回复"""
+        while True:
+            request = self.queue.get()
+            if request is None:
+                return
+            batch = [request]
+            size = request.length
+            while size < DAEMON_BATCH_BYTES:
+                try:
+                    request = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    self.queue.put(None)
+                    break
+                batch.append(request)
+                size += request.length
+            self._runBatch(batch)
+            self._respond(batch)
+
+    def _runBatch(self, batch):
+        """执行一批请求：连续的同类读写合并提交，整批只等待一次"""
+        cart = testcart.getCart()
+        self.stats["batches"] += 1
+        self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+        if self.desynced and not self._resync(cart):
+            for request in batch:
+                request.status = STATUS_DEVICE_ERROR
+                request.payload = "烧卡器应答流未能重新同步".encode()
+            return
+
+        def kind(request):
+            # 读写按命令分组，其他请求各自单独执行
+            if request.error is None and request.op in (OP_READ_ROM, OP_WRITE_ROM, OP_READ_RAM, OP_WRITE_RAM):
+                return request.op
+            return id(request)
+
+        transfers = []
+        try:
+            for op, group in itertools.groupby(batch, key=kind):
+                group = list(group)
+                if op in (OP_READ_ROM, OP_READ_RAM):
+                    self._submitReads(cart, group, op == OP_READ_RAM)
+                    transfers.extend(group)
+                elif op in (OP_WRITE_ROM, OP_WRITE_RAM):
+                    self._submitWrites(cart, group, op == OP_WRITE_RAM)
+                    transfers.extend(group)
+                else:
+                    self._control(cart, group[0])
+            cart.flush()
+            for request in transfers:
+                request.status = STATUS_OK
+        except OSError as e:
+            # 流水线失步或串口错误：尚未完成的请求都失败，卡带状态未知，重新同步后再执行下一批
+            cart.mode = None
+            cart.sram_bank = None
+            for request in batch:
+                if request.status is None:
+                    request.status = STATUS_DEVICE_ERROR
+                    request.payload = f"{type(e).__name__}: {e}".encode()
+            self.desynced = True
+            self._resync(cart)
+
+    def _resync(self, cart):
+        """清空迟到的应答并用读命令探测应答流是否对齐，返回是否已同步"""
+        self.stats["resyncs"] += 1
+        try:
+            self.desynced = not cart.resync()
+        except OSError:
+            self.desynced = True
+        return not self.desynced
+
+    def _submitReads(self, cart, group, ram):
+        """把一组读请求按地址合并为连续的读取段，应答直接读入各段的缓冲区"""
+        spans = []  # [起始地址, 结束地址, 请求列表]
+        for request in sorted(group, key=lambda r: r.addr):
+            if spans and request.addr <= spans[-1][1]:
+                spans[-1][1] = max(spans[-1][1], request.addr + request.length)
+                spans[-1][2].append(request)
+            else:
+                spans.append([request.addr, request.addr + request.length, [request]])
+        for start, end, requests in spans:
+            buffer = memoryview(bytearray(end - start))
+            addr = start
+            while addr < end:
+                chunk = _frameLength(addr, end - addr, ram)
+                into = buffer[addr - start:addr - start + chunk]
+                if ram:
+                    cart.readRamAsync(addr, chunk, into)
+                else:
+                    cart.readRomAsync(addr >> 1, chunk, into)
+                addr += chunk
+            for request in requests:
+                request.payload = buffer[request.addr - start:request.addr - start + request.length]
+            self.stats["merged"] += len(requests) - 1
+
+    def _submitWrites(self, cart, group, ram):
+        """
+        按请求顺序提交一组写请求
+
+        首尾相接的写合并为一段，按帧长度拆分发送；单字ROM写入积累起来合并为突发发送，
+        遇到较长的写入前先发出，保持写入顺序。
+        """
+        spans = []  # [起始地址, 结束地址, 数据列表]
+        for request in group:
+            if spans and request.addr == spans[-1][1]:
+                spans[-1][1] += request.length
+                spans[-1][2].append(request.data)
+                self.stats["merged"] += 1
+            else:
+                spans.append([request.addr, request.addr + request.length, [request.data]])
+
+        burst = []
+        def sendBurst():
+            for i in range(0, len(burst), DAEMON_BURST_WORDS):
+                cart.writeRomBurst(burst[i:i + DAEMON_BURST_WORDS])
+            self.stats["merged"] += max(0, len(burst) - 1)
+            burst.clear()
+
+        for start, end, parts in spans:
+            data = parts[0] if len(parts) == 1 else b"".join(parts)
+            if not ram:
+                # 写入魔术地址或Bank切换地址后，记录的配置不再可靠
+                if start <= MAGIC_ADDRESS < end:
+                    cart.mode = None
+                if start <= SRAM_BANK_ADDRESS < end:
+                    cart.sram_bank = None
+            if not ram and end - start == 2:
+                burst.append((start >> 1, struct.unpack("<H", data)[0]))
+                continue
+            sendBurst()
+            view = memoryview(data)
+            addr = start
+            while addr < end:
+                chunk = _frameLength(addr, end - addr, ram)
+                if ram:
+                    cart.writeRam(addr, view[addr - start:addr - start + chunk])
+                else:
+                    cart.writeRom(addr >> 1, view[addr - start:addr - start + chunk])
+                addr += chunk
+        sendBurst()
+
+    def _control(self, cart, request):
+        """执行不合并的请求 (参数错误、模式、SRAM Bank、统计、关闭)"""
+        if request.op == OP_CLOSE:
+            request.status = STATUS_OK
+        elif request.error is not None:
+            request.status = STATUS_BAD_REQUEST
+            request.payload = request.error.encode()
+        elif request.op == OP_SET_MODE:
+            config = request.addr
+            testcart.set_sc_mode(config & CONFIG_MAP_DDR, (config >> 1) & 1, (config >> 2) & 1,
+                                 config >> CONFIG_BANK_SHIFT, force=bool(request.flags & FLAG_FORCE))
+            request.status = STATUS_OK
+        elif request.op == OP_GET_MODE:
+            request.status = STATUS_OK
+            request.payload = bytes([cart.mode]) if cart.mode is not None else b""
+        elif request.op == OP_SRAM_BANK:
+            testcart.selectSramBank(request.addr)
+            request.status = STATUS_OK
+        elif request.op == OP_STATS:
+            request.status = STATUS_OK
+            request.payload = json.dumps({"daemon": self.summary(), "commands": commandStats.summary()},
+                                         ensure_ascii=False).encode()
+
+    def _respond(self, batch):
+        """按请求顺序回复，每个客户端的应答合并为一次发送"""
+        out = {}
+        for request in batch:
+            if request.op == OP_CLOSE:
+                continue
+            self.stats["requests"] += 1
+            buffer = out.setdefault(request.client, bytearray())
+            buffer += RESPONSE_HEADER.pack(request.status, request.op, request.tag, len(request.payload))
+            buffer += request.payload
+        for client, buffer in out.items():
+            client.send(buffer)
+        for request in batch:
+            if request.op == OP_CLOSE:
+                request.client.close()
+
+class BurnerClient:
+    """
+    守护进程客户端
+
+    请求可以用send()连续发送、再用receive()按顺序收取应答，也可以用下面的同步方法逐个执行。
+    """
+
+    def __init__(self, path=DAEMON_SOCKET, timeout=None):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(path)
+        self.reader = self.sock.makefile("rb")
+        self.tag = 0
+        self.pending = deque()  # 已发送、尚未收到应答的 (标签, 命令)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+    def send(self, op, addr=0, length=0, data=None, flags=0):
+        """
+        发送一个请求，不等待应答
+
+        Args:
+            op: 命令 (OP_*)
+            addr: 字节地址或命令参数
+            length: 读取长度 (写命令为数据长度)
+            data: 写入的数据
+            flags: 标志 (FLAG_*)
+
+        Returns:
+            请求的标签
+        """
+        self.tag = (self.tag + 1) & 0xFFFF
+        if data is not None:
+            length = len(data)
+        header = REQUEST_HEADER.pack(op, flags, self.tag, addr, length)
+        if data is not None and length >= 4096:
+            self.sock.sendall(header)
+            self.sock.sendall(data)
+        else:
+            self.sock.sendall(header + bytes(data or b""))
+        self.pending.append((self.tag, op))
+        return self.tag
+
+    def receive(self):
+        """
+        收取最早一个请求的应答
+
+        Returns:
+            应答数据 (bytes)
+
+        Raises:
+            BurnerdError: 守护进程返回错误，或连接中断
+        """
+        header = self.reader.read(RESPONSE_HEADER.size)
+        if len(header) < RESPONSE_HEADER.size:
+            raise BurnerdError(None, "守护进程关闭了连接")
+        status, op, tag, length = RESPONSE_HEADER.unpack(header)
+        payload = self.reader.read(length)
+        if len(payload) < length:
+            raise BurnerdError(None, "守护进程关闭了连接")
+        expected = self.pending.popleft()
+        if (tag, op) != expected:
+            raise BurnerdError(None, f"应答与请求不匹配: 期望标签 {expected[0]}, 收到 {tag}")
+        if status != STATUS_OK:
+            raise BurnerdError(status, payload.decode("utf-8", "replace"))
+        return payload
+
+    def request(self, op, addr=0, length=0, data=None, flags=0):
+        """发送一个请求并等待应答，参数同send"""
+        self.send(op, addr, length, data, flags)
+        return self.receive()
+
+    def readRom(self, addr, length):
+        """从ROM字节地址读取数据"""
+        return self.request(OP_READ_ROM, addr, length)
+
+    def writeRom(self, addr, data):
+        """向ROM字节地址写入数据 (长度为偶数)"""
+        self.request(OP_WRITE_ROM, addr, data=data)
+
+    def readRam(self, addr, length):
+        """从当前SRAM Bank读取数据"""
+        return self.request(OP_READ_RAM, addr, length)
+
+    def writeRam(self, addr, data):
+        """向当前SRAM Bank写入数据"""
+        self.request(OP_WRITE_RAM, addr, data=data)
+
+    def setMode(self, sdram, sd_enable, write_enable, bank=0, force=False):
+        """切换SuperChis模式，参数同testcart.set_sc_mode"""
+        config = sdram | (sd_enable << 1) | (write_enable << 2) | (bank << CONFIG_BANK_SHIFT)
+        self.request(OP_SET_MODE, config, flags=FLAG_FORCE if force else 0)
+
+    def getMode(self):
+        """返回守护进程记录的配置值，未知时为None"""
+        payload = self.request(OP_GET_MODE)
+        return payload[0] if payload else None
+
+    def selectSramBank(self, bank):
+        """选择SRAM Bank，同testcart.selectSramBank"""
+        self.request(OP_SRAM_BANK, bank)
+
+    def stats(self):
+        """返回守护进程统计和命令统计"""
+        return json.loads(self.request(OP_STATS))
+
+def describeMode(config):
+    """把配置值转换为可读文本"""
+    if config is None:
+        return "未知"
+    return (f"0x{config:02X} ({'SDRAM' if config & CONFIG_MAP_DDR else 'Flash'}映射, "
+            f"SD{'开' if (config >> 1) & 1 else '关'}, 写使能{'开' if (config >> 2) & 1 else '关'}, "
+            f"Bank {config >> CONFIG_BANK_SHIFT})")
+
+def runBench(path, clients=BENCH_CLIENTS, requests=BENCH_REQUESTS, size=BENCH_SIZE, span=BENCH_SPAN):
+    """
+    测量并发客户端的请求吞吐量：每个客户端在独立线程中逐个发送随机地址的同步读请求
+
+    Returns:
+        dict: clients、requests (总请求数)、seconds、requests_per_second、batches、merged (本次测量的增量)
+    """
+    with BurnerClient(path) as client:
+        before = client.stats()["daemon"]
+
+    def run(seed):
+        rng = random.Random(seed)
+        with BurnerClient(path) as client:
+            for _ in range(requests):
+                client.readRom(rng.randrange(0, span - size, 2), size)
+
+    threads = [threading.Thread(target=run, args=(seed,)) for seed in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+    with BurnerClient(path) as client:
+        after = client.stats()["daemon"]
+    total = clients * requests
+    return {
+        "clients": clients,
+        "requests": total,
+        "seconds": seconds,
+        "requests_per_second": total / seconds,
+        "batches": after["batches"] - before["batches"] - 1,  # 不计统计请求自身
+        "merged": after["merged"] - before["merged"],
+    }
+
+def _hexDump(addr, data):
+    """按每行16字节打印数据"""
+    for offset in range(0, len(data), 16):
+        print(f"{addr + offset:08X}: {data[offset:offset + 16].hex(' ')}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SuperChis 烧卡器守护进程")
+    parser.add_argument("--socket", default=DAEMON_SOCKET, help="Unix套接字路径")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="连接烧卡器并启动守护进程")
+    serve.add_argument("--sim", action="store_true", help="使用模拟烧卡器 (无需硬件)")
+    serve.add_argument("--sim-latency", type=float, default=0.001, help="模拟USB往返延迟 (秒)")
+    serve.add_argument("--sim-bandwidth", type=float, default=1_000_000, help="模拟链路带宽 (字节/秒)")
+    serve.add_argument("--port", help="烧卡器串口，默认使用找到的第一个烧卡器")
+
+    read = commands.add_parser("read", help="读取ROM或SRAM")
+    read.add_argument("addr", type=lambda x: int(x, 0), help="起始字节地址")
+    read.add_argument("length", type=lambda x: int(x, 0), help="字节数")
+    read.add_argument("--ram", action="store_true", help="读取当前SRAM Bank")
+    read.add_argument("-o", "--output", metavar="PATH", help="保存到文件 (默认以十六进制打印)")
+
+    write = commands.add_parser("write", help="把文件写入ROM或SRAM")
+    write.add_argument("addr", type=lambda x: int(x, 0), help="起始字节地址")
+    write.add_argument("path", help="数据文件")
+    write.add_argument("--ram", action="store_true", help="写入当前SRAM Bank")
+
+    mode = commands.add_parser("mode", help="切换SuperChis模式，不带参数时显示当前模式")
+    mode.add_argument("--sdram", type=int, choices=(0, 1), help="映射SDRAM (1) 或Flash (0)")
+    mode.add_argument("--sd-enable", type=int, choices=(0, 1), default=0, help="SD卡接口使能")
+    mode.add_argument("--write-enable", type=int, choices=(0, 1), default=0, help="写使能")
+    mode.add_argument("--bank", type=int, default=0, help="Flash Bank (0~31)")
+    mode.add_argument("--force", action="store_true", help="配置已生效时也重新发送解锁序列")
+    mode.add_argument("--sram-bank", type=int, choices=range(SRAM_BANKS), help="选择SRAM Bank")
+
+    commands.add_parser("stats", help="打印守护进程和命令统计")
+
+    bench = commands.add_parser("bench", help="测量并发客户端的请求吞吐量")
+    bench.add_argument("--clients", type=int, default=BENCH_CLIENTS, help="并发客户端数")
+    bench.add_argument("--requests", type=int, default=BENCH_REQUESTS, help="每个客户端的请求数")
+    bench.add_argument("--size", type=lambda x: int(x, 0), default=BENCH_SIZE, help="每个读请求的字节数 (偶数)")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        testcart.ser = testcart.connectDevice(args.sim, args.sim_latency, args.sim_bandwidth, port_name=args.port)
+        if testcart.ser is None:
+            exit(-1)
+        commandStats.reset()
+        try:
+            daemon = BurnerDaemon(args.socket)
+        except OSError as e:
+            print(f"无法启动守护进程: {e}")
+            testcart.ser.close()
+            exit(-1)
+        print(f"守护进程已启动: {args.socket}")
+        signal.signal(signal.SIGTERM, lambda signum, frame: exit())  # 被终止时同样删除套接字文件
+        try:
+            daemon.serve()
+        except KeyboardInterrupt:
+            print("\n守护进程被用户中断")
+        finally:
+            daemon.close()
+            testcart.ser.close()
+        exit()
+
+    try:
+        client = BurnerClient(args.socket)
+    except OSError as e:
+        print(f"无法连接守护进程 {args.socket}: {e}")
+        exit(-1)
+    try:
+        if args.command == "read":
+            start_time = time.time()
+            data = client.readRam(args.addr, args.length) if args.ram else client.readRom(args.addr, args.length)
+            if args.output:
+                with open(args.output, "wb") as f:
+                    f.write(data)
+                print(f"已读出 {len(data)} 字节到 {args.output}，耗时: {time.time() - start_time:.3f}秒")
+            else:
+                _hexDump(args.addr, data)
+        elif args.command == "write":
+            with open(args.path, "rb") as f:
+                data = f.read()
+            start_time = time.time()
+            if args.ram:
+                client.writeRam(args.addr, data)
+            else:
+                client.writeRom(args.addr, data)
+            print(f"已写入 {len(data)} 字节，耗时: {time.time() - start_time:.3f}秒")
+        elif args.command == "mode":
+            if args.sdram is not None:
+                client.setMode(args.sdram, args.sd_enable, args.write_enable, args.bank, args.force)
+            if args.sram_bank is not None:
+                client.selectSramBank(args.sram_bank)
+            print(f"当前模式: {describeMode(client.getMode())}")
+        elif args.command == "stats":
+            stats = client.stats()
+            daemon = stats["daemon"]
+            print(f"烧卡器: {daemon['port']}，模式: {describeMode(daemon['mode'])}，SRAM Bank: {daemon['sram_bank']}")
+            print(f"连接: {daemon['clients']}，请求: {daemon['requests']}，批: {daemon['batches']}，"
+                  f"合并: {daemon['merged']}，最大批: {daemon['max_batch']}，重新同步: {daemon['resyncs']}")
+            for opcode, entry in stats["commands"]["opcodes"].items():
+                print(f"{opcode} {entry['name']:<9}{entry['frames']:>10} 帧，平均帧长 {entry['avg_frame_bytes']:.0f}，"
+                      f"平均延迟 {entry['rtt_avg'] * 1000:.3f}ms")
+        elif args.command == "bench":
+            client.close()
+            result = runBench(args.socket, args.clients, args.requests, args.size)
+            print(f"{result['clients']} 个客户端，{result['requests']} 个 {args.size} 字节读请求，"
+                  f"用时 {result['seconds']:.2f}秒，{result['requests_per_second']:.0f} 请求/秒")
+            print(f"批数: {result['batches']}，合并到其他请求帧中的请求: {result['merged']}")
+    except BurnerdError as e:
+        print(f"请求失败: {e}")
+        exit(-1)
+    finally:
+        client.close()
@@ -0,0 +1,744 @@
+"""
+equipment.txt (CPLD适配报告) 方程的位并行求值器
+
+解析适配报告中每个宏单元的组合方程和.D/.T触发器方程 (含.CLK/.CE/.AR/.OE)，
+生成并编译为一个Python函数。每个信号是一个整数，第i位是第i条仿真通道，
+一次求值同时推进成千上万组独立的输入向量，用来在没有原芯片的情况下回放总线时序。
+
+求值语义:
+- 触发器在.CLK表达式的上升沿采样 (!CLK50Mhz即CLK50MHz下降沿)，.CE为时钟使能，
+  .T触发器在T=1时翻转，.AR为异步清零；上电时所有触发器为0
+- 带.OE的引脚是双向的: 方程中引用该引脚时，OE有效取芯片的驱动值，否则取外部输入
+- 组合环 (如address_load锁存器) 以上一次的值为初值迭代到稳定
+- 每次输入变化后反复求值组合逻辑并推进时钟沿，直到不再产生新的时钟沿 (delta周期)
+"""
+import argparse
+import json
+import re
+import time
+
+import numpy as np
+
+import sdrammodel
+
+EQUATIONS_PATH = "equipment.txt"
+DEFAULT_LANES = 16384               # 位并行的通道数
+MAX_DELTA = 16                      # 一次输入变化内的最大delta周期数
+MAX_LOOP = 8                        # 组合环的最大迭代次数
+
+TICK_NS = 10                        # 总线驱动的时间片: CLK50MHz半个周期
+GBA_TICKS = 6                       # 一个GBA周期 (约59.6ns)
+GBA_HALF_TICKS = GBA_TICKS // 2
+
+MODEL_ACCESSES = 256                # 基准测试中每条通道的访问次数
+MODEL_BURST = 8
+SDRAM_INIT_LIMIT_NS = 1_000_000     # 等待SDRAM初始化 (MODE_REG_SET) 的上限
+
+# 总线空闲时的输入电平
+IDLE_INPUTS = ("GP.nCS", "GP_NWR", "GP_NRD")
+ROM_ADDRESS_BITS = 24
+ROM_DATA_BITS = 16
+
+# 配置寄存器 (魔术写入的第3次) 与数据位的关系，按superchis.vhd中的注释
+CONFIG_REGISTERS = {
+    "MAP_REG": lambda d: d & 1,
+    "config_sd_enable": lambda d: (d >> 1) & 1,
+    "WRITE_ENABLE": lambda d: (d >> 2) & 1,
+    "mc_C10": lambda d: (d >> 4) & ~(d >> 8) & (d >> 12) & 1,
+    "mc_G14": lambda d: (d >> 7) & ~(d >> 10) & (d >> 11) & 1,
+    "mc_D9": lambda d: (d >> 7) & (d >> 9) & ~(d >> 15) & 1,
+    "mc_B15": lambda d: (d >> 6) & ~(d >> 13) & (d >> 12) & 1,
+    "mc_C9": lambda d: (d >> 4) & ~(d >> 5) & (d >> 14) & 1,
+}
+
+REGISTER_ATTRIBUTES = ("D", "T", "CLK", "CE", "AR")
+
+_TOKEN_RE = re.compile(r"\s*(?:(\$?[A-Za-z_][\w.]*(?:\[\d+\])?)|([!&|^()]))")
+
+def parseExpression(text):
+    """
+    解析一条适配器方程的右侧
+
+    运算符优先级为 ! > & > ^ > |，true/false为常量。
+
+    Returns:
+        表达式树: ("name", 名称) / ("const", 0或1) / ("not", e) / ("and"|"xor"|"or", [e, ...])
+    """
+    tokens = []
+    pos = 0
+    text = text.strip()
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match:
+            raise ValueError(f"无法解析的方程: {text[pos:]!r}")
+        tokens.append(match.group(1) or match.group(2))
+        pos = match.end()
+    tokens.append(None)
+    index = 0
+
+    def take():
+        nonlocal index
+        index += 1
+        return tokens[index - 1]
+
+    def binary(op, operand):
+        def parse():
+            items = [operand()]
+            while tokens[index] == op:
+                take()
+                items.append(operand())
+            return items[0] if len(items) == 1 else ({"&": "and", "^": "xor", "|": "or"}[op], items)
+        return parse
+
+    def unary():
+        token = take()
+        if token == "!":
+            return ("not", unary())
+        if token == "(":
+            expr = orExpr()
+            if take() != ")":
+                raise ValueError(f"括号不匹配: {text!r}")
+            return expr
+        if token in ("true", "false"):
+            return ("const", int(token == "true"))
+        if token is None or token in "&|^)":
+            raise ValueError(f"缺少操作数: {text!r}")
+        return ("name", token)
+
+    orExpr = binary("|", binary("^", binary("&", unary)))
+    expr = orExpr()
+    if tokens[index] is not None:
+        raise ValueError(f"多余的符号 {tokens[index]!r}: {text!r}")
+    return expr
+
+def expressionNames(expr):
+    """表达式引用的全部信号名"""
+    kind = expr[0]
+    if kind == "name":
+        return {expr[1]}
+    if kind == "const":
+        return set()
+    if kind == "not":
+        return expressionNames(expr[1])
+    return set().union(*(expressionNames(item) for item in expr[1]))
+
+def _statements(text):
+    """按行切分适配报告，合并续行，返回 (左侧列表, 右侧, GLB, 宏单元)"""
+    statements = []
+    glb = macrocell = None
+    for line in text.splitlines():
+        code, _, comment = line.partition("//")
+        if not code.strip():
+            match = re.match(r"\s*Macrocell (\d+)", comment)
+            if match:
+                macrocell = int(match.group(1))
+            continue
+        if line[0].isspace():
+            if not statements:
+                raise ValueError(f"续行之前没有方程: {line!r}")
+            statements[-1][1] += " " + code.strip()
+            continue
+        if code.startswith("GLB "):
+            glb = code.strip()
+            continue
+        parts = [part.strip() for part in code.split("=")]
+        if len(parts) < 2:
+            raise ValueError(f"无法识别的行: {line!r}")
+        statements.append([parts[:-1], parts[-1], glb, macrocell])
+    return statements
+
+def parseEquations(text):
+    """
+    解析适配报告为网表
+
+    "A = $A = expr" 这样的连等式展开为 $A = expr 和 A = $A；
+    X.CLK/.CE/.AR只有在X有.D或.T方程时才是触发器属性 (SD.CLK是引脚名)。
+
+    Returns:
+        dict: nodes (组合信号→表达式)、registers (触发器→{D|T, CLK, CE, AR, glb, macrocell})、
+              oes (双向引脚→OE表达式)、inputs (未定义的信号名)
+    """
+    statements = _statements(text)
+    flops = {target.rpartition(".")[0] for targets, *_ in statements for target in targets
+             if target.rpartition(".")[2] in ("D", "T")}
+    nodes, registers, oes = {}, {}, {}
+
+    def define(table, key, value):
+        if key in table and table[key] != value:
+            raise ValueError(f"{key}被重复定义")
+        table[key] = value
+
+    for targets, rhs, glb, macrocell in statements:
+        expr = parseExpression(rhs)
+        for i, target in enumerate(targets):
+            value = expr if i == len(targets) - 1 else ("name", targets[i + 1])
+            base, dot, attribute = target.rpartition(".")
+            if dot and attribute == "OE":
+                define(oes, base, value)
+            elif dot and attribute in REGISTER_ATTRIBUTES and base in flops:
+                register = registers.setdefault(base, {"glb": glb, "macrocell": macrocell})
+                define(register, attribute, value)
+            else:
+                define(nodes, target, value)
+
+    for name, register in registers.items():
+        if ("D" in register) == ("T" in register):
+            raise ValueError(f"{name}需要且只能有一个.D或.T方程")
+        if "CLK" not in register:
+            raise ValueError(f"{name}缺少.CLK方程")
+    for name in oes:
+        if name not in nodes:
+            raise ValueError(f"{name}有.OE但没有驱动方程")
+
+    used = set()
+    for expr in list(nodes.values()) + list(oes.values()):
+        used |= expressionNames(expr)
+    for register in registers.values():
+        for attribute in REGISTER_ATTRIBUTES:
+            if attribute in register:
+                used |= expressionNames(register[attribute])
+    inputs = sorted((used - set(nodes) - set(registers)) | set(oes))
+    return {"nodes": nodes, "registers": registers, "oes": oes, "inputs": inputs}
+
+def loadEquations(path=EQUATIONS_PATH):
+    """读取并解析适配报告"""
+    with open(path, encoding="utf-8") as f:
+        return parseEquations(f.read())
+
+def _components(graph):
+    """Tarjan强连通分量，被依赖的分量在前"""
+    index, low, stack, onStack, out = {}, {}, [], set(), []
+
+    def visit(v):
+        index[v] = low[v] = len(index)
+        stack.append(v)
+        onStack.add(v)
+        for w in graph[v]:
+            if w not in index:
+                visit(w)
+                low[v] = min(low[v], low[w])
+            elif w in onStack:
+                low[v] = min(low[v], index[w])
+        if low[v] == index[v]:
+            component = []
+            while True:
+                w = stack.pop()
+                onStack.discard(w)
+                component.append(w)
+                if w == v:
+                    break
+            out.append(component)
+
+    for v in graph:
+        if v not in index:
+            visit(v)
+    return out
+
+def packLanes(bits):
+    """布尔数组 (每条通道一位) 打包为整数"""
+    packed = np.packbits(np.asarray(bits, dtype=bool), bitorder="little")
+    return int.from_bytes(packed.tobytes(), "little")
+
+def unpackLanes(value, lanes):
+    """整数展开为每条通道一位的布尔数组"""
+    raw = np.frombuffer(value.to_bytes((lanes + 7) // 8, "little"), dtype=np.uint8)
+    return np.unpackbits(raw, bitorder="little")[:lanes].astype(bool)
+
+def bitLanes(values, bits):
+    """每条通道一个整数值 → 每一位一个通道整数"""
+    values = np.asarray(values, dtype=np.uint32)
+    return [packLanes((values >> bit) & 1) for bit in range(bits)]
+
+class CpldModel:
+    """
+    编译后的适配器网表
+
+    生成两个函数: settle只计算触发器和时钟用到的组合信号并推进时钟沿，
+    observe计算全部组合信号 (含只驱动引脚的信号)，在读取组合信号时按需调用。
+
+    Args:
+        netlist: parseEquations的结果
+        lanes: 并行的通道数，每个信号值的第i位对应第i条通道
+    """
+
+    def __init__(self, netlist, lanes=DEFAULT_LANES):
+        self.netlist = netlist
+        self.lanes = lanes
+        self.mask = (1 << lanes) - 1
+        self.source = self._generate()
+        namespace = {}
+        exec(compile(self.source, "<cpldmodel>", "exec"), namespace)
+        self._settle = namespace["settle"]
+        self._observe = namespace["observe"]
+        self.reset()
+
+    def _combKey(self, name):
+        if name in self.netlist["registers"]:
+            return None
+        if name in self.netlist["oes"]:
+            return ("pad", name)
+        if name in self.netlist["nodes"]:
+            return ("n", name)
+        return None
+
+    def _combDeps(self, expr):
+        return [key for key in map(self._combKey, expressionNames(expr)) if key]
+
+    def _generate(self):
+        """生成settle(s, m, edges)和observe(s, m)的源码"""
+        nodes, registers, oes = self.netlist["nodes"], self.netlist["registers"], self.netlist["oes"]
+        self.slots = {}
+
+        def slot(key, prefix):
+            self.slots[key] = f"{prefix}{len(self.slots)}"
+
+        for name in self.netlist["inputs"]:
+            slot(("in", name), "i")
+        for name in registers:
+            slot(("q", name), "q")
+        for name in nodes:
+            slot(("n", name), "n")
+        for name in oes:
+            slot(("pad", name), "p")
+
+        def ref(name):
+            for kind in ("q", "pad", "n", "in"):
+                if (kind, name) in self.slots:
+                    return self.slots[(kind, name)]
+            raise KeyError(name)
+
+        def py(expr, inverted=None):
+            """inverted不为None时，取反的信号改用预先算好的x_n并记录在inverted中"""
+            kind = expr[0]
+            if kind == "name":
+                return ref(expr[1])
+            if kind == "const":
+                return "m" if expr[1] else "0"
+            if kind == "not":
+                if inverted is not None and expr[1][0] == "name":
+                    inverted.add(ref(expr[1][1]))
+                    return f"{ref(expr[1][1])}_n"
+                return f"({py(expr[1], inverted)} ^ m)"
+            op = {"and": " & ", "xor": " ^ ", "or": " | "}[kind]
+            return "(" + op.join(py(item, inverted) for item in expr[1]) + ")"
+
+        # 组合信号与双向引脚的依赖图
+        graph = {("n", name): self._combDeps(expr) for name, expr in nodes.items()}
+        for name, oe in oes.items():
+            graph[("pad", name)] = [("n", name)] + self._combDeps(oe)
+
+        def closure(keys):
+            seen = set()
+            pending = list(keys)
+            while pending:
+                key = pending.pop()
+                if key not in seen:
+                    seen.add(key)
+                    pending.extend(graph[key])
+            return seen
+
+        def assign(key):
+            target = self.slots[key]
+            if key[0] == "pad":
+                name = key[1]
+                enable = py(oes[name])
+                return f"{target} = ({self.slots[('n', name)]} & {enable}) | ({self.slots[('in', name)]} & ({enable} ^ m))"
+            return f"{target} = {py(nodes[key[1]])}"
+
+        def combinational(keys):
+            """按依赖排序，环路以上一次的值为初值迭代"""
+            subgraph = {key: [k for k in graph[key] if k in keys] for key in graph if key in keys}
+            out = []
+            for component in _components(subgraph):
+                if len(component) == 1 and component[0] not in subgraph[component[0]]:
+                    out.append(assign(component[0]))
+                    continue
+                names = ", ".join(self.slots[key] for key in component)
+                out.append(f"for _ in range({MAX_LOOP}):")
+                out.append(f"    o = ({names},)")
+                out.extend("    " + assign(key) for key in component)
+                out.append(f"    if o == ({names},): break")
+                out.append("else: raise RuntimeError('组合环不收敛')")
+            return out
+
+        attributes = [register[attribute] for register in registers.values()
+                      for attribute in REGISTER_ATTRIBUTES if attribute in register]
+        needed = closure(key for expr in attributes for key in self._combDeps(expr))
+        self.observed = set(graph) - needed
+        body = combinational(needed)
+
+        # 异步清零
+        resets = [(self.slots[("q", name)], py(register["AR"]))
+                  for name, register in registers.items() if "AR" in register]
+        clearLines = ["a = 0"]
+        for target, expr in resets:
+            clearLines.append(f"t = {target} & {expr}")
+            clearLines.append(f"if t: {target} ^= t; a = 1")
+        if resets:
+            body.extend(clearLines)
+            body.append("if a: continue")
+
+        # 时钟沿，同一时钟表达式共用一组
+        clocks = {}
+        for name, register in registers.items():
+            clocks.setdefault(py(register["CLK"]), []).append(name)
+        for k, clock in enumerate(clocks):
+            self.slots[("clk", clock)] = f"c{k}"
+            body.append(f"t = {clock}; e{k} = t & (c{k} ^ m); c{k} = t")
+        body.append("if not edges: break")
+        body.append("if not (" + " | ".join(f"e{k}" for k in range(len(clocks))) + "): break")
+        self.clockGroups = list(clocks.values())
+
+        # 先用沿前的值算出所有次态，再统一写入
+        # 同一组内反复出现的取反信号只算一次
+        for k, group in enumerate(clocks.values()):
+            inverted = set()
+            lines = []
+            for name in group:
+                register = registers[name]
+                target = self.slots[("q", name)]
+                enable = f"e{k} & {py(register['CE'], inverted)}" if "CE" in register else f"e{k}"
+                lines.append(f"    w{target} = {enable}")
+                lines.append(f"    u{target} = {py(register['D'] if 'D' in register else register['T'], inverted)}")
+            body.append(f"if e{k}:")
+            body.extend(f"    {variable}_n = {variable} ^ m" for variable in sorted(inverted))
+            body.extend(lines)
+        for k, group in enumerate(clocks.values()):
+            body.append(f"if e{k}:")
+            for name in group:
+                target = self.slots[("q", name)]
+                if "D" in registers[name]:
+                    body.append(f"    {target} ^= ({target} ^ u{target}) & w{target}")
+                else:
+                    body.append(f"    {target} ^= u{target} & w{target}")
+
+        # 时钟只取决于输入、清零只取决于触发器时，写入后不会再产生时钟沿，
+        # 直接处理清零并结束，组合信号留到下一次求值
+        clockDeps = set().union(*(expressionNames(r["CLK"]) for r in registers.values()))
+        clockKeys = closure(key for key in map(self._combKey, clockDeps) if key)
+        clockNames = clockDeps | {key[1] for key in clockKeys}
+        clearNames = set().union(*(expressionNames(r["AR"]) for r in registers.values() if "AR" in r))
+        self.fastUpdate = (not (clockNames & set(registers))
+                           and clearNames <= set(registers) | set(self.netlist["inputs"]))
+        if self.fastUpdate:
+            if resets:
+                body.append("while True:")
+                body.extend("    " + line for line in clearLines)
+                body.append("    if not a: break")
+            body.append("break")
+
+        variables = ", ".join(self.slots.values())
+        lines = ["def settle(s, m, edges):",
+                 f"    {variables}, = s",
+                 f"    for _ in range({MAX_DELTA}):"]
+        lines.extend("        " + line for line in body)
+        lines.append("    else:")
+        lines.append("        raise RuntimeError('时钟沿不收敛')")
+        lines.append(f"    s[:] = ({variables},)")
+        lines.append("")
+        lines.append("def observe(s, m):")
+        lines.append(f"    {variables}, = s")
+        lines.extend("    " + line for line in combinational(set(graph)))
+        lines.append(f"    s[:] = ({variables},)")
+        return "\n".join(lines) + "\n"
+
+    def reset(self, inputs=None):
+        """
+        上电: 所有触发器和组合环清零，输入为总线空闲电平
+
+        Args:
+            inputs: 覆盖的初始输入 {名称: 通道整数}
+        """
+        values = {name: self.mask for name in IDLE_INPUTS if name in self.netlist["inputs"]}
+        values.update(inputs or {})
+        self.state = [0] * len(self.slots)
+        self._order = {key: i for i, key in enumerate(self.slots)}
+        self._setInputs(values)
+        self._settle(self.state, self.mask, False)
+        self._stale = True
+
+    def _setInputs(self, values):
+        state = self.state
+        order = self._order
+        for name, value in values.items():
+            index = order.get(("in", name))
+            if index is None:
+                raise ValueError(f"{name}不是输入")
+            state[index] = value & self.mask
+
+    def step(self, values=None):
+        """
+        改变输入并推进到稳定
+
+        Args:
+            values: {输入名: 通道整数}，第i位为第i条通道的电平
+        """
+        if values:
+            self._setInputs(values)
+        self._settle(self.state, self.mask, True)
+        self._stale = True
+
+    def get(self, name):
+        """信号的当前值 (通道整数)；双向引脚返回引脚上的电平"""
+        for kind in ("q", "pad", "n", "in"):
+            index = self._order.get((kind, name))
+            if index is None:
+                continue
+            if kind in ("pad", "n") and self._stale:
+                self._observe(self.state, self.mask)
+                self._stale = False
+            return self.state[index]
+        raise KeyError(name)
+
+    def broadcast(self, source):
+        """把单通道模型的状态复制到所有通道"""
+        if source.lanes != 1 or source.netlist is not self.netlist:
+            raise ValueError("只能从同一网表的单通道模型复制")
+        self.state = [self.mask if value else 0 for value in source.state]
+        self._stale = True
+
+    def set(self, name, value):
+        """直接改写触发器的值 (用于从已知状态开始仿真)"""
+        self.state[self._order[("q", name)]] = value & self.mask
+        self._stale = True
+
+    def word(self, names):
+        """一组信号 (低位在前) 合并为每条通道一个整数"""
+        out = np.zeros(self.lanes, dtype=np.uint32)
+        for bit, name in enumerate(names):
+            out |= unpackLanes(self.get(name), self.lanes).astype(np.uint32) << bit
+        return out
+
+    def summary(self):
+        """网表统计"""
+        registers = self.netlist["registers"]
+        return {
+            "combinational": len(self.netlist["nodes"]),
+            "observe_only": len(self.observed),
+            "d_flip_flops": sum("D" in r for r in registers.values()),
+            "t_flip_flops": sum("T" in r for r in registers.values()),
+            "bidirectional": len(self.netlist["oes"]),
+            "inputs": len(self.netlist["inputs"]),
+            "clock_domains": len(self.clockGroups),
+            "fast_update": self.fastUpdate,
+            "source_lines": self.source.count("\n"),
+        }
+
+
+class GbaBus:
+    """
+    按GBA卡带总线时序驱动模型 (与sdrammodel.gbaTrace相同的选通时序)
+
+    每个时间片为CLK50MHz半个周期，所有通道的控制信号同步变化，地址和数据按通道各不相同。
+    在CLK50MHz上升沿统计SDRAM命令。
+    """
+
+    def __init__(self, model, n_wait=sdrammodel.GBA_N_WAIT, s_wait=sdrammodel.GBA_S_WAIT):
+        self.model = model
+        self.n_wait = n_wait
+        self.s_wait = s_wait
+        self.clock = 0
+        self.ticks = 0
+        self.accesses = 0
+        self.commands = {"activate": 0, "read": 0, "write": 0, "refresh": 0, "precharge": 0, "mode_set": 0}
+
+    def idle(self, count):
+        """推进count个时间片 (CLK50MHz半个周期)"""
+        model = self.model
+        for _ in range(count):
+            self.clock ^= model.mask
+            model.step({"CLK50Mhz": self.clock})
+            if self.clock:
+                self._sample()
+        self.ticks += count
+
+    def _sample(self):
+        """SDRAM在CLK50MHz上升沿采样的命令 (直接读触发器，不触发组合信号求值)"""
+        model = self.model
+        m = model.mask
+        ras, cas, we = (model.get(pin) ^ m for pin in ("$SDRAM.nRAS", "$SDRAM.nCAS", "$SDRAM.nWE"))
+        if not (ras | cas):
+            return
+        counts = self.commands
+        counts["activate"] += (ras & ~cas & ~we).bit_count()
+        counts["precharge"] += (ras & ~cas & we).bit_count()
+        counts["read"] += (~ras & cas & ~we & m).bit_count()
+        counts["write"] += (~ras & cas & we & m).bit_count()
+        counts["refresh"] += (ras & cas & ~we & model.get("$SDRAM.CKE")).bit_count()
+        counts["mode_set"] += (ras & cas & we & model.get("$SDRAM.CKE")).bit_count()
+
+    def _address(self, addrs):
+        return {f"GP.AD[{bit}]": lanes for bit, lanes in enumerate(bitLanes(addrs, ROM_ADDRESS_BITS))}
+
+    def _data(self, data):
+        return {f"GP.AD[{bit}]": lanes for bit, lanes in enumerate(bitLanes(data, ROM_DATA_BITS))}
+
+    def access(self, addrs, count=1, write=False, data=None, callback=None):
+        """
+        一次N访问加count-1次S访问
+
+        Args:
+            addrs: 每条通道的字地址
+            count: 连续访问次数
+            write: True为写 (/WR)，否则为读 (/RD)
+            data: 写入的数据，形状为 (count, 通道数)
+            callback: 每次选通结束后调用callback(k)
+        """
+        model = self.model
+        m = model.mask
+        strobe = "GP_NWR" if write else "GP_NRD"
+        model.step({**self._address(addrs), "GP.nCS": m, "GP_NRD": m, "GP_NWR": m})
+        self.idle(GBA_TICKS)
+        model.step({"GP.nCS": 0})
+        self.idle(GBA_HALF_TICKS)
+        for k in range(count):
+            if k:
+                self.idle(GBA_HALF_TICKS)
+            values = self._data(data[k] if write and data is not None else np.zeros(model.lanes))
+            values[strobe] = 0
+            model.step(values)
+            wait = self.n_wait if k == 0 else self.s_wait
+            self.idle((wait + 1) * GBA_TICKS - GBA_HALF_TICKS)
+            model.step({strobe: m})
+            if callback:
+                callback(k)
+        model.step({"GP.nCS": m})
+        self.accesses += count
+
+    def unlock(self, config):
+        """魔术地址写入两次0xA55A和两次配置值 (config为每条通道的配置)"""
+        addrs = np.full(self.model.lanes, sdrammodel.MAGIC_ADDRESS_WORD, dtype=np.uint32)
+        magic = np.full((1, self.model.lanes), sdrammodel.MAGIC_VALUE, dtype=np.uint32)
+        config = np.broadcast_to(np.asarray(config, dtype=np.uint32), (1, self.model.lanes))
+        for value in (magic, magic, config, config):
+            self.access(addrs, write=True, data=value)
+
+def runCheck(model, rng, bursts=8, burst=MODEL_BURST):
+    """
+    自检: 按通道随机的配置解锁后检查配置寄存器，再以随机地址突发读检查IADDR计数
+
+    Returns:
+        list: (项目, 出错通道数)
+    """
+    lanes = model.lanes
+    results = []
+    model.reset()
+    bus = GbaBus(model)
+    config = rng.integers(0, 0x10000, lanes, dtype=np.uint32)
+    bus.unlock(config)
+    for name, expected in CONFIG_REGISTERS.items():
+        errors = int((model.word([name]) != expected(config)).sum())
+        results.append((f"配置寄存器 {name}", errors))
+
+    iaddr = [f"IADDR[{bit}]" for bit in range(16)]
+    errors = np.zeros(lanes, dtype=bool)
+    for _ in range(bursts):
+        addrs = rng.integers(0, 1 << ROM_ADDRESS_BITS, lanes, dtype=np.uint32)
+        def check(k):
+            errors[:] |= model.word(iaddr) != ((addrs + k + 1) & 0xFFFF)
+        bus.access(addrs, count=burst, callback=check)
+    results.append(("突发读IADDR计数", int(errors.sum())))
+    return results
+
+def sdramWarmUp(netlist, config=None, n_wait=sdrammodel.GBA_N_WAIT, s_wait=sdrammodel.GBA_S_WAIT):
+    """
+    上电初始化对所有通道相同: 用单通道模型推进到MODE_REG_SET之后，再用broadcast复制到多通道模型
+
+    Args:
+        config: 先写入的解锁配置，None为不解锁
+
+    Returns:
+        (单通道模型, 其GbaBus)
+    """
+    warm = CpldModel(netlist, 1)
+    warmBus = GbaBus(warm, n_wait, s_wait)
+    if config is not None:
+        warmBus.unlock(config)
+    while not warmBus.commands["mode_set"] and warmBus.ticks * TICK_NS < SDRAM_INIT_LIMIT_NS:
+        warmBus.idle(GBA_TICKS)
+    warmBus.idle(GBA_TICKS)
+    return warm, warmBus
+
+def runBenchmark(model, rng, accesses=MODEL_ACCESSES, burst=MODEL_BURST, n_wait=sdrammodel.GBA_N_WAIT,
+                 s_wait=sdrammodel.GBA_S_WAIT):
+    """
+    解锁SDRAM映射和写使能、等待SDRAM初始化完成后回放随机地址的读写突发
+
+    Returns:
+        dict: 每条通道的访问数、总线访问/秒 (所有通道合计)、SDRAM命令计数
+    """
+    warm, warmBus = sdramWarmUp(model.netlist, sdrammodel.CONFIG_MAP_DDR | sdrammodel.CONFIG_WRITE_ENABLE,
+                                n_wait, s_wait)
+    model.broadcast(warm)
+    bus = GbaBus(model, n_wait, s_wait)
+    bus.clock = model.mask if warmBus.clock else 0
+    start = time.perf_counter()
+    while bus.accesses < accesses:
+        count = min(burst, accesses - bus.accesses)
+        addrs = rng.integers(0, 1 << ROM_ADDRESS_BITS, model.lanes, dtype=np.uint32)
+        write = bool(rng.integers(0, 2))
+        data = rng.integers(0, 0x10000, (count, model.lanes), dtype=np.uint32) if write else None
+        bus.access(addrs, count, write=write, data=data)
+    seconds = time.perf_counter() - start
+    total = bus.accesses * model.lanes
+    return {
+        "lanes": model.lanes,
+        "init_ns": warmBus.ticks * TICK_NS if warmBus.commands["mode_set"] else None,
+        "accesses_per_lane": bus.accesses,
+        "simulated_ns": bus.ticks * TICK_NS,
+        "seconds": seconds,
+        "bus_cycles_per_second": total / seconds if seconds > 0 else None,
+        "commands_per_lane": {name: count / model.lanes for name, count in bus.commands.items()},
+    }
+
+def printSummary(summary):
+    print(f"网表: 组合信号{summary['combinational']} (只驱动引脚{summary['observe_only']})，D触发器{summary['d_flip_flops']}，"
+          f"T触发器{summary['t_flip_flops']}，双向引脚{summary['bidirectional']}，"
+          f"输入{summary['inputs']}，时钟域{summary['clock_domains']}，生成代码{summary['source_lines']}行")
+
+def printBenchmark(result):
+    rate = result["bus_cycles_per_second"] or 0
+    print(f"基准: {result['lanes']}通道 × {result['accesses_per_lane']}次访问，"
+          f"仿真{result['simulated_ns'] / 1000:.1f}us，用时{result['seconds']:.2f}秒，"
+          f"{rate / 1e6:.2f}M总线访问/秒")
+    init = result["init_ns"]
+    print(f"  SDRAM初始化: " + (f"{init / 1000:.1f}us后MODE_REG_SET" if init is not None else "未完成"))
+    commands = result["commands_per_lane"]
+    print("  每通道SDRAM命令: " + "，".join(f"{name} {count:.1f}" for name, count in commands.items()))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="equipment.txt适配器方程的位并行求值器")
+    parser.add_argument("--equations", default=EQUATIONS_PATH, help="适配报告路径")
+    parser.add_argument("--lanes", type=int, default=DEFAULT_LANES, help="并行通道数")
+    parser.add_argument("--accesses", type=int, default=MODEL_ACCESSES, help="基准测试中每条通道的访问次数 (0跳过)")
+    parser.add_argument("--burst", type=int, default=MODEL_BURST, help="突发长度")
+    parser.add_argument("--n-wait", type=int, default=sdrammodel.GBA_N_WAIT, help="第一次访问的等待周期 (WAITCNT)")
+    parser.add_argument("--s-wait", type=int, default=sdrammodel.GBA_S_WAIT, help="连续访问的等待周期 (WAITCNT)")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子")
+    parser.add_argument("--source", metavar="PATH", help="把生成的求值函数保存为.py")
+    parser.add_argument("--json", metavar="PATH", help="把结果写入JSON文件")
+    args = parser.parse_args()
+    if args.burst <= 0:
+        parser.error(f"突发长度必须大于0: {args.burst}")
+
+    model = CpldModel(loadEquations(args.equations), args.lanes)
+    summary = model.summary()
+    printSummary(summary)
+    if args.source:
+        with open(args.source, "w", encoding="utf-8") as f:
+            f.write(model.source)
+        print(f"求值函数已保存: {args.source}")
+
+    rng = np.random.default_rng(args.seed)
+    check = runCheck(model, rng)
+    for name, errors in check:
+        print(f"  {'✓' if errors == 0 else '✗'} {name}" + (f": {errors}通道不符" if errors else ""))
+
+    result = {"summary": summary, "check": dict(check)}
+    if args.accesses > 0:
+        result["benchmark"] = runBenchmark(model, rng, args.accesses, args.burst, args.n_wait, args.s_wait)
+        printBenchmark(result["benchmark"])
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入: {args.json}")
@@ -0,0 +1,800 @@
+"""
+适配器网表 (equipment.txt) 与superchis.vhd重新实现之间的批量等价性模糊测试
+
+两边用相同的随机GBA总线序列驱动 (地址加载、自动递增、魔术写入、bootleg Bank写入、读写突发)：
+- 原芯片: cpldmodel.CpldModel编译的适配器方程
+- VHDL: 本文件的VhdlModel，按superchis.vhd各进程逐条实现的位并行行为模型
+
+比较的信号 (VHDL注释中声明的对应关系):
+- ADDRESS: IADDR[15:0] 与 internal_address
+- FLASH_A: FLASH.A引脚按 FLASH.A[k] = IADDR[j] 还原成逻辑地址 与 FLASH_A
+- FLASH_HIGH: GP_23..21 + (mc_C10, mc_G14, mc_D9, mc_B15, mc_C9) 与 FLASH_HIGH
+- SRAM_A16: 引脚电平
+- DDR: 每次访问中的ACTIVATE和READ/WRITE命令及其Bank/行/列地址 (不含刷新)
+
+两边的SDRAM初始化流程不同 (原芯片按时间，VHDL等魔术写入)，DDR比较从两边都已初始化开始。
+每条通道一个随机序列，出现分歧的序列用位并行的候选批次逐步删减到最短。
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import re
+import time
+
+import numpy as np
+
+import cpldmodel
+import sdrammodel
+
+PROBES = ("ADDRESS", "FLASH_A", "FLASH_HIGH", "SRAM_A16", "DDR")
+BANK_DECODES = ("gp", "original")
+
+FUZZ_LANES = 4096                   # 每批的序列数 (位并行通道数)
+FUZZ_LENGTH = 12                    # 每个序列的操作数
+FUZZ_SECONDS = 60.0
+MAX_BURST = 4                       # 一次操作中连续访问的上限
+MINIMIZE_LANES = 64                 # 删减时一批候选的通道数
+UNLOCK_SHARE = 0.5                  # 以完整解锁序列开头的序列比例
+
+# 操作类型
+IDLE, READ, WRITE = 0, 1, 2
+# 地址类别: 魔术地址、bootleg SRAM Bank地址、其他 (含两者的前一个字，连续访问时递增进入)
+ADDRESS_CLASSES = 3
+# 写入值类别: 0xA55A、只有低12位匹配 (x55A)、随机
+DATA_CLASSES = 3
+# 覆盖率统计用的操作类别: 空闲、3种地址的读、3×3种地址与写入值的写
+OP_CLASSES = 1 + ADDRESS_CLASSES + ADDRESS_CLASSES * DATA_CLASSES
+COVERAGE_WINDOW = 4                 # 统计连续4次操作的类别组合 (4次写入解锁的状态空间)
+
+BOOTLEG_SRAM_BANK_WORD = sdrammodel.BOOTLEG_SRAM_BANK_WORD
+MAGIC_ADDRESS_WORD = sdrammodel.MAGIC_ADDRESS_WORD
+MAGIC_VALUE = sdrammodel.MAGIC_VALUE
+MODE_REGISTER = 0b0000000100000     # CAS=2, BL=1
+
+# 原芯片中对应config_bank_select(0..4)的宏单元 (superchis.vhd的注释)
+FITTER_BANK_REGISTERS = ("mc_C10", "mc_G14", "mc_D9", "mc_B15", "mc_C9")
+
+def _merge(old, new, enable):
+    """enable为1的通道取new"""
+    return old ^ ((old ^ new) & enable)
+
+def _add(a, b):
+    """两个位切片整数 (低位在前) 相加，结果取a的位数"""
+    out = []
+    carry = 0
+    for x, y in zip(a, b):
+        out.append(x ^ y ^ carry)
+        carry = (x & y) | (carry & (x ^ y))
+    return out
+
+def _equals(bits, value, mask):
+    """位切片整数等于常量的通道"""
+    out = mask
+    for bit, lane in enumerate(bits):
+        out &= lane if (value >> bit) & 1 else lane ^ mask
+    return out
+
+class VhdlModel:
+    """
+    superchis.vhd的位并行行为模型，与CpldModel相同的step/get接口
+
+    覆盖魔术解锁、bootleg SRAM Bank、地址计数器、FLASH_HIGH、sdram_syncer和sdram_controller，
+    SD接口不建模。输入名沿用适配报告 (GP.AD[n]、GP.nCS、GP_NWR、GP_NRD、CLK50Mhz)。
+
+    Args:
+        lanes: 通道数
+        bank_decode: "gp"按当前VHDL加载GP(7 downto 3)，"original"按注释中原芯片的译码
+        initialized: True时SDRAM状态机从SDRAM_IDLE开始
+    """
+
+    def __init__(self, lanes, bank_decode="gp", initialized=False):
+        if bank_decode not in BANK_DECODES:
+            raise ValueError(f"未知的Bank译码: {bank_decode}")
+        self.lanes = lanes
+        self.mask = (1 << lanes) - 1
+        self.bank_decode = bank_decode
+        self.initialized = initialized
+        self.reset()
+
+    def reset(self, clock=0):
+        """按VHDL中的信号初值上电，clock为CLK50MHz的初始电平"""
+        m = self.mask
+        self.inputs = {f"GP.AD[{bit}]": 0 for bit in range(cpldmodel.ROM_ADDRESS_BITS)}
+        self.inputs.update({name: m for name in cpldmodel.IDLE_INPUTS})
+        self.inputs["CLK50Mhz"] = clock
+        self.address_load = m
+        self.addr_clock = 0
+        self.nwr = m
+        self.clk = clock
+        self.internal_address = [0] * 16
+        self.magic_write_count = [0, 0]
+        self.config_map_reg = self.config_sd_enable = self.config_write_enable = self.config_sram_bank = 0
+        self.config_bank_select = [0] * 5
+        self.address_load_sync = self.address_load_sync2 = 0
+        self.gba_bus_idle_sync = self.gba_bus_idle_sync_d1 = m
+        self.gba_bus_wr_sync = self.gba_bus_rd_sync = self.n_ddr_sel = m
+        # sdram_state按状态独热编码
+        self.state = dict.fromkeys(("power_up", "precharge_all", "auto_refresh", "mode_reg_set", "idle"), 0)
+        self.state["idle" if self.initialized else "power_up"] = m
+        self.refresh_counter = [0] * 9
+        self.refresh_needed = 0
+        self.ddr_cycle_counter = [0] * 4
+        self.ddr_addr_reg = [0] * 13
+        self.ddr_ba_reg = [0] * 2
+        self.ddr_cke_reg = m if self.initialized else 0
+        self.ddr_ras_reg = self.ddr_cas_reg = self.ddr_we_reg = m
+
+    def _gp(self):
+        return [self.inputs[f"GP.AD[{bit}]"] for bit in range(16)]
+
+    def _high(self):
+        return [self.inputs[f"GP.AD[{bit}]"] for bit in range(16, 24)]
+
+    def magicAddress(self):
+        return _equals(self.internal_address + self._high(), MAGIC_ADDRESS_WORD, self.mask)
+
+    def bootlegAddress(self):
+        return _equals(self.internal_address + self._high(), BOOTLEG_SRAM_BANK_WORD, self.mask)
+
+    def magicValueMatch(self):
+        return _equals(self._gp(), MAGIC_VALUE, self.mask)
+
+    def step(self, values=None):
+        """改变输入并处理各进程的时钟沿"""
+        if values:
+            for name, value in values.items():
+                if name not in self.inputs:
+                    raise ValueError(f"{name}不是输入")
+                self.inputs[name] = value & self.mask
+        m = self.mask
+        ncs, nwr, nrd = (self.inputs[name] for name in ("GP.nCS", "GP_NWR", "GP_NRD"))
+        address_load = (nwr & nrd & self.address_load) | ncs
+        addr_clock = ((ncs ^ m) & nwr & nrd) | (ncs & (nrd ^ m)) | (ncs & (nwr ^ m))
+
+        fall = self.nwr & (nwr ^ m)
+        if fall:
+            self._magicProcess(fall)
+        rise = addr_clock & (self.addr_clock ^ m)
+        if rise:
+            self._addressCounter(rise, address_load)
+        self.address_load = address_load
+        self.addr_clock = addr_clock
+        self.nwr = nwr
+
+        clk = self.inputs["CLK50Mhz"]
+        rise, fall = clk & (self.clk ^ m), self.clk & (clk ^ m)
+        self.clk = clk
+        if rise:
+            self._syncer(rise)
+        if fall:
+            self._controller(fall)
+
+    def _magicProcess(self, edge):
+        """falling_edge(GP_NWR): 魔术序列状态机与bootleg SRAM Bank"""
+        m = self.mask
+        gp = self._gp()
+        magic = self.magicAddress() & edge
+        bootleg = self.bootlegAddress() & edge & (magic ^ m)
+        other = edge & ((magic | bootleg) ^ m)
+        match = self.magicValueMatch()
+        w0, w1 = self.magic_write_count
+        n0 = ((w0 | w1) ^ m) & match | (w1 & (w0 ^ m))
+        n1 = (w0 & (w1 ^ m) & match) | (w1 & (w0 ^ m))
+        load = magic & w0 & w1
+        self.magic_write_count = [_merge(w0, n0, magic) & (other ^ m), _merge(w1, n1, magic) & (other ^ m)]
+
+        if load:
+            self.config_map_reg = _merge(self.config_map_reg, gp[0], load)
+            self.config_sd_enable = _merge(self.config_sd_enable, gp[1], load)
+            if self.bank_decode == "gp":
+                bank = gp[3:8]
+            else:
+                bank = [gp[4] & (gp[8] ^ m) & gp[12],    # mc_C10
+                        gp[7] & (gp[10] ^ m) & gp[11],   # mc_G14
+                        gp[7] & gp[9] & (gp[15] ^ m),    # mc_D9
+                        gp[6] & (gp[13] ^ m) & gp[12],   # mc_B15
+                        gp[4] & (gp[5] ^ m) & gp[14]]    # mc_C9
+            self.config_bank_select = [_merge(old, new, load) for old, new in zip(self.config_bank_select, bank)]
+        sram = bootleg & (self.config_write_enable ^ m)
+        if load:
+            self.config_write_enable = _merge(self.config_write_enable, gp[2], load)
+        if sram:
+            self.config_sram_bank = _merge(self.config_sram_bank, gp[0], sram)
+
+    def _addressCounter(self, edge, address_load):
+        """rising_edge(addr_clock): 加载地址或自动递增"""
+        gp = self._gp()
+        load = edge & address_load
+        carry = edge & (address_load ^ self.mask)
+        out = []
+        for bit, value in enumerate(self.internal_address):
+            value = _merge(value, gp[bit], load)
+            out.append(value ^ carry)
+            carry &= value
+        self.internal_address = out
+
+    def _syncer(self, edge):
+        """sdram_syncer: CLK50MHz上升沿同步GBA信号"""
+        m = self.mask
+        nwr, nrd, ncs = self.inputs["GP_NWR"], self.inputs["GP_NRD"], self.inputs["GP.nCS"]
+        updates = {
+            "address_load_sync2": self.address_load_sync,
+            "address_load_sync": self.address_load,
+            "gba_bus_idle_sync_d1": self.gba_bus_idle_sync,
+            "gba_bus_idle_sync": nwr & nrd,
+            "gba_bus_wr_sync": nwr | (self.config_write_enable ^ m),
+            "gba_bus_rd_sync": nrd,
+            "n_ddr_sel": ncs | (self.config_map_reg ^ m) | (self.config_sd_enable & self.inputs["GP.AD[23]"]),
+        }
+        for name, value in updates.items():
+            setattr(self, name, _merge(getattr(self, name), value, edge))
+
+    def _controller(self, edge):
+        """sdram_controller: CLK50MHz下降沿的SDRAM状态机"""
+        m = self.mask
+        state = self.state
+        idle_sync = self.gba_bus_idle_sync
+        ras, cas, we = self.ddr_ras_reg, self.ddr_cas_reg, self.ddr_we_reg
+        cke = self.ddr_cke_reg
+        addr = list(self.ddr_addr_reg)
+        ba = list(self.ddr_ba_reg)
+        nextState = {}
+
+        # 初始化序列
+        power_up = state["power_up"] & edge
+        precharge = state["precharge_all"] & edge
+        refresh = state["auto_refresh"] & edge
+        mode = state["mode_reg_set"] & edge
+        init = power_up | precharge | refresh | mode
+        cke = _merge(cke, 0, power_up)
+        cke = _merge(cke, m, precharge)
+        ras = _merge(ras, power_up, init)
+        cas = _merge(cas, power_up | precharge, init)
+        we = _merge(we, power_up | refresh, init)
+        addr = [_merge(value, precharge if bit == 10 else (mode if (MODE_REGISTER >> bit) & 1 else 0), init)
+                for bit, value in enumerate(addr)]
+        ba = [_merge(value, 0, init) for value in ba]
+        toPrecharge = power_up & (idle_sync ^ m)
+        toRefresh = precharge & idle_sync
+        toMode = refresh & self.magicValueMatch() & self.magicAddress()
+        nextState["power_up"] = state["power_up"] & (toPrecharge ^ m)
+        nextState["precharge_all"] = (state["precharge_all"] & (toRefresh ^ m)) | toPrecharge
+        nextState["auto_refresh"] = (state["auto_refresh"] & (toMode ^ m)) | toRefresh
+        nextState["mode_reg_set"] = (state["mode_reg_set"] & (mode ^ m)) | toMode
+        nextState["idle"] = state["idle"] | mode
+
+        # SDRAM_IDLE
+        idle = state["idle"] & edge
+        if idle:
+            high = self._high()
+            d1 = self.gba_bus_idle_sync_d1
+            due = self.refresh_counter[8] & self.refresh_counter[7]   # refresh_counter >= 384
+            issue = idle & self.refresh_needed & (self.n_ddr_sel | ((d1 ^ m) & idle_sync))
+            access = idle & (issue ^ m) & (self.n_ddr_sel ^ m) & ((self.gba_bus_wr_sync & self.gba_bus_rd_sync) ^ m)
+            activate = access & d1
+            c = self.ddr_cycle_counter
+            window = ((c[3] | c[2] | (c[1] & c[0])) ^ m)                 # ddr_cycle_counter <= 2
+            column = access & (d1 ^ m) & window
+
+            ras = _merge(ras, (issue | activate) ^ m, idle)
+            cas = _merge(cas, (issue | column) ^ m, idle)
+            we = _merge(we, (column ^ m) | self.gba_bus_wr_sync, idle)
+            row = self.internal_address[9:16] + high[0:6]
+            col = self.internal_address[0:9] + [0, column, 0, 0]
+            addr = [_merge(value, (r & activate) | (k & column), idle) for value, r, k in zip(addr, row, col)]
+            ba = [_merge(value, high[6 + bit] & (activate | column), idle) for bit, value in enumerate(ba)]
+
+            counter = []
+            carry = idle
+            for value in c:
+                counter.append(value ^ carry)
+                carry &= value
+            self.ddr_cycle_counter = [value & (activate ^ m) for value in counter]
+            counter = []
+            carry = idle
+            for value in self.refresh_counter:
+                counter.append(value ^ carry)
+                carry &= value
+            self.refresh_counter = [value & ((idle & due) ^ m) for value in counter]
+            needed = self.refresh_needed | (idle & due)
+            self.refresh_needed = needed & (issue ^ m)
+
+        self.state = nextState
+        self.ddr_ras_reg, self.ddr_cas_reg, self.ddr_we_reg, self.ddr_cke_reg = ras, cas, we, cke
+        self.ddr_addr_reg, self.ddr_ba_reg = addr, ba
+
+    def flashHigh(self):
+        """FLASH_HIGH = (0, 0, GP_23, GP_22, GP_21) + config_bank_select"""
+        high = self._high()
+        return _add([high[5], high[6], high[7], 0, 0], self.config_bank_select)
+
+    def get(self, name):
+        """信号值 (通道整数)，名称可带 [位]"""
+        base, _, index = name.partition("[")
+        if base == "FLASH_A":
+            base = "internal_address"
+        elif base == "FLASH_HIGH":
+            return self.flashHigh()[int(index[:-1])]
+        elif base == "SRAM_A16":
+            return self.config_write_enable | self.config_sram_bank
+        if name in self.inputs:
+            return self.inputs[name]
+        value = getattr(self, base)
+        return value[int(index[:-1])] if index else value
+
+def flashPinMap(netlist):
+    """
+    从适配器方程找出FLASH.A[k]对应的IADDR[j]
+
+    Returns:
+        dict: j → k
+    """
+    nodes = netlist["nodes"]
+    pins = {}
+    for name in nodes:
+        match = re.fullmatch(r"FLASH\.A\[(\d+)\]", name)
+        if not match:
+            continue
+        expr = nodes[name]
+        while expr[0] == "name" and expr[1] in nodes:
+            expr = nodes[expr[1]]
+        bits = [int(n[6:-1]) for n in cpldmodel.expressionNames(expr) if n.startswith("IADDR[")]
+        if len(bits) != 1:
+            raise ValueError(f"{name}不只对应一个IADDR位: {bits}")
+        pins[bits[0]] = int(match.group(1))
+    if sorted(pins) != list(range(16)):
+        raise ValueError("FLASH.A引脚与IADDR位不是一一对应")
+    return pins
+
+def fitterProbes(model, pinMap):
+    """原芯片一侧的比较值 (不含DDR)，每个为位切片整数列表"""
+    high = [model.get(f"GP.AD[{bit}]") for bit in (21, 22, 23)] + [0, 0]
+    bank = [model.get(name) for name in FITTER_BANK_REGISTERS]
+    return {
+        "ADDRESS": [model.get(f"IADDR[{bit}]") for bit in range(16)],
+        "FLASH_A": [model.get(f"FLASH.A[{pinMap[bit]}]") for bit in range(16)],
+        "FLASH_HIGH": _add(high, bank),
+        "SRAM_A16": [model.get("SRAM.A16")],
+    }
+
+def vhdlProbes(model):
+    """VHDL一侧的比较值 (不含DDR)"""
+    return {
+        "ADDRESS": list(model.internal_address),
+        "FLASH_A": list(model.internal_address),
+        "FLASH_HIGH": model.flashHigh(),
+        "SRAM_A16": [model.get("SRAM_A16")],
+    }
+
+def fitterDdrPins(model):
+    get = model.get
+    return (get("$SDRAM.nRAS"), get("$SDRAM.nCAS"), get("$SDRAM.nWE"),
+            [get(f"$SDRAM.A[{bit}]") for bit in range(13)], [get(f"$SDRAM.BA[{bit}]") for bit in range(2)])
+
+def vhdlDdrPins(model):
+    return (model.ddr_ras_reg, model.ddr_cas_reg, model.ddr_we_reg, model.ddr_addr_reg, model.ddr_ba_reg)
+
+class DdrMonitor:
+    """
+    在CLK50MHz上升沿捕获一次访问中的ACTIVATE与READ/WRITE命令 (不含刷新)
+
+    values()依次为: 有ACTIVATE、有READ、有WRITE、ACTIVATE的Bank+行地址 (15位)、
+    最后一次READ/WRITE的Bank+A10+列地址 (12位)。
+    """
+
+    def __init__(self, model, pins):
+        self.model = model
+        self.pins = pins
+        self.flags = [0, 0, 0]
+        self.row = [0] * 15
+        self.column = [0] * 12
+
+    def clear(self, lanes):
+        """清除指定通道已捕获的命令"""
+        keep = self.model.mask ^ lanes
+        self.flags = [value & keep for value in self.flags]
+        self.row = [value & keep for value in self.row]
+        self.column = [value & keep for value in self.column]
+
+    def sample(self):
+        ras, cas, we, addr, ba = self.pins(self.model)
+        m = self.model.mask
+        activate = (ras ^ m) & cas & we
+        column = ras & (cas ^ m)
+        if not (activate | column):
+            return
+        read = column & we
+        write = column & (we ^ m)
+        self.flags = [self.flags[0] | activate, self.flags[1] | read, self.flags[2] | write]
+        if activate:
+            self.row = [_merge(old, new, activate) for old, new in zip(self.row, addr + ba)]
+        if column:
+            self.column = [_merge(old, new, column) for old, new in zip(self.column, addr[0:9] + [addr[10]] + ba)]
+
+    def values(self):
+        return self.flags + self.row + self.column
+
+def randomTraces(rng, lanes, length=FUZZ_LENGTH, unlock_share=UNLOCK_SHARE):
+    """
+    每条通道一个随机操作序列，操作类别均匀分布以覆盖连续4次操作的组合；
+    unlock_share比例的通道以两次0xA55A加两次相同配置的完整解锁开头
+
+    Returns:
+        dict: kind/addr/data/count (形状为 (操作数, 通道数)) 和用于覆盖率的操作类别op_class
+    """
+    shape = (length, lanes)
+    op_class = rng.integers(0, OP_CLASSES, shape)
+    writes = op_class >= 1 + ADDRESS_CLASSES
+    kind = np.where(op_class == 0, IDLE, np.where(writes, WRITE, READ)).astype(np.uint8)
+    address_class = np.where(writes, (op_class - 1 - ADDRESS_CLASSES) // DATA_CLASSES, op_class - 1)
+    data_class = np.where(writes, (op_class - 1 - ADDRESS_CLASSES) % DATA_CLASSES, DATA_CLASSES - 1)
+
+    neighbour = np.where(rng.random(shape) < 0.5, MAGIC_ADDRESS_WORD - 1, BOOTLEG_SRAM_BANK_WORD - 1)
+    other = np.where(rng.random(shape) < 0.25, neighbour, rng.integers(0, 1 << 24, shape))
+    addr = np.select([address_class == 0, address_class == 1], [MAGIC_ADDRESS_WORD, BOOTLEG_SRAM_BANK_WORD], other)
+    nibble = rng.integers(0, 15, shape)
+    partial = ((nibble + (nibble >= 0xA)) << 12) | (MAGIC_VALUE & 0xFFF)
+    data = np.select([data_class == 0, data_class == 1], [MAGIC_VALUE, partial], rng.integers(0, 0x10000, shape))
+    count = np.where(rng.random(shape) < 0.75, 1, rng.integers(2, MAX_BURST + 1, shape))
+
+    unlock = rng.random(lanes) < unlock_share
+    if length >= 4 and unlock.any():
+        config = rng.integers(0, 0x10000, lanes)
+        for i, value in enumerate((MAGIC_VALUE, MAGIC_VALUE, config, config)):
+            kind[i, unlock] = WRITE
+            addr[i, unlock] = MAGIC_ADDRESS_WORD
+            data[i, unlock] = np.broadcast_to(value, lanes)[unlock]
+            count[i, unlock] = 1
+            op_class[i, unlock] = 1 + ADDRESS_CLASSES + np.where(data[i, unlock] == MAGIC_VALUE, 0, DATA_CLASSES - 1)
+    return {"kind": kind, "addr": addr.astype(np.uint32), "data": data.astype(np.uint32),
+            "count": count.astype(np.uint8), "op_class": op_class}
+
+def coverageWindows(op_class):
+    """连续COVERAGE_WINDOW次操作的类别组合编码"""
+    length = op_class.shape[0]
+    codes = [sum(op_class[i + j].astype(np.int64) * OP_CLASSES ** j for j in range(COVERAGE_WINDOW))
+             for i in range(length - COVERAGE_WINDOW + 1)]
+    return np.unique(np.concatenate(codes)) if codes else np.zeros(0, dtype=np.int64)
+
+def runTraces(fitter, vhdl, ops, probes=PROBES, n_wait=sdrammodel.GBA_N_WAIT, s_wait=sdrammodel.GBA_S_WAIT,
+              record=False):
+    """
+    把每条通道的操作序列同时送入两个模型并比较
+
+    两个模型必须已处于相同的起始状态 (见prepareModels)。
+
+    Returns:
+        dict: 比较项 → 出现分歧的通道整数；record为True时另加"first": 通道0每个比较项第一次分歧的
+              (操作序号, 访问序号, 原芯片值, VHDL值)
+    """
+    m = fitter.mask
+    models = (fitter, vhdl)
+    pinMap = flashPinMap(fitter.netlist)
+    staticProbes = [name for name in probes if name != "DDR"]
+    monitors = ([DdrMonitor(fitter, fitterDdrPins), DdrMonitor(vhdl, vhdlDdrPins)] if "DDR" in probes else [])
+    diverged = dict.fromkeys(probes, 0)
+    first = {}
+    clock = fitter.get("CLK50Mhz")
+
+    def step(values):
+        for model in models:
+            model.step(values)
+
+    def tick(count):
+        nonlocal clock
+        for _ in range(count):
+            clock ^= m
+            step({"CLK50Mhz": clock})
+            if clock:
+                for monitor in monitors:
+                    monitor.sample()
+
+    def lane0(bits):
+        return sum(((value & 1) << bit) for bit, value in enumerate(bits))
+
+    def compare(lanes, names, a, b, where):
+        for name in names:
+            diff = 0
+            for x, y in zip(a[name], b[name]):
+                diff |= x ^ y
+            diff &= lanes
+            diverged[name] |= diff
+            if record and diff & 1 and name not in first:
+                first[name] = where + (lane0(a[name]), lane0(b[name]))
+
+    pending = 0
+
+    def compareDdr(where):
+        nonlocal pending
+        if monitors and pending:
+            compare(pending, ["DDR"], {"DDR": monitors[0].values()}, {"DDR": monitors[1].values()}, where)
+            for monitor in monitors:
+                monitor.clear(m)
+        pending = 0
+
+    kinds, counts = ops["kind"], ops["count"]
+    for i in range(kinds.shape[0]):
+        active = cpldmodel.packLanes(kinds[i] != IDLE)
+        reads = cpldmodel.packLanes(kinds[i] == READ)
+        writes = cpldmodel.packLanes(kinds[i] == WRITE)
+        address = cpldmodel.bitLanes(ops["addr"][i], cpldmodel.ROM_ADDRESS_BITS)
+        data = [lanes & writes for lanes in cpldmodel.bitLanes(ops["data"][i], cpldmodel.ROM_DATA_BITS)]
+        values = {f"GP.AD[{bit}]": lanes for bit, lanes in enumerate(address)}
+        values.update({"GP.nCS": m, "GP_NRD": m, "GP_NWR": m})
+        step(values)
+        tick(cpldmodel.GBA_TICKS)
+        compareDdr((i, -1))
+        step({"GP.nCS": m ^ active})
+        tick(cpldmodel.GBA_HALF_TICKS)
+        for k in range(int(counts[i].max()) if active else 0):
+            strobe = cpldmodel.packLanes(counts[i] > k) & active
+            if k:
+                tick(cpldmodel.GBA_HALF_TICKS)
+                compareDdr((i, k - 1))
+            values = {f"GP.AD[{bit}]": lanes for bit, lanes in enumerate(data)}
+            values.update({"GP_NRD": m ^ (strobe & reads), "GP_NWR": m ^ (strobe & writes)})
+            step(values)
+            wait = n_wait if k == 0 else s_wait
+            tick((wait + 1) * cpldmodel.GBA_TICKS - cpldmodel.GBA_HALF_TICKS)
+            if staticProbes:
+                compare(strobe, staticProbes, fitterProbes(fitter, pinMap), vhdlProbes(vhdl), (i, k))
+            step({"GP_NRD": m, "GP_NWR": m})
+            pending = strobe
+        step({"GP.nCS": m})
+    tick(cpldmodel.GBA_TICKS)
+    compareDdr((kinds.shape[0] - 1, -1))
+    if record:
+        diverged["first"] = first
+    return diverged
+
+def prepareModels(fitter, vhdl, warm):
+    """原芯片从SDRAM已初始化的单通道状态复制，VHDL以相同的时钟电平从SDRAM_IDLE上电"""
+    fitter.broadcast(warm)
+    vhdl.reset(clock=fitter.get("CLK50Mhz"))
+
+class Fuzzer:
+    """
+    一组编译好的模型与SDRAM已初始化的起始状态
+
+    Args:
+        netlist: cpldmodel.loadEquations的结果
+        lanes: 每批的通道数
+        bank_decode: VhdlModel的Bank译码
+    """
+
+    def __init__(self, netlist, lanes=FUZZ_LANES, bank_decode="gp", probes=PROBES,
+                 n_wait=sdrammodel.GBA_N_WAIT, s_wait=sdrammodel.GBA_S_WAIT):
+        self.netlist = netlist
+        self.lanes = lanes
+        self.bank_decode = bank_decode
+        self.probes = probes
+        self.n_wait = n_wait
+        self.s_wait = s_wait
+        self.warm = cpldmodel.sdramWarmUp(netlist, None, n_wait, s_wait)[0]
+        self._models = {}
+
+    def models(self, lanes):
+        """按通道数缓存编译好的模型"""
+        if lanes not in self._models:
+            self._models[lanes] = (cpldmodel.CpldModel(self.netlist, lanes),
+                                   VhdlModel(lanes, self.bank_decode, initialized=True))
+        return self._models[lanes]
+
+    def run(self, ops, record=False):
+        lanes = ops["kind"].shape[1]
+        fitter, vhdl = self.models(lanes)
+        prepareModels(fitter, vhdl, self.warm)
+        return runTraces(fitter, vhdl, ops, self.probes, self.n_wait, self.s_wait, record)
+
+    def batch(self, seed, length=FUZZ_LENGTH):
+        """
+        一批随机序列
+
+        Returns:
+            dict: 每个比较项的分歧通道数和第一条分歧序列、覆盖的4次操作组合编码、访问次数
+        """
+        rng = np.random.default_rng(seed)
+        ops = randomTraces(rng, self.lanes, length)
+        diverged = self.run(ops)
+        result = {"seed": seed, "traces": self.lanes, "windows": coverageWindows(ops["op_class"]),
+                  "accesses": int((ops["count"] * (ops["kind"] != IDLE)).sum()), "diverged": {}, "examples": {}}
+        for name in self.probes:
+            lanes = cpldmodel.unpackLanes(diverged[name], self.lanes)
+            result["diverged"][name] = int(lanes.sum())
+            if lanes.any():
+                result["examples"][name] = extractTrace(ops, int(np.argmax(lanes)))
+        return result
+
+    def minimize(self, trace, probe):
+        """
+        逐步删减分歧序列: 每轮把"去掉一次操作"和"连续访问改为单次"的所有候选放进一批，
+        取第一个仍有分歧的候选，直到没有候选仍有分歧
+        """
+        while True:
+            candidates = [{key: values[:i] + values[i + 1:] for key, values in trace.items()}
+                          for i in range(len(trace["kind"]))]
+            candidates += [{**trace, "count": trace["count"][:i] + [1] + trace["count"][i + 1:]}
+                           for i, count in enumerate(trace["count"]) if count > 1]
+            found = None
+            for start in range(0, len(candidates), MINIMIZE_LANES):
+                chunk = candidates[start:start + MINIMIZE_LANES]
+                diverged = self.run(stackTraces(chunk, MINIMIZE_LANES), False)[probe]
+                lanes = cpldmodel.unpackLanes(diverged, MINIMIZE_LANES)[:len(chunk)]
+                if lanes.any():
+                    found = chunk[int(np.argmax(lanes))]
+                    break
+            if found is None:
+                return trace
+            trace = found
+
+    def explain(self, trace, probe):
+        """单通道重放序列，返回该比较项第一次分歧的位置和两边的值"""
+        return self.run(stackTraces([trace], 1), record=True)["first"].get(probe)
+
+def extractTrace(ops, lane):
+    """取出一条通道的操作序列 (去掉末尾的空闲)"""
+    trace = {key: [int(value) for value in ops[key][:, lane]] for key in ("kind", "addr", "data", "count")}
+    while trace["kind"] and trace["kind"][-1] == IDLE:
+        for values in trace.values():
+            values.pop()
+    return trace
+
+def stackTraces(traces, lanes):
+    """多条序列按通道排成一批，长度不足的补空闲操作，通道不足的补空序列"""
+    length = max(1, max(len(trace["kind"]) for trace in traces))
+    ops = {"kind": np.full((length, lanes), IDLE, dtype=np.uint8),
+           "addr": np.zeros((length, lanes), dtype=np.uint32),
+           "data": np.zeros((length, lanes), dtype=np.uint32),
+           "count": np.ones((length, lanes), dtype=np.uint8)}
+    for lane, trace in enumerate(traces):
+        for key in ops:
+            ops[key][:len(trace[key]), lane] = trace[key]
+    return ops
+
+def formatTrace(trace):
+    """序列的可读形式"""
+    out = []
+    for kind, addr, data, count in zip(trace["kind"], trace["addr"], trace["data"], trace["count"]):
+        if kind == IDLE:
+            out.append("空闲")
+            continue
+        burst = f"×{count}" if count > 1 else ""
+        address = f"0x{0x08000000 + addr * 2:08X}"
+        out.append(f"读 {address}{burst}" if kind == READ else f"写 {address}=0x{data:04X}{burst}")
+    return out
+
+_fuzzer = None
+
+def _initWorker(path, lanes, bank_decode, probes, n_wait, s_wait):
+    global _fuzzer
+    _fuzzer = Fuzzer(cpldmodel.loadEquations(path), lanes, bank_decode, probes, n_wait, s_wait)
+
+def _runBatch(args):
+    seed, length = args
+    return _fuzzer.batch(seed, length)
+
+def runFuzz(path=cpldmodel.EQUATIONS_PATH, lanes=FUZZ_LANES, length=FUZZ_LENGTH, seconds=FUZZ_SECONDS,
+            batches=None, workers=None, seed=1, bank_decode="gp", probes=PROBES,
+            n_wait=sdrammodel.GBA_N_WAIT, s_wait=sdrammodel.GBA_S_WAIT):
+    """
+    多进程模糊测试，每个工作进程编译一份模型，按批领取随机种子
+
+    Args:
+        seconds: 运行时间上限
+        batches: 批数上限 (None为只按时间)
+        workers: 进程数，默认为CPU核数
+
+    Returns:
+        dict: 统计、覆盖率和每个比较项删减后的分歧序列
+    """
+    workers = workers or os.cpu_count() or 1
+    initargs = (path, lanes, bank_decode, probes, n_wait, s_wait)
+    seeds = ((seed * 1_000_003 + index, length) for index in itertools.count())
+    if batches is not None:
+        seeds = itertools.islice(seeds, batches)
+    totals = {"batches": 0, "traces": 0, "accesses": 0, "diverged": dict.fromkeys(probes, 0)}
+    examples = {}
+    windows = np.zeros(0, dtype=np.int64)
+    start = time.perf_counter()
+
+    def collect(result):
+        nonlocal windows
+        totals["batches"] += 1
+        totals["traces"] += result["traces"]
+        totals["accesses"] += result["accesses"]
+        for name, count in result["diverged"].items():
+            totals["diverged"][name] += count
+        for name, trace in result["examples"].items():
+            examples.setdefault(name, trace)
+        windows = np.union1d(windows, result["windows"])
+        elapsed = time.perf_counter() - start
+        print(f"\r  批{totals['batches']}  序列{totals['traces']}  "
+              f"{totals['traces'] / elapsed:.0f}序列/秒  覆盖{len(windows)}/{OP_CLASSES ** COVERAGE_WINDOW}",
+              end="", flush=True)
+        return elapsed >= seconds
+
+    if workers == 1:
+        _initWorker(*initargs)
+        for args in seeds:
+            if collect(_runBatch(args)):
+                break
+        fuzzer = _fuzzer
+    else:
+        with multiprocessing.Pool(workers, _initWorker, initargs) as pool:
+            for result in pool.imap_unordered(_runBatch, seeds):
+                if collect(result):
+                    pool.terminate()
+                    break
+        fuzzer = Fuzzer(cpldmodel.loadEquations(path), lanes, bank_decode, probes, n_wait, s_wait)
+    elapsed = time.perf_counter() - start
+    print()
+
+    findings = {}
+    for name, trace in examples.items():
+        minimal = fuzzer.minimize(trace, name)
+        where = fuzzer.explain(minimal, name)
+        findings[name] = {"trace": minimal, "steps": formatTrace(minimal), "first": where}
+    return {
+        "bank_decode": bank_decode,
+        "workers": workers,
+        "seconds": elapsed,
+        "batches": totals["batches"],
+        "traces": totals["traces"],
+        "accesses": totals["accesses"],
+        "traces_per_second": totals["traces"] / elapsed if elapsed > 0 else None,
+        "coverage": {"windows": int(len(windows)), "space": OP_CLASSES ** COVERAGE_WINDOW},
+        "diverged": totals["diverged"],
+        "findings": findings,
+    }
+
+def printReport(result):
+    """打印模糊测试结果"""
+    coverage = result["coverage"]
+    print(f"Bank译码: {result['bank_decode']}  进程: {result['workers']}  用时{result['seconds']:.1f}秒")
+    print(f"  序列: {result['traces']} ({result['batches']}批，{result['accesses']}次访问)，"
+          f"{(result['traces_per_second'] or 0):.0f}序列/秒")
+    print(f"  覆盖: 连续{COVERAGE_WINDOW}次操作的类别组合 {coverage['windows']}/{coverage['space']} "
+          f"({100 * coverage['windows'] / coverage['space']:.1f}%)")
+    for name, count in result["diverged"].items():
+        finding = result["findings"].get(name)
+        if not finding:
+            print(f"  ✓ {name}")
+            continue
+        print(f"  ✗ {name}: {count}条序列出现分歧，删减后{len(finding['steps'])}步:")
+        for i, text in enumerate(finding["steps"]):
+            print(f"      {i}: {text}")
+        if finding["first"]:
+            op, access, fitter, vhdl = finding["first"]
+            place = f"操作{op}第{access + 1}次访问" if access >= 0 else f"操作{op}之后"
+            print(f"      {place}: 原芯片0x{fitter:X}，VHDL 0x{vhdl:X}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="适配器网表与superchis.vhd的批量等价性模糊测试")
+    parser.add_argument("--equations", default=cpldmodel.EQUATIONS_PATH, help="适配报告路径")
+    parser.add_argument("--lanes", type=int, default=FUZZ_LANES, help="每批的序列数")
+    parser.add_argument("--length", type=int, default=FUZZ_LENGTH, help="每个序列的操作数")
+    parser.add_argument("--seconds", type=float, default=FUZZ_SECONDS, help="运行时间上限")
+    parser.add_argument("--batches", type=int, help="批数上限")
+    parser.add_argument("--workers", type=int, help="进程数 (默认CPU核数)")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子")
+    parser.add_argument("--bank-decode", choices=BANK_DECODES, default="gp",
+                        help="VHDL的config_bank_select: gp为GP(7 downto 3)，original为注释中原芯片的译码")
+    parser.add_argument("--probes", default=",".join(PROBES), help="比较项 (逗号分隔)")
+    parser.add_argument("--n-wait", type=int, default=sdrammodel.GBA_N_WAIT, help="第一次访问的等待周期 (WAITCNT)")
+    parser.add_argument("--s-wait", type=int, default=sdrammodel.GBA_S_WAIT, help="连续访问的等待周期 (WAITCNT)")
+    parser.add_argument("--json", metavar="PATH", help="把结果写入JSON文件")
+    args = parser.parse_args()
+
+    probes = tuple(name.strip() for name in args.probes.split(",") if name.strip())
+    unknown = set(probes) - set(PROBES)
+    if unknown:
+        parser.error(f"未知的比较项: {', '.join(sorted(unknown))}")
+    result = runFuzz(args.equations, args.lanes, args.length, args.seconds, args.batches, args.workers,
+                     args.seed, args.bank_decode, probes, args.n_wait, args.s_wait)
+    printReport(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入: {args.json}")
@@ -0,0 +1,372 @@
+"""
+内存测试差异字的批量故障定位
+
+把一次测试中全部 (字节地址, 期望值, 实际值) 放进数组，按SuperChis的地址映射整体分类：
+- 数据位固定: 某个数据位在所有差异中都读成同一电平
+- 地址线混叠: 读回的值是翻转某一地址线后另一个地址写入的值
+  (字地址位0..15为internal_address，16..23为GP_16..GP_23)
+- Bank / 行 / 列故障: 差异集中在某个BA (GP_23..22)、行 (GP_21..16 + internal_address(15..9))
+  或列 (internal_address(8..0))
+- 刷新衰减: 分散在许多行的单位翻转，且几乎都朝同一方向
+
+依次归类，已被前面的类别解释的差异字不再参与后面的统计。
+"""
+import argparse
+import time
+
+import numpy as np
+
+DATA_BITS = 16
+ADDRESS_BITS = 24                   # GBA ROM窗口的字地址位数 (32MB)
+COLUMN_BITS = 9                     # internal_address(8..0)
+ROW_BITS = 13                       # GP_21..16 + internal_address(15..9)
+BANK_SHIFT = COLUMN_BITS + ROW_BITS # GP_23..22
+BANK_BITS = 2
+
+MIN_EVIDENCE = 8                    # 一个结论至少需要的差异字数
+STUCK_PURITY = 0.98                 # 数据位固定: 该位翻转中读成同一电平的比例
+STUCK_COVERAGE = 0.5                # 数据位固定: 期望为相反电平的字中出错的比例
+ALIAS_SHARE = 0.5                   # 地址线混叠: 与翻转地址的期望值相同的差异比例
+REGION_RATE = 0.05                  # Bank/行/列故障: 区域内的最低出错率
+REGION_RATIO = 10                   # Bank/行/列故障: 区域出错率至少是其余部分的倍数
+COLUMN_MIN_ROWS = 4                 # 列故障: 至少涉及的行数
+DECAY_SINGLE = 0.8                  # 刷新衰减: 单位翻转的比例
+DECAY_DIRECTION = 0.9               # 刷新衰减: 同一翻转方向的比例
+DECAY_MIN_ROWS = 16                 # 刷新衰减: 至少涉及的行数
+POPULATION_SAMPLE = 1 << 16         # 统计期望数据各位电平时的抽样字数
+MAX_LISTED = 8                      # 每条结论最多列出的行/列
+
+def addressLineName(bit):
+    """字地址位对应的信号名"""
+    if bit < 16:
+        return f"internal_address[{bit}]"
+    return f"GP_{bit}"
+
+def _popcount16(values):
+    values = values.astype(np.uint32)
+    values = values - ((values >> 1) & 0x5555)
+    values = (values & 0x3333) + ((values >> 2) & 0x3333)
+    values = (values + (values >> 4)) & 0x0F0F
+    return (values + (values >> 8)) & 0x1F
+
+def _listed(values, fmt):
+    text = ", ".join(fmt(int(value)) for value in values[:MAX_LISTED])
+    if len(values) > MAX_LISTED:
+        text += f" 等{len(values)}个"
+    return text
+
+class ExpectedImage:
+    """
+    测试写入的期望数据，用于查找混叠地址的期望值和统计每个区域测试过的字数
+
+    用fromBytes (连续区域) 或fromPairs (离散地址) 构造。
+    """
+
+    def __init__(self, start, values, words=None):
+        self.start = start          # 连续区域的起始字地址
+        self.values = values        # 期望值 (uint16)
+        self.words = words          # 离散地址 (升序的字地址)，连续区域为None
+        self.total = len(values)
+
+    @classmethod
+    def fromBytes(cls, start_addr, data):
+        """从起始字节地址开始的连续测试数据"""
+        return cls(start_addr >> 1, np.frombuffer(data, dtype="<u2", count=len(data) // 2))
+
+    @classmethod
+    def fromPairs(cls, pairs):
+        """离散的 (字节地址, 值)，同一地址以最后一次写入为准"""
+        last = dict((addr >> 1, value) for addr, value in pairs)
+        words = np.fromiter(sorted(last), dtype=np.int64, count=len(last))
+        values = np.array([last[word] for word in words.tolist()], dtype=np.uint16)
+        return cls(None, values, words)
+
+    def lookup(self, words):
+        """
+        字地址的期望值
+
+        Returns:
+            (期望值, 该地址是否被测试过)
+        """
+        words = np.asarray(words, dtype=np.int64)
+        if self.words is None:
+            index = words - self.start
+            valid = (index >= 0) & (index < self.total)
+        else:
+            index = np.searchsorted(self.words, words)
+            valid = index < self.total
+            valid[valid] = self.words[index[valid]] == words[valid]
+        index = np.where(valid, index, 0)
+        values = self.values[index] if self.total else np.zeros(len(words), dtype=np.uint16)
+        return values, valid
+
+    def count(self, shift, bits, keys):
+        """测试过的字中 (字地址 >> shift) 的低bits位等于各个key的字数"""
+        keys = np.asarray(keys, dtype=np.int64)
+        if self.words is not None:
+            counts = np.bincount((self.words >> shift) & ((1 << bits) - 1), minlength=1 << bits)
+            return counts[keys]
+        # 连续区域: 每2^(shift+bits)个字中key占一段长2^shift的连续字
+        period, run = 1 << (shift + bits), 1 << shift
+
+        def below(limit):
+            return (limit // period) * run + np.clip(limit % period - (keys << shift), 0, run)
+        return below(self.start + self.total) - below(self.start)
+
+    def bitPopulation(self):
+        """期望数据中每个数据位为1的字数 (数据量大时抽样估计)"""
+        values = self.values
+        if self.total > POPULATION_SAMPLE:
+            values = values[np.random.default_rng(0).integers(0, self.total, POPULATION_SAMPLE)]
+        ones = ((values[:, None] >> np.arange(DATA_BITS, dtype=np.uint16)) & 1).sum(axis=0)
+        return ones * (self.total / max(len(values), 1))
+
+def _mismatchArrays(mismatches):
+    """(字节地址, 期望值, 实际值) 列表或三个数组转为 (字地址, 期望值, 实际值) 数组"""
+    if isinstance(mismatches, tuple) and len(mismatches) == 3 and not np.isscalar(mismatches[0]):
+        addrs, expected, actual = mismatches
+    else:
+        table = np.array(mismatches, dtype=np.int64).reshape(-1, 3)
+        addrs, expected, actual = table[:, 0], table[:, 1], table[:, 2]
+    return (np.asarray(addrs, dtype=np.int64) >> 1, np.asarray(expected, dtype=np.uint16),
+            np.asarray(actual, dtype=np.uint16))
+
+def _stuckBits(diff, actual, remaining, image):
+    """数据位固定，返回 (结论列表, 解释的差异)"""
+    findings = []
+    active = diff[remaining]
+    read = actual[remaining]
+    bits = np.arange(DATA_BITS, dtype=np.uint16)
+    flips = ((active[:, None] >> bits) & 1).astype(bool)
+    ones = ((read[:, None] >> bits) & 1).astype(bool)
+    flipCount = flips.sum(axis=0)
+    highCount = (flips & ones).sum(axis=0)
+    population = image.bitPopulation() if image is not None else None
+    stuckMask = stuckValue = 0
+    for bit in range(DATA_BITS):
+        count = int(flipCount[bit])
+        if count < MIN_EVIDENCE:
+            continue
+        high = int(highCount[bit])
+        level = 1 if high >= count * STUCK_PURITY else 0 if high <= count * (1 - STUCK_PURITY) else None
+        if level is None:
+            continue
+        if population is not None:
+            opposite = population[bit] if level == 0 else image.total - population[bit]
+            if count < opposite * STUCK_COVERAGE:
+                continue
+        else:
+            # 没有期望数据时要求该位在所有差异字中都读成同一电平
+            agree = ones[:, bit].mean() if level else 1 - ones[:, bit].mean()
+            if agree < STUCK_PURITY:
+                continue
+        stuckMask |= 1 << bit
+        stuckValue |= level << bit
+        findings.append({"kind": "stuck_bit", "bit": bit, "level": level, "words": count,
+                         "text": f"数据位D{bit}固定为{level}"})
+    if not stuckMask:
+        return findings, np.zeros_like(remaining)
+    explained = remaining & ((diff & ~np.uint16(stuckMask)) == 0) & (((actual ^ stuckValue) & stuckMask) == 0)
+    return findings, explained
+
+def _aliasedLines(words, expected, actual, remaining, image):
+    """地址线混叠，返回 (结论列表, 解释的差异)"""
+    findings = []
+    explained = np.zeros_like(remaining)
+    index = np.flatnonzero(remaining)
+    if image is None or len(index) < MIN_EVIDENCE:
+        return findings, explained
+    w, want, got = words[index], expected[index], actual[index]
+    for bit in range(ADDRESS_BITS):
+        partner, valid = image.lookup(w ^ (1 << bit))
+        useful = valid & (partner != want)
+        hits = useful & (partner == got)
+        count = int(hits.sum())
+        if count < MIN_EVIDENCE or count < useful.sum() * ALIAS_SHARE:
+            continue
+        explained[index[hits]] = True
+        if bit < COLUMN_BITS:
+            part = "列地址"
+        elif bit < BANK_SHIFT:
+            part = "行地址"
+        else:
+            part = "BA"
+        findings.append({"kind": "alias", "bit": bit, "words": count,
+                         "text": f"地址线{addressLineName(bit)} ({part}) 混叠: 读到的是翻转该位后地址的数据"})
+    return findings, explained
+
+def _regions(words, remaining, image, shift, bits, exclude=None):
+    """
+    出错率明显高于其余部分的区域
+
+    Returns:
+        (区域key数组, 每个区域的差异字数, 每个区域测试过的字数)
+    """
+    index = np.flatnonzero(remaining)
+    if image is None or len(index) < MIN_EVIDENCE:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    keys = (words[index] >> shift) & ((1 << bits) - 1)
+    unique, errors = np.unique(keys, return_counts=True)
+    tested = image.count(shift, bits, unique)
+    total = remaining.sum()
+    rest = (total - errors) / np.maximum(image.total - tested, 1)
+    rate = errors / np.maximum(tested, 1)
+    hot = (errors >= MIN_EVIDENCE) & (rate >= REGION_RATE) & (rate >= rest * REGION_RATIO)
+    if exclude is not None:
+        hot &= ~exclude(unique)
+    return unique[hot], errors[hot], tested[hot]
+
+def _regionFaults(words, remaining, image):
+    """Bank、行和列故障，返回 (结论列表, 解释的差异)"""
+    findings = []
+    explained = np.zeros_like(remaining)
+
+    banks, errors, tested = _regions(words, remaining, image, BANK_SHIFT, BANK_BITS)
+    for bank, count, size in zip(banks.tolist(), errors.tolist(), tested.tolist()):
+        hit = remaining & ((words >> BANK_SHIFT) == bank)
+        explained |= hit
+        findings.append({"kind": "bank", "bank": bank, "words": count,
+                         "text": f"Bank {bank} (GP_23..22={bank:02b}) 故障: {count}/{size}个字出错"})
+    remaining = remaining & ~explained
+
+    rowBits = ROW_BITS + BANK_BITS
+    rows, errors, tested = _regions(words, remaining, image, COLUMN_BITS, rowBits)
+    if len(rows):
+        hit = remaining & np.isin(words >> COLUMN_BITS, rows)
+        explained |= hit
+        findings.append({"kind": "row", "rows": rows.tolist(), "words": int(errors.sum()),
+                         "text": f"行故障: {len(rows)}行 ("
+                                 + _listed(rows, lambda r: f"BA{r >> ROW_BITS}/行0x{r & ((1 << ROW_BITS) - 1):04X}")
+                                 + f")，{int(errors.sum())}/{int(tested.sum())}个字出错"})
+    remaining = remaining & ~explained
+
+    columns, errors, tested = _regions(words, remaining, image, 0, COLUMN_BITS)
+    for column, count, size in zip(columns.tolist(), errors.tolist(), tested.tolist()):
+        hit = remaining & ((words & ((1 << COLUMN_BITS) - 1)) == column)
+        rowCount = len(np.unique(words[hit] >> COLUMN_BITS))
+        if rowCount < COLUMN_MIN_ROWS:
+            continue
+        explained |= hit
+        findings.append({"kind": "column", "column": column, "words": count,
+                         "text": f"列故障: 列0x{column:03X}在{rowCount}行出错，{count}/{size}个字"})
+    return findings, explained
+
+def _refreshDecay(words, expected, diff, remaining, retention):
+    """刷新衰减，返回 (结论列表, 解释的差异)"""
+    index = np.flatnonzero(remaining)
+    if len(index) < MIN_EVIDENCE:
+        return [], np.zeros_like(remaining)
+    active = diff[index]
+    single = _popcount16(active) == 1
+    if single.mean() < DECAY_SINGLE:
+        return [], np.zeros_like(remaining)
+    lost = _popcount16(active & expected[index]).sum()     # 1读成0的位数
+    flipped = _popcount16(active).sum()
+    share = max(lost, flipped - lost) / flipped
+    rows = len(np.unique(words[index] >> COLUMN_BITS))
+    if share < DECAY_DIRECTION or rows < min(DECAY_MIN_ROWS, len(index) // 2):
+        return [], np.zeros_like(remaining)
+    direction = "1→0" if lost * 2 >= flipped else "0→1"
+    text = f"刷新衰减: {len(index)}个字分散在{rows}行，{single.mean() * 100:.0f}%为单位翻转，{share * 100:.0f}%为{direction}"
+    if retention:
+        text += f" (保持{retention:g}秒后读回，可用更短的保持时间复测确认)"
+    return [{"kind": "decay", "direction": direction, "rows": rows, "words": len(index), "text": text}], remaining.copy()
+
+def analyzeMismatches(mismatches, image=None, retention=None):
+    """
+    批量分类内存测试的差异字
+
+    Args:
+        mismatches: (字节地址, 期望值, 实际值) 的列表，或 (地址数组, 期望值数组, 实际值数组)
+        image: ExpectedImage，提供时才能判断地址线混叠和Bank/行/列故障
+        retention: 写入到读回之间的保持时间 (秒)，用于刷新衰减的说明
+
+    Returns:
+        dict: words (差异字数)、findings (按归类顺序的结论，每条有kind/words/text)、unexplained (未归类的字数)
+    """
+    words, expected, actual = _mismatchArrays(mismatches)
+    diff = expected ^ actual
+    remaining = diff != 0
+    findings = []
+    for classify in (lambda r: _stuckBits(diff, actual, r, image),
+                     lambda r: _aliasedLines(words, expected, actual, r, image),
+                     lambda r: _regionFaults(words, r, image),
+                     lambda r: _refreshDecay(words, expected, diff, r, retention)):
+        if not remaining.any():
+            break
+        found, explained = classify(remaining)
+        findings += found
+        remaining &= ~explained
+    examples = [(int(w) * 2, int(e), int(a)) for w, e, a in
+                zip(words[remaining][:3], expected[remaining][:3], actual[remaining][:3])]
+    return {"words": len(words), "findings": findings, "unexplained": int(remaining.sum()), "examples": examples}
+
+def printDiagnosis(diagnosis):
+    """打印故障定位结论"""
+    if not diagnosis["words"]:
+        return
+    print(f"故障定位 ({diagnosis['words']}个差异字):")
+    for finding in diagnosis["findings"]:
+        print(f"  ✗ {finding['text']} [{finding['words']}个字]")
+    if diagnosis["unexplained"]:
+        examples = ", ".join(f"0x{addr:08X}: 0x{want:04X}→0x{got:04X}" for addr, want, got in diagnosis["examples"])
+        print(f"  ? 未归类: {diagnosis['unexplained']}个字 (例: {examples})")
+    elif not diagnosis["findings"]:
+        print("  ? 未归类")
+
+def injectFault(data, fault, rng, start_addr=0):
+    """
+    在测试数据上模拟一种故障，返回读回的数据
+
+    Args:
+        fault: stuck (D5固定为0)、alias (GP_18混叠)、bank (Bank 2)、row (3行)、column (列0x155)、decay (刷新衰减)
+    """
+    expected = np.frombuffer(data, dtype="<u2")
+    actual = expected.copy()
+    words = np.arange(len(expected), dtype=np.int64) + (start_addr >> 1)
+    if fault == "stuck":
+        actual &= np.uint16(~(1 << 5) & 0xFFFF)
+    elif fault == "alias":
+        bit = 18
+        # 按地址顺序写入，GP_18固定为0时高半部分覆盖低半部分
+        cell = words & ~(1 << bit)
+        last = np.zeros(int(cell.max()) + 1, dtype=np.uint16)
+        last[cell] = expected
+        actual = last[cell]
+    elif fault == "bank":
+        hit = (words >> BANK_SHIFT) == 2
+        actual[hit] = rng.integers(0, 1 << 16, int(hit.sum()), dtype=np.uint16)
+    elif fault == "row":
+        rows = rng.choice(np.unique(words >> COLUMN_BITS), 3, replace=False)
+        actual[np.isin(words >> COLUMN_BITS, rows)] = 0xFFFF
+    elif fault == "column":
+        hit = (words & ((1 << COLUMN_BITS) - 1)) == 0x155
+        actual[hit] ^= np.uint16(0x0100)
+    elif fault == "decay":
+        bits = rng.integers(0, DATA_BITS, len(actual)).astype(np.uint16)
+        weak = (rng.random(len(actual)) < 0.01) & (((expected >> bits) & 1) == 1)
+        actual[weak] &= ~(np.uint16(1) << bits[weak])
+    else:
+        raise ValueError(f"未知的故障类型: {fault}")
+    return actual.tobytes()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="用模拟故障检查差异字的故障定位")
+    parser.add_argument("--fault", choices=("stuck", "alias", "bank", "row", "column", "decay"), default="alias")
+    parser.add_argument("--size-mb", type=int, default=32, help="模拟测试范围 (MB)")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    data = rng.integers(0, 1 << 16, args.size_mb * 1024 * 1024 // 2, dtype=np.uint16).astype("<u2").tobytes()
+    actual = injectFault(data, args.fault, rng)
+    want = np.frombuffer(data, dtype="<u2")
+    got = np.frombuffer(actual, dtype="<u2")
+    bad = np.flatnonzero(want != got)
+    print(f"模拟故障: {args.fault}，{len(bad)}个差异字")
+
+    start = time.perf_counter()
+    diagnosis = analyzeMismatches((bad * 2, want[bad], got[bad]), ExpectedImage.fromBytes(0, data))
+    elapsed = time.perf_counter() - start
+    printDiagnosis(diagnosis)
+    print(f"分析用时: {elapsed * 1000:.1f}毫秒")
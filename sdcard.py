@@ -0,0 +1,599 @@
+"""
+SuperChis SD卡块设备驱动
+
+通过卡带的SD接口窗口 (CONFIG_SD_ENABLE=1时GP_23=1的上半区) 在主机上直接读写SD卡。
+按superchis.vhd，每次总线访问产生一个SD_CLK：
+- CMD窗口 (0x01800000, GP_22=1): 写入时地址阶段锁存的D7在整帧的每个时钟驱动CMD，
+  因此一段相同的命令位用一个多字写入帧发送；读取时CMD采样到D0
+- DAT读窗口 (0x01100000, GP_19=1): 每次读取把DAT3..0采样到D11..D8
+- DAT写窗口 (0x01000000): 一个2字写入帧先输出D7..D4再输出D3..D0，即每帧一个字节
+命令、数据块和CRC状态都按帧流水线发送，多块读写使用CMD18/CMD25，
+读取的半字节流跨帧缓冲解析。
+
+SdBlockDevice在驱动之上提供LRU块缓存和顺序预读。
+--bench测量单块/多块读写、预读和缓存命中的吞吐量；真实硬件和模拟烧卡器 (--sim) 均可运行。
+"""
+import argparse
+import datetime
+import itertools
+import json
+import os
+import random
+import struct
+import time
+from collections import OrderedDict, deque
+
+import sdproto
+import testcart
+from testcart import commandStats, getPipeline, readRom, readRomAsync, set_sc_mode
+
+SD_CMD_ADDRESS = 0x01800000        # GP_23=1, GP_22=1: CMD窗口
+SD_DAT_READ_ADDRESS = 0x01100000   # GP_22=0, GP_19=1: DAT读窗口
+SD_DAT_WRITE_ADDRESS = 0x01000000  # GP_22=0, GP_19=0: DAT写窗口 (写使能打开，不会切换SRAM Bank)
+
+SD_INIT_CLOCKS = 80                # 上电后至少74个时钟
+SD_COMMAND_GAP = 8                 # 命令之间的空闲时钟 (NRC)
+SD_NCR_CLOCKS = 64                 # 命令结束到应答起始位的最大时钟数
+SD_POLL_CLOCKS = 8                 # 读数据命令轮询应答起始位时每次读取的时钟数
+SD_BUSY_POLL_CLOCKS = 256          # 轮询DAT0忙信号时每次读取的时钟数
+SD_DATA_TIMEOUT_CLOCKS = 1 << 20   # 等待数据起始位或忙结束的最大时钟数
+SD_READ_FRAME_CLOCKS = 16384       # DAT读取帧的时钟数 (应答32KB)
+SD_READ_INFLIGHT = 4               # 连续读取时在途的DAT读取帧数
+SD_BLOCK_CLOCKS = 1 + sdproto.SD_BLOCK_NIBBLES + sdproto.SD_CRC_NIBBLES + 1 + 8  # 一个数据块加块间隔的估计时钟数
+SD_MAX_BLOCKS_PER_COMMAND = 128    # 每个CMD18/CMD25传输的最大块数
+SD_INIT_TIMEOUT = 1.0              # ACMD41上电轮询超时 (秒)
+
+SD_CACHE_BLOCKS = 1024             # LRU缓存块数 (512KB)
+SD_READAHEAD_BLOCKS = 32           # 顺序读取时的预读块数
+
+SD_BENCH_BYTES = 256 * 1024        # 每项测量的传输量
+SD_BENCH_SIZES = (1, 8, 64)        # 每个命令的块数
+
+R1_ERRORS = 0xFDF98008             # 卡状态中的错误位
+
+_CMD_BIT = bytes(b & 1 for b in range(256))
+_DAT_NIBBLE = bytes(b & 0x0F for b in range(256))
+
+class SdError(IOError):
+    """SD卡命令或数据传输失败"""
+
+def _commandFrame(bit, count):
+    """CMD窗口写入帧: count个时钟驱动同一命令位"""
+    return struct.pack("<HBI", 2 + 1 + 4 + count * 2 + 2, 0xf5, SD_CMD_ADDRESS >> 1) + \
+        (b"\x80\x00" if bit else b"\x00\x00") * count + b"\x00\x00"
+
+def _datFrame(value, words=2):
+    """DAT写窗口写入帧: 2字帧输出一个字节 (高半字节在前)，1字帧只输出高半字节"""
+    return struct.pack("<HBI", 2 + 1 + 4 + words * 2 + 2, 0xf5, SD_DAT_WRITE_ADDRESS >> 1) + \
+        bytes([value, 0]) * words + b"\x00\x00"
+
+_DAT_FRAMES = [_datFrame(value) for value in range(256)]
+_DAT_START_FRAME = _datFrame(0x00, 1)  # 起始位: DAT3..0全为0
+_DAT_END_FRAME = _datFrame(0xF0, 1)    # 结束位: DAT3..0全为1
+
+def csdBlocks(csd):
+    """由CSD寄存器 (16字节) 计算卡容量 (512字节块数)"""
+    value = int.from_bytes(csd, "big")
+    if csd[0] >> 6 == 1:  # CSD 2.0 (SDHC/SDXC)
+        return (((value >> 48) & 0x3FFFFF) + 1) * 1024
+    read_bl_len = (value >> 80) & 0xF
+    c_size = (value >> 62) & 0xFFF
+    c_size_mult = (value >> 47) & 0x7
+    return ((c_size + 1) << (c_size_mult + 2 + read_bl_len)) // sdproto.SD_BLOCK_SIZE
+
+class SdCard:
+    """
+    SD卡驱动 (4位总线)
+
+    命令位和数据字节都编码为ROM写入帧交给命令流水线，不等待应答；
+    只有读取应答、数据和忙信号时才等待往返。
+    """
+
+    def __init__(self):
+        self.rca = 0
+        self.high_capacity = False
+        self.blocks = 0
+        self.cid = None
+        self.csd = None
+        self._frames = {}  # (命令位, 时钟数) -> 帧
+
+    def _select(self):
+        """打开SD接口 (配置已生效时不重复发送解锁序列)"""
+        set_sc_mode(sdram=1, sd_enable=1, write_enable=1)
+
+    def _submit(self, frames, count):
+        """把count个已编码的写入帧合并为一次发送"""
+        getPipeline().submit(frames, 0xf5, SD_CMD_ADDRESS >> 1, count)
+
+    def _sendBits(self, bits):
+        """在CMD线上发送位序列，每段相同的位一帧"""
+        frames = bytearray()
+        count = 0
+        for bit, run in itertools.groupby(bits):
+            key = (bit, len(list(run)))
+            frame = self._frames.get(key)
+            if frame is None:
+                frame = self._frames[key] = _commandFrame(*key)
+            frames += frame
+            count += 1
+        self._submit(frames, count)
+
+    def _readCmd(self, clocks):
+        """读取clocks个时钟的CMD线"""
+        return readRom(SD_CMD_ADDRESS >> 1, clocks * 2)[0::2].translate(_CMD_BIT)
+
+    def _readDat(self, clocks):
+        """读取clocks个时钟的DAT线 (每时钟一个半字节)"""
+        return readRom(SD_DAT_READ_ADDRESS >> 1, clocks * 2)[1::2].translate(_DAT_NIBBLE)
+
+    def _response(self, length, data):
+        """
+        读取应答位
+
+        Args:
+            length: 应答位数
+            data: 命令随后会在DAT上送出数据，此时不能多读应答之后的时钟
+
+        Returns:
+            从起始位开始的length个应答位，无应答时返回None
+        """
+        chunk = SD_POLL_CLOCKS if data else SD_NCR_CLOCKS + length
+        waited = 0
+        while True:
+            sample = self._readCmd(chunk)
+            start = sample.find(0)
+            if start >= 0:
+                break
+            waited += chunk
+            if waited > SD_NCR_CLOCKS:
+                return None
+            chunk = SD_POLL_CLOCKS
+        bits = sample[start:]
+        if len(bits) < length:
+            bits += self._readCmd(length - len(bits))
+        return bits[:length]
+
+    def command(self, index, arg=0, response=sdproto.R1_BITS, data=False, check=True):
+        """
+        发送命令并读取应答
+
+        Args:
+            index: 命令编号
+            arg: 32位参数
+            response: 应答位数 (0表示不读应答，R2为136位)
+            data: 命令随后在DAT上送出读取数据 (CMD17/CMD18)
+            check: 校验48位应答的命令编号、CRC7和卡状态错误位 (R3应答没有CRC，需关闭)
+
+        Returns:
+            48位应答的32位内容，或R2应答的16字节寄存器
+        """
+        self._sendBits(b"\x01" * SD_COMMAND_GAP + sdproto.toBits(sdproto.commandFrame(index, arg)))
+        if not response:
+            return None
+        bits = self._response(response, data)
+        if bits is None:
+            raise SdError(f"CMD{index} 无应答")
+        value = sdproto.fromBits(bits)
+        if response == sdproto.R2_BITS:
+            return ((value & ((1 << 128) - 1)) | 1).to_bytes(16, "big")
+        frame = value.to_bytes(6, "big")
+        payload = int.from_bytes(frame[1:5], "big")
+        if check:
+            if frame[0] & 0x3F != index or frame[5] != (sdproto.crc7(frame[:5]) << 1) | 1:
+                raise SdError(f"CMD{index} 应答校验失败: {frame.hex()}")
+            if index not in (sdproto.CMD_SEND_IF_COND, sdproto.CMD_SEND_RELATIVE_ADDR) and payload & R1_ERRORS:
+                raise SdError(f"CMD{index} 卡状态错误: 0x{payload:08X}")
+        return payload
+
+    def appCommand(self, index, arg=0, response=sdproto.R1_BITS, check=True):
+        """发送CMD55和应用命令"""
+        self.command(sdproto.CMD_APP_CMD, self.rca << 16)
+        return self.command(index, arg, response, check=check)
+
+    def waitBusy(self):
+        """等待DAT0忙信号结束"""
+        waited = 0
+        while not self._readDat(SD_BUSY_POLL_CLOCKS)[-1] & 1:
+            waited += SD_BUSY_POLL_CLOCKS
+            if waited > SD_DATA_TIMEOUT_CLOCKS:
+                raise SdError("等待SD卡忙结束超时")
+
+    def init(self):
+        """
+        初始化SD卡并切换到4位总线
+
+        Returns:
+            卡容量 (512字节块数)
+        """
+        self._select()
+        self._sendBits(b"\x01" * SD_INIT_CLOCKS)
+        self.rca = 0
+        self.command(sdproto.CMD_GO_IDLE_STATE, 0, response=0)
+        try:
+            v2 = self.command(sdproto.CMD_SEND_IF_COND, 0x1AA) & 0xFFF == 0x1AA
+        except SdError:
+            v2 = False  # SD 1.x卡不响应CMD8
+        deadline = time.perf_counter() + SD_INIT_TIMEOUT
+        while True:
+            ocr = self.appCommand(sdproto.ACMD_SD_SEND_OP_COND, 0x00FF8000 | (sdproto.OCR_CCS if v2 else 0),
+                                  check=False)
+            if ocr & sdproto.OCR_BUSY:
+                break
+            if time.perf_counter() > deadline:
+                raise SdError(f"SD卡上电超时 (OCR 0x{ocr:08X})")
+        self.high_capacity = bool(ocr & sdproto.OCR_CCS)
+        self.cid = self.command(sdproto.CMD_ALL_SEND_CID, 0, response=sdproto.R2_BITS)
+        self.rca = self.command(sdproto.CMD_SEND_RELATIVE_ADDR) >> 16
+        self.csd = self.command(sdproto.CMD_SEND_CSD, self.rca << 16, response=sdproto.R2_BITS)
+        self.blocks = csdBlocks(self.csd)
+        self.command(sdproto.CMD_SELECT_CARD, self.rca << 16)
+        self.waitBusy()
+        self.appCommand(sdproto.ACMD_SET_BUS_WIDTH, 2)
+        if not self.high_capacity:
+            self.command(sdproto.CMD_SET_BLOCKLEN, sdproto.SD_BLOCK_SIZE)
+        return self.blocks
+
+    def _address(self, lba):
+        """命令参数中的地址: SDHC按块寻址，标准容量卡按字节寻址"""
+        return lba if self.high_capacity else lba * sdproto.SD_BLOCK_SIZE
+
+    def _checkRange(self, lba, count):
+        if lba < 0 or count < 0 or (self.blocks and lba + count > self.blocks):
+            raise ValueError(f"块范围超出SD卡容量: {lba}+{count} > {self.blocks}")
+
+    def _receiveBlocks(self, count, view):
+        """
+        从DAT读窗口接收count个数据块到view
+
+        读取帧按预计需要的时钟数提交并保持多帧在途；半字节流跨帧缓冲，
+        在其中查找起始位、取出数据和CRC并校验。
+        """
+        stream = bytearray()
+        inflight = deque()
+        inflight_clocks = 0
+        received = 0
+        idle = 0
+        while received < count:
+            need = (count - received) * SD_BLOCK_CLOCKS - len(stream) - inflight_clocks
+            while (need > 0 or not inflight) and len(inflight) < SD_READ_INFLIGHT:
+                clocks = min(SD_READ_FRAME_CLOCKS, max(need, SD_POLL_CLOCKS))
+                inflight.append((clocks, readRomAsync(SD_DAT_READ_ADDRESS >> 1, clocks * 2)))
+                inflight_clocks += clocks
+                need -= clocks
+            clocks, pending = inflight.popleft()
+            inflight_clocks -= clocks
+            stream += pending.result()[1::2].translate(_DAT_NIBBLE)
+
+            while received < count:
+                start = stream.find(0)
+                if start < 0:
+                    idle += len(stream)
+                    stream.clear()
+                    break
+                end = start + 1 + sdproto.SD_BLOCK_NIBBLES + sdproto.SD_CRC_NIBBLES
+                if len(stream) <= end:
+                    idle += start
+                    del stream[:start]
+                    break
+                data = sdproto.fromNibbles(stream[start + 1:start + 1 + sdproto.SD_BLOCK_NIBBLES])
+                if stream[end - sdproto.SD_CRC_NIBBLES:end] != sdproto.dataCrcNibbles(data):
+                    raise SdError(f"第{received}块数据CRC错误")
+                view[received * sdproto.SD_BLOCK_SIZE:(received + 1) * sdproto.SD_BLOCK_SIZE] = data
+                received += 1
+                idle = 0
+                del stream[:end + 1]  # 含结束位
+            if idle > SD_DATA_TIMEOUT_CLOCKS:
+                raise SdError("等待数据起始位超时")
+        # 多读的帧只需收取应答
+        for clocks, pending in inflight:
+            pending.result()
+
+    def readBlocks(self, lba, count=1, into=None):
+        """
+        读取连续的数据块
+
+        Args:
+            lba: 起始块号
+            count: 块数
+            into: 接收数据的可写缓冲区，默认返回新的bytearray
+
+        Returns:
+            读取到的数据
+        """
+        self._checkRange(lba, count)
+        out = into if into is not None else bytearray(count * sdproto.SD_BLOCK_SIZE)
+        view = memoryview(out).cast("B")
+        self._select()
+        with commandStats.timed("sd_read"):
+            done = 0
+            while done < count:
+                n = min(SD_MAX_BLOCKS_PER_COMMAND, count - done)
+                chunk = view[done * sdproto.SD_BLOCK_SIZE:(done + n) * sdproto.SD_BLOCK_SIZE]
+                if n == 1:
+                    self.command(sdproto.CMD_READ_SINGLE_BLOCK, self._address(lba + done), data=True)
+                    self._receiveBlocks(1, chunk)
+                else:
+                    self.command(sdproto.CMD_READ_MULTIPLE_BLOCK, self._address(lba + done), data=True)
+                    self._receiveBlocks(n, chunk)
+                    self.command(sdproto.CMD_STOP_TRANSMISSION)
+                    self.waitBusy()
+                done += n
+        return out
+
+    def _sendBlock(self, block):
+        """在DAT线上发送一个数据块，读取CRC状态并等待写入完成"""
+        crc = sdproto.fromNibbles(sdproto.dataCrcNibbles(block))
+        frames = b"".join((_DAT_START_FRAME, b"".join(map(_DAT_FRAMES.__getitem__, block)),
+                           b"".join(map(_DAT_FRAMES.__getitem__, crc)), _DAT_END_FRAME))
+        self._submit(frames, 1 + len(block) + len(crc) + 1)
+
+        # CRC状态: DAT0上的起始位、3位状态和结束位，随后DAT0保持低电平直到写入完成
+        sample = self._readDat(SD_POLL_CLOCKS * 2)
+        waited = len(sample)
+        start = next((i for i, nibble in enumerate(sample) if not nibble & 1), -1)
+        while start < 0 or len(sample) < start + 5:
+            if waited > SD_DATA_TIMEOUT_CLOCKS:
+                raise SdError("等待CRC状态超时")
+            more = self._readDat(SD_POLL_CLOCKS * 2)
+            waited += len(more)
+            sample += more
+            if start < 0:
+                start = next((i for i, nibble in enumerate(sample) if not nibble & 1), -1)
+        status = ((sample[start + 1] & 1) << 2) | ((sample[start + 2] & 1) << 1) | (sample[start + 3] & 1)
+        if status != sdproto.WRITE_ACCEPTED:
+            raise SdError(f"数据块写入被拒绝 (CRC状态 {status:03b})")
+        busy = sample[start + 5:]
+        if not busy or not busy[-1] & 1:
+            self.waitBusy()
+
+    def writeBlocks(self, lba, data):
+        """
+        写入连续的数据块
+
+        Args:
+            lba: 起始块号
+            data: 要写入的数据 (长度为512的倍数)
+        """
+        if len(data) % sdproto.SD_BLOCK_SIZE:
+            raise ValueError("写入长度必须是512字节的整数倍")
+        count = len(data) // sdproto.SD_BLOCK_SIZE
+        self._checkRange(lba, count)
+        view = memoryview(data).cast("B")
+        self._select()
+        with commandStats.timed("sd_write"):
+            done = 0
+            while done < count:
+                n = min(SD_MAX_BLOCKS_PER_COMMAND, count - done)
+                index = sdproto.CMD_WRITE_BLOCK if n == 1 else sdproto.CMD_WRITE_MULTIPLE_BLOCK
+                self.command(index, self._address(lba + done))
+                for k in range(done, done + n):
+                    self._sendBlock(bytes(view[k * sdproto.SD_BLOCK_SIZE:(k + 1) * sdproto.SD_BLOCK_SIZE]))
+                if n > 1:
+                    self.command(sdproto.CMD_STOP_TRANSMISSION)
+                    self.waitBusy()
+                done += n
+
+class SdBlockDevice:
+    """
+    带LRU块缓存和顺序预读的SD卡块设备
+
+    读取从上一次读取结束处继续时，未命中的部分向后多读readahead块放入缓存；
+    写入直接写到卡上并更新缓存 (write-through)。
+    """
+
+    def __init__(self, card, cache_blocks=SD_CACHE_BLOCKS, readahead=SD_READAHEAD_BLOCKS):
+        self.card = card
+        self.cache_blocks = cache_blocks
+        self.readahead = readahead
+        self.cache = OrderedDict()  # 块号 -> bytes，最近使用的在末尾
+        self.next_lba = None
+        self.hits = 0
+        self.misses = 0
+        self.prefetched = 0
+
+    def _insert(self, lba, block):
+        self.cache[lba] = block
+        self.cache.move_to_end(lba)
+        while len(self.cache) > self.cache_blocks:
+            self.cache.popitem(last=False)
+
+    def _fetch(self, first, count, sequential):
+        """从卡上读取一段未命中的块，顺序访问时向后预读"""
+        extra = 0
+        if sequential and self.readahead:
+            limit = min(self.readahead, self.cache_blocks - count, self.card.blocks - first - count)
+            while extra < limit and first + count + extra not in self.cache:
+                extra += 1
+        data = self.card.readBlocks(first, count + extra)
+        for k in range(count + extra):
+            self._insert(first + k, bytes(data[k * sdproto.SD_BLOCK_SIZE:(k + 1) * sdproto.SD_BLOCK_SIZE]))
+        self.prefetched += extra
+
+    def read(self, lba, count=1):
+        """
+        读取连续的数据块
+
+        Returns:
+            bytes
+        """
+        sequential = lba == self.next_lba
+        missing = [lba + k for k in range(count) if lba + k not in self.cache]
+        self.misses += len(missing)
+        self.hits += count - len(missing)
+        for first, end in testcart._blockRuns(missing):
+            self._fetch(first, end - first, sequential)
+        out = bytearray()
+        for k in range(count):
+            block = self.cache.get(lba + k)
+            if block is None:
+                # 缓存小于本次读取，超出部分已被淘汰
+                block = bytes(self.card.readBlocks(lba + k, 1))
+            else:
+                self.cache.move_to_end(lba + k)
+            out += block
+        self.next_lba = lba + count
+        return bytes(out)
+
+    def write(self, lba, data):
+        """写入连续的数据块 (写穿缓存)"""
+        self.card.writeBlocks(lba, data)
+        for k in range(len(data) // sdproto.SD_BLOCK_SIZE):
+            block = bytes(data[k * sdproto.SD_BLOCK_SIZE:(k + 1) * sdproto.SD_BLOCK_SIZE])
+            if lba + k in self.cache:
+                self._insert(lba + k, block)
+
+    def invalidate(self):
+        """清空缓存 (卡可能被其他设备修改时)"""
+        self.cache.clear()
+        self.next_lba = None
+
+def _timeCase(name, blocks, nbytes, func):
+    """执行一项测量并返回结果"""
+    start = time.perf_counter()
+    ok = func()
+    seconds = time.perf_counter() - start
+    return {
+        "op": name,
+        "blocks_per_command": blocks,
+        "bytes": nbytes,
+        "seconds": seconds,
+        "bytes_per_second": nbytes / seconds if seconds > 0 else None,
+        "ok": ok,
+    }
+
+def runSdBenchmark(card, lba=0, total_bytes=SD_BENCH_BYTES, sizes=SD_BENCH_SIZES, writes=False, seed=1):
+    """
+    SD卡吞吐量测量
+
+    Args:
+        card: 已初始化的SdCard
+        lba: 测量区域的起始块号
+        total_bytes: 每项测量的传输量
+        sizes: 每个命令的块数
+        writes: 也测量写入 (会覆盖测量区域的数据)
+        seed: 写入数据的种子
+
+    Returns:
+        结果列表
+    """
+    rng = random.Random(seed)
+    count = max(1, total_bytes // sdproto.SD_BLOCK_SIZE)
+    nbytes = count * sdproto.SD_BLOCK_SIZE
+    expected = rng.randbytes(nbytes) if writes else None
+    results = []
+
+    def write():
+        for first in range(0, count, blocks):
+            n = min(blocks, count - first)
+            card.writeBlocks(lba + first, expected[first * sdproto.SD_BLOCK_SIZE:(first + n) * sdproto.SD_BLOCK_SIZE])
+        return True
+
+    for blocks in sizes:
+        if writes:
+            results.append(_timeCase("write", blocks, nbytes, write))
+            printSdResult(results[-1])
+        out = bytearray(nbytes)
+
+        def read():
+            for first in range(0, count, blocks):
+                n = min(blocks, count - first)
+                card.readBlocks(lba + first, n, memoryview(out)[first * sdproto.SD_BLOCK_SIZE:])
+            return out == expected if writes else True
+        results.append(_timeCase("read", blocks, nbytes, read))
+        printSdResult(results[-1])
+
+    # 4KB顺序读取: 预读把每次读取合并为大的多块命令，第二遍全部命中缓存
+    device = SdBlockDevice(card, cache_blocks=max(SD_CACHE_BLOCKS, count))
+    page = 8
+
+    def sequential():
+        data = b"".join(device.read(lba + first, min(page, count - first)) for first in range(0, count, page))
+        return data == expected if writes else True
+    results.append(_timeCase("readahead", page, nbytes, sequential))
+    printSdResult(results[-1])
+    results.append(_timeCase("cached", page, nbytes, sequential))
+    results[-1]["hits"] = device.hits
+    printSdResult(results[-1])
+
+    # 4KB随机读取 (不预读)
+    device = SdBlockDevice(card, readahead=0)
+    pages = [rng.randrange(0, max(1, count - page + 1)) for _ in range(max(1, count // page))]
+    results.append(_timeCase("random", page, len(pages) * page * sdproto.SD_BLOCK_SIZE,
+                             lambda: all(len(device.read(lba + first, page)) for first in pages)))
+    printSdResult(results[-1])
+    return results
+
+def printSdResult(result):
+    """打印一行测量结果"""
+    rate = result["bytes_per_second"]
+    rate_text = f"{rate / 1024:.1f}KB/s" if rate else "-"
+    status = "✓" if result["ok"] else "✗"
+    print(f"{result['op']:<11}{result['blocks_per_command']:>6}{result['bytes']:>10}"
+          f"{result['seconds']:>10.3f}{rate_text:>14}  {status}")
+
+def printCardInfo(card):
+    """打印卡信息"""
+    name = card.cid[3:8].decode("ascii", "replace") if card.cid else "?"
+    print(f"SD卡: {name} (厂商0x{card.cid[0]:02X})" if card.cid else "SD卡: ?")
+    print(f"容量: {card.blocks * sdproto.SD_BLOCK_SIZE / 1024**3:.2f}GB ({card.blocks}块)")
+    print(f"类型: {'SDHC/SDXC (块寻址)' if card.high_capacity else '标准容量 (字节寻址)'}, RCA 0x{card.rca:04X}")
+
+def writeReport(path, card, results, device, sim=None):
+    """把结果和命令统计写入JSON文件"""
+    report = {
+        "device": device,
+        "sim": sim,
+        "time": datetime.datetime.now().isoformat(timespec="seconds"),
+        "card": {"blocks": card.blocks, "high_capacity": card.high_capacity,
+                 "cid": card.cid.hex() if card.cid else None, "csd": card.csd.hex() if card.csd else None},
+        "results": results,
+        "stats": commandStats.summary(),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SuperChis SD卡块设备驱动")
+    parser.add_argument("--sim", action="store_true", help="使用模拟烧卡器和SD卡 (无需硬件)")
+    parser.add_argument("--sim-latency", type=float, default=0.001, help="模拟USB往返延迟 (秒)")
+    parser.add_argument("--sim-bandwidth", type=float, default=1_000_000, help="模拟链路带宽 (字节/秒)")
+    parser.add_argument("--port", help="烧卡器串口，默认使用找到的第一个烧卡器")
+    parser.add_argument("--bench", action="store_true", help="测量SD卡读写吞吐量")
+    parser.add_argument("--bytes", type=int, default=SD_BENCH_BYTES, help="每项测量的传输量 (字节)")
+    parser.add_argument("--sizes", default=",".join(map(str, SD_BENCH_SIZES)), help="每个命令的块数 (逗号分隔)")
+    parser.add_argument("--writes", action="store_true", help="也测量写入 (会覆盖--lba起的数据)")
+    parser.add_argument("--lba", type=int, default=0, help="测量或导出的起始块号")
+    parser.add_argument("--dump", metavar="PATH", help="把从--lba起的--count块保存到文件")
+    parser.add_argument("--count", type=int, default=1, help="导出的块数")
+    parser.add_argument("--json", metavar="PATH", help="把测量结果写入JSON文件")
+    args = parser.parse_args()
+
+    testcart.ser = testcart.connectDevice(args.sim, args.sim_latency, args.sim_bandwidth, port_name=args.port)
+    if testcart.ser is None:
+        exit(-1)
+    commandStats.reset()
+
+    card = SdCard()
+    try:
+        card.init()
+        printCardInfo(card)
+        if args.dump:
+            data = card.readBlocks(args.lba, args.count)
+            with open(args.dump, "wb") as f:
+                f.write(data)
+            print(f"已保存 {args.count} 块到: {os.path.abspath(args.dump)}")
+        if args.bench:
+            sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+            print("\n=== SD卡吞吐量测量 ===")
+            print(f"{'访问':<9}{'块/命令':>7}{'字节':>9}{'用时(秒)':>8}{'吞吐量':>12}")
+            results = runSdBenchmark(card, args.lba, args.bytes, sizes, args.writes)
+            if args.json:
+                sim = {"latency": args.sim_latency, "bandwidth": args.sim_bandwidth} if args.sim else None
+                writeReport(args.json, card, results, testcart.ser.port, sim)
+                print(f"\n结果已写入: {args.json}")
+    except SdError as e:
+        print(f"SD卡操作失败: {e}")
+    except KeyboardInterrupt:
+        print("\n操作被用户中断")
+    finally:
+        testcart.ser.close()
@@ -0,0 +1,104 @@
+"""
+SD卡总线协议辅助函数 (4位SD模式)
+
+sdcard.py中的主机驱动和simcart.py中的SD卡模型共用：
+命令帧与CRC7、数据块的半字节序列与每条DAT线的CRC16。
+"""
+import binascii
+
+SD_BLOCK_SIZE = 512
+SD_BLOCK_NIBBLES = SD_BLOCK_SIZE * 2  # 4位总线上一个数据块的时钟数
+SD_CRC_NIBBLES = 16                   # 每条DAT线一个CRC16
+
+# 命令编号
+CMD_GO_IDLE_STATE = 0
+CMD_ALL_SEND_CID = 2
+CMD_SEND_RELATIVE_ADDR = 3
+CMD_SELECT_CARD = 7
+CMD_SEND_IF_COND = 8
+CMD_SEND_CSD = 9
+CMD_STOP_TRANSMISSION = 12
+CMD_SEND_STATUS = 13
+CMD_SET_BLOCKLEN = 16
+CMD_READ_SINGLE_BLOCK = 17
+CMD_READ_MULTIPLE_BLOCK = 18
+CMD_WRITE_BLOCK = 24
+CMD_WRITE_MULTIPLE_BLOCK = 25
+CMD_APP_CMD = 55
+ACMD_SET_BUS_WIDTH = 6
+ACMD_SD_SEND_OP_COND = 41
+
+# 应答长度 (位)
+R1_BITS = 48
+R2_BITS = 136
+
+# OCR位
+OCR_BUSY = 1 << 31   # 上电完成
+OCR_CCS = 1 << 30    # 高容量卡 (块寻址)
+
+# 数据写入后的CRC状态
+WRITE_ACCEPTED = 0b010
+WRITE_CRC_ERROR = 0b101
+
+# 半字节拆分/合并表
+_HIGH_NIBBLE = bytes(b >> 4 for b in range(256))
+_LOW_NIBBLE = bytes(b & 0x0F for b in range(256))
+_SHIFT_NIBBLE = bytes((b & 0x0F) << 4 for b in range(256))
+# 每条DAT线: 一个数据字节在该线上的2位 (高半字节的位在前)，按在线字节中的位置预先移位
+_LINE_TABLES = [[bytes(((((b >> (4 + line)) & 1) << 1) | ((b >> line) & 1)) << (6 - 2 * k) for b in range(256))
+                 for k in range(4)] for line in range(4)]
+
+def crc7(data):
+    """命令帧的CRC7 (x^7 + x^3 + 1)"""
+    crc = 0
+    for byte in data:
+        for bit in range(7, -1, -1):
+            feedback = ((crc >> 6) & 1) ^ ((byte >> bit) & 1)
+            crc = (crc << 1) & 0x7F
+            if feedback:
+                crc ^= 0x09
+    return crc
+
+def commandFrame(index, arg):
+    """48位命令帧 (6字节): 起始位0、传输位1、命令编号、参数、CRC7、结束位1"""
+    head = bytes([0x40 | index]) + arg.to_bytes(4, "big")
+    return head + bytes([(crc7(head) << 1) | 1])
+
+def toBits(data):
+    """字节序列展开为位序列 (高位在前，每位一个字节)"""
+    return bytes((byte >> bit) & 1 for byte in data for bit in range(7, -1, -1))
+
+def fromBits(bits):
+    """位序列 (高位在前) 合并为整数"""
+    return int("".join("1" if bit else "0" for bit in bits) or "0", 2)
+
+def toNibbles(data):
+    """数据字节展开为总线上的半字节序列 (高半字节在前)"""
+    out = bytearray(len(data) * 2)
+    out[0::2] = bytes(data).translate(_HIGH_NIBBLE)
+    out[1::2] = bytes(data).translate(_LOW_NIBBLE)
+    return out
+
+def fromNibbles(nibbles):
+    """半字节序列合并为数据字节"""
+    high = bytes(nibbles[0::2]).translate(_SHIFT_NIBBLE)
+    low = bytes(nibbles[1::2]).translate(_LOW_NIBBLE)
+    return (int.from_bytes(high, "big") | int.from_bytes(low, "big")).to_bytes(len(low), "big")
+
+def _lineBytes(data, line):
+    """一条DAT线上传输的位 (按字节打包，长度须为4的倍数)"""
+    value = 0
+    for k in range(4):
+        value |= int.from_bytes(data[k::4].translate(_LINE_TABLES[line][k]), "big")
+    return value.to_bytes(len(data) // 4, "big")
+
+def dataCrcNibbles(data):
+    """
+    数据块在4条DAT线上的CRC16，按时钟排成16个半字节 (第i位为DAT i)
+
+    每条线的CRC16为CCITT多项式、初值0，与binascii.crc_hqx一致。
+    """
+    data = bytes(data)
+    crcs = [binascii.crc_hqx(_lineBytes(data, line), 0) for line in range(4)]
+    return bytes(sum(((crc >> (15 - k)) & 1) << line for line, crc in enumerate(crcs))
+                 for k in range(SD_CRC_NIBBLES))
@@ -0,0 +1,458 @@
+"""
+SuperChis SDRAM控制器周期级性能模型
+
+按superchis.vhd中的sdram_syncer/sdram_controller进程，以50MHz周期为单位回放GBA总线访问：
+- 初始化: POWER_UP在第一次读写时进入PRECHARGE_ALL，读写结束后进入AUTO_REFRESH，
+  每周期发出刷新直到魔术地址写入0xA55A，随后MODE_REG_SET并进入IDLE
+- IDLE: 读写选通的第一个周期 (gba_bus_idle_sync_d1=1) 发出ACTIVATE，
+  之后ddr_cycle_counter <= 2的周期发出带自动预充电的READ/WRITE (4位计数器回绕)
+- 刷新: refresh_counter每REFRESH_INTERVAL+1个周期挂起一次刷新，
+  在DDR未选中或选通结束的周期发出；同一周期的新请求会被清除
+
+控制器的逐周期if链按访问事件用NumPy向量化 (计数器窗口和刷新时机都有闭式解)，
+每秒可回放数百万次访问。报告每次访问的周期数、读数据的时间余量、
+刷新延迟与丢失、刷新与ACTIVATE的tRC冲突，用于评估tRC_CYCLES、REFRESH_INTERVAL
+和计数器窗口等时序常量，无需FPGA工具链。
+"""
+import argparse
+import itertools
+import json
+import math
+import time
+
+import numpy as np
+
+CLOCK_NS = 20.0                     # CLK50MHz
+GBA_CYCLE_NS = 1e9 / 16777216       # GBA系统时钟周期 (约59.6ns)
+GBA_N_WAIT = 4                      # WAITCNT WS0第一次访问等待周期
+GBA_S_WAIT = 2                      # WAITCNT WS0连续访问等待周期
+
+MAGIC_ADDRESS_WORD = 0x00FFFFFF     # 魔术地址 (GBA字节地址0x09FFFFFE)
+BOOTLEG_SRAM_BANK_WORD = 0x00800000 # SRAM Bank切换地址 (不复位魔术序列)
+MAGIC_VALUE = 0xA55A
+CONFIG_MAP_DDR = 0x01
+CONFIG_SD_ENABLE = 0x02
+CONFIG_WRITE_ENABLE = 0x04
+
+MODEL_ACCESSES = 1_000_000          # 默认回放的访问次数
+MODEL_BURST = 8                     # 连续访问模式的突发长度
+MODEL_SPAN_WORDS = 0x01000000       # 地址范围 (32MB)
+
+# 每次访问的总线记录: 字地址、读写、写入值、是否为连续访问 (不重新加载地址)、
+# 选通前的高电平时间和选通 (/RD或/WR) 低电平时间
+TRACE_DTYPE = np.dtype([("addr", "<u4"), ("write", "?"), ("data", "<u2"), ("seq", "?"),
+                        ("gap_ns", "<f4"), ("low_ns", "<f4")])
+
+class SdramTiming:
+    """
+    控制器常量与SDRAM时序参数 (W9825G6KH-6I，50MHz)
+
+    refresh_interval和cas_window对应VHDL中的REFRESH_INTERVAL和ddr_cycle_counter <= 2，
+    其余参数用于检查命令间隔和读数据时间。
+    """
+
+    def __init__(self, clock_ns=CLOCK_NS, refresh_interval=384, cas_window=2, counter_bits=4,
+                 cas_latency=2, trc_ns=60.0, trrd_ns=12.0, tac_ns=5.0, trefi_ns=64e6 / 8192):
+        self.clock_ns = clock_ns
+        self.refresh_interval = refresh_interval
+        self.cas_window = cas_window
+        self.counter_bits = counter_bits
+        self.cas_latency = cas_latency
+        self.trc_ns = trc_ns
+        self.trrd_ns = trrd_ns
+        self.tac_ns = tac_ns
+        self.trefi_ns = trefi_ns
+
+    def cycles(self, ns):
+        """时间换算为需要间隔的周期数 (向上取整)"""
+        return math.ceil(ns / self.clock_ns - 1e-9)
+
+    def asdict(self):
+        return dict(vars(self))
+
+def gbaTrace(addrs, writes=False, data=0, seq=None, n_wait=GBA_N_WAIT, s_wait=GBA_S_WAIT):
+    """
+    按GBA卡带总线时序生成访问记录
+
+    第一次访问 (N) 前片选拉高一个GBA周期，选通低电平为 (等待周期+1) 个GBA周期减半个周期；
+    连续访问 (S) 之间选通拉高半个GBA周期。
+
+    Args:
+        addrs: 字地址数组
+        writes: 是否为写入 (标量或数组)
+        data: 写入值 (标量或数组)
+        seq: 是否为连续访问，默认按地址是否紧接上一次访问判断
+        n_wait: 第一次访问的等待周期
+        s_wait: 连续访问的等待周期
+
+    Returns:
+        TRACE_DTYPE记录数组
+    """
+    addrs = np.asarray(addrs, dtype=np.uint32)
+    trace = np.zeros(len(addrs), dtype=TRACE_DTYPE)
+    trace["addr"] = addrs
+    trace["write"] = writes
+    trace["data"] = data
+    if seq is None:
+        seq = np.r_[False, addrs[1:] == addrs[:-1] + 1]
+    trace["seq"] = seq
+    trace["seq"][:1] = False
+    tg = GBA_CYCLE_NS
+    trace["low_ns"] = np.where(trace["seq"], (s_wait + 1) * tg - tg / 2, (n_wait + 1) * tg - tg / 2)
+    trace["gap_ns"] = np.where(trace["seq"], tg / 2, tg + tg / 2)
+    return trace
+
+def unlockTrace(config=CONFIG_MAP_DDR | CONFIG_WRITE_ENABLE):
+    """上电后的第一次读取加魔术解锁序列 (两次0xA55A + 两次配置值)"""
+    addrs = [0] + [MAGIC_ADDRESS_WORD] * 4
+    data = [0, MAGIC_VALUE, MAGIC_VALUE, config, config]
+    return gbaTrace(addrs, [False, True, True, True, True], data, seq=[False] * 5)
+
+def patternTrace(pattern="seq", count=MODEL_ACCESSES, burst=MODEL_BURST, span=MODEL_SPAN_WORDS,
+                 n_wait=GBA_N_WAIT, s_wait=GBA_S_WAIT, seed=1):
+    """
+    生成访问模式
+
+    Args:
+        pattern: seq (连续读取突发)、write (连续写入突发)、random (随机单次读取)、
+                 mixed (随机位置的读写突发)
+        count: 访问次数
+        burst: 突发长度
+        span: 地址范围 (字)
+        seed: 随机种子
+    """
+    rng = np.random.default_rng(seed)
+    if pattern == "random":
+        addrs = rng.integers(0, span, count, dtype=np.uint32)
+        return gbaTrace(addrs, seq=np.zeros(count, dtype=bool), n_wait=n_wait, s_wait=s_wait)
+    bursts = -(-count // burst)
+    if pattern in ("seq", "write"):
+        starts = (np.arange(bursts, dtype=np.uint64) * burst % span).astype(np.uint32)
+    else:
+        starts = rng.integers(0, span - burst, bursts, dtype=np.uint32)
+    offsets = np.arange(count) % burst
+    addrs = np.repeat(starts, burst)[:count] + offsets.astype(np.uint32)
+    seq = offsets != 0
+    if pattern == "write":
+        writes = True
+    elif pattern == "mixed":
+        writes = np.repeat(rng.random(bursts) < 0.5, burst)[:count]
+    else:
+        writes = False
+    data = rng.integers(0, 0x10000, count, dtype=np.uint16)
+    return gbaTrace(addrs, writes, data, seq, n_wait, s_wait)
+
+def _configs(trace, config):
+    """按魔术解锁状态机计算每次访问时生效的配置值"""
+    write_idx = np.flatnonzero(trace["write"] & (trace["addr"] != BOOTLEG_SRAM_BANK_WORD))
+    magic = trace["addr"][write_idx] == MAGIC_ADDRESS_WORD
+    after_magic = np.r_[False, magic[:-1]]
+    change_at = [0]
+    values = [config]
+    count = 0
+    for k in np.flatnonzero(magic):
+        if not after_magic[k]:
+            count = 0  # 中间有其他写入，序列已复位
+        value = int(trace["data"][write_idx[k]])
+        if count == 0:
+            count = 1 if value == MAGIC_VALUE else 0
+        elif count == 1:
+            count = 2 if value == MAGIC_VALUE else 0
+        elif count == 2:
+            count = 3
+        else:
+            change_at.append(write_idx[k] + 1)
+            values.append(value)
+            count = 0
+    starts = np.asarray(change_at)
+    return np.asarray(values)[np.searchsorted(starts, np.arange(len(trace)), side="right") - 1]
+
+def _windowCount(x, window, modulus):
+    """0..x中满足 y % modulus <= window 的y的个数 (x >= -1)"""
+    x = x + 1
+    return (x // modulus) * min(window + 1, modulus) + np.minimum(x % modulus, window + 1)
+
+def _firstEligible(starts, ends, after):
+    """
+    区间并集中第一个大于after的周期
+
+    Args:
+        starts, ends: 按起点排序的区间 [start, end)
+        after: 查询周期数组
+
+    Returns:
+        周期数组 (没有时为-1)
+    """
+    reach = np.maximum.accumulate(ends)
+    x = after + 1
+    i = np.searchsorted(starts, x, side="right") - 1
+    inside = (i >= 0) & (reach[np.maximum(i, 0)] > x)
+    following = np.minimum(i + 1, len(starts) - 1)
+    return np.where(inside, x, np.where(i + 1 < len(starts), starts[following], -1))
+
+def simulate(trace, timing=None, config=0, initialized=False):
+    """
+    回放访问记录
+
+    IDLE中的if链按访问事件向量化：ACTIVATE只可能出现在选通的第一个周期
+    (上一周期没有选通，即gba_bus_idle_sync_d1=1)，READ/WRITE出现在选通的其余周期中
+    计数器窗口内的周期，刷新在DDR未选中或选通结束的周期中发出，三者互斥。
+    每次访问的命令数和第一次READ/WRITE的周期由计数器回绕的闭式计算得到。
+
+    Args:
+        trace: TRACE_DTYPE记录数组
+        timing: SdramTiming，默认与superchis.vhd一致
+        config: 记录开始时的配置值 (魔术序列在记录中会改变它)
+        initialized: 控制器已处于IDLE (记录不含上电和解锁序列)
+
+    Returns:
+        结果字典
+    """
+    timing = timing or SdramTiming()
+    started = time.perf_counter()
+    clock = timing.clock_ns
+    n = len(trace)
+    if n == 0:
+        raise ValueError("访问记录为空")
+
+    # ---- 访问时间与周期 ----
+    # 信号在CLK50MHz上升沿同步，控制器在随后的下降沿动作：
+    # 周期t看到的是第t个上升沿采样的选通/片选，选通占周期 [s, e)
+    low = trace["low_ns"].astype(np.float64)
+    gap = trace["gap_ns"].astype(np.float64)
+    start_ns = np.cumsum(gap + low) - low
+    end_ns = start_ns + low
+    s = np.ceil(start_ns / clock - 1e-9).astype(np.int64)
+    e = np.maximum(np.ceil(end_ns / clock - 1e-9).astype(np.int64), s)
+    strobed = e > s
+    seq = trace["seq"].copy()
+    seq[0] = False
+    first = np.flatnonzero(~seq)
+    burst = np.cumsum(~seq) - 1
+    last = np.r_[first[1:] - 1, n - 1]
+    setup_ns = np.minimum(gap[first], GBA_CYCLE_NS / 2)
+    cs_fall = np.ceil((start_ns[first] - setup_ns) / clock - 1e-9).astype(np.int64)
+    cs_rise = e[last]
+    end_cycle = int(e[-1])
+
+    configs = _configs(trace, config)
+    write = trace["write"]
+    we = (configs & CONFIG_WRITE_ENABLE) != 0
+    selected = ((configs & CONFIG_MAP_DDR) != 0) & ~(((configs & CONFIG_SD_ENABLE) != 0) &
+                                                   ((trace["addr"] >> 23) & 1).astype(bool))
+
+    # ---- 初始化序列 ----
+    init = {"precharge_cycles": 0, "refresh_cycles": 0, "idle_start": 0}
+    if initialized:
+        idle_start = 0
+    else:
+        busy = np.flatnonzero(strobed)
+        idle_start = end_cycle + 1
+        if len(busy):
+            p0 = s[busy[0]]                    # POWER_UP看到第一次选通
+            e0 = e[busy[0]]                    # PRECHARGE_ALL持续到选通结束
+            unlock = np.flatnonzero(write & (trace["addr"] == MAGIC_ADDRESS_WORD) &
+                                    (trace["data"] == MAGIC_VALUE) & (e > e0 + 1))
+            init["precharge_cycles"] = int(e0 - p0)
+            if len(unlock):
+                m = max(int(s[unlock[0]]), int(e0) + 1)  # AUTO_REFRESH看到魔术值写入
+                init["refresh_cycles"] = int(m - e0)
+                idle_start = m + 2                        # MODE_REG_SET之后进入IDLE
+        init["idle_start"] = int(idle_start)
+    t0 = idle_start
+
+    # ---- IDLE: ACTIVATE与READ/WRITE ----
+    # 上一周期有选通 (gba_bus_idle_sync_d1=0) 当且仅当之前最近一次选通恰好在s结束
+    previous_end = np.r_[-1, np.maximum.accumulate(np.where(strobed, e, -1))[:-1]]
+    d1 = previous_end < s
+    active = selected & (~write | we) & strobed      # n_ddr_sel=0且读或写选通有效
+    act = active & d1 & (s >= t0)
+    act_cycles = s[act]
+    # ddr_cycle_counter: 周期t读到的值是 (t - 上一次ACTIVATE - 1) mod 2^counter_bits
+    last_act = np.maximum.accumulate(np.where(act, s, t0 - 1))
+    lo = np.where(act, s + 1, np.maximum(s, t0))
+    hi = e - 1
+    modulus = 1 << timing.counter_bits
+    window = timing.cas_window
+    cas_count = np.where(active & (hi >= lo), _windowCount(hi - last_act - 1, window, modulus) -
+                         _windowCount(lo - last_act - 2, window, modulus), 0)
+    offset = (lo - last_act - 1) % modulus
+    first_cas = lo + np.where(offset <= window, 0, modulus - offset)
+    first_cas = np.where((cas_count > 0), first_cas, -1)
+
+    # ---- 刷新: 请求、发出和丢失 ----
+    # 可刷新的周期: 片选无效、当前访问不选中DDR、或选通结束后的第一个周期
+    next_start = np.r_[s[1:], np.iinfo(np.int64).max]
+    slot_start = np.where(seq, s, cs_fall[burst])
+    slot_end = np.where(np.r_[seq[1:], False], np.r_[s[1:], 0], cs_rise[burst])
+    edge = strobed & (next_start > e)
+    unselected = ~selected
+    starts = np.concatenate([[0], cs_rise, slot_start[unselected], e[edge]])
+    ends = np.concatenate([cs_fall, [np.iinfo(np.int64).max], slot_end[unselected], e[edge] + 1])
+    order = np.argsort(starts, kind="stable")
+    starts, ends = starts[order], ends[order]
+
+    period = timing.refresh_interval + 1
+    requests = np.arange(t0 + timing.refresh_interval, end_cycle, period, dtype=np.int64)
+    issued = _firstEligible(starts, ends, requests)
+    # 挂起期间的新请求合并到同一次刷新，与刷新同周期的新请求被清零：
+    # 被接受的请求之后，直到它的刷新发出 (含该周期) 为止的请求都丢失，下一个被接受的是其后的第一个请求
+    following = np.where(issued >= 0, np.searchsorted(requests, issued, side="right"), len(issued))
+    lost = np.ones(len(issued), dtype=bool)
+    k = 0
+    while k < len(issued):
+        lost[k] = False
+        k = following[k]
+    refresh_cycles = np.unique(issued[~lost])
+    latency = issued[~lost] - requests[~lost]
+    in_trace = refresh_cycles < end_cycle
+
+    # ---- 每次访问 ----
+    sdram = active & (s >= t0)
+    reads = sdram & ~write & (first_cas >= 0)
+    valid_ns = (first_cas + timing.cas_latency) * clock + timing.tac_ns
+    margin = end_ns - valid_ns
+    read_latency = valid_ns - start_ns
+    cas_latency = first_cas - s
+
+    # ---- 命令间隔 ----
+    trc = timing.cycles(timing.trc_ns)
+    trrd = timing.cycles(timing.trrd_ns)
+    ref = refresh_cycles
+    before = np.searchsorted(act_cycles, ref) - 1
+    after = np.searchsorted(act_cycles, ref, side="right")
+    act_to_ref = (before >= 0) & (ref - act_cycles[np.maximum(before, 0)] < trc)
+    safe_after = np.minimum(after, max(len(act_cycles) - 1, 0))
+    ref_to_act = (after < len(act_cycles)) & ((act_cycles[safe_after] if len(act_cycles) else ref) - ref < trc)
+    banks = (trace["addr"][act] >> 22) & 3
+    act_gap = np.diff(act_cycles)
+    same_bank = banks[1:] == banks[:-1]
+
+    def stat(values, func, default=None):
+        return float(func(values)) if len(values) else default
+
+    sdram_count = int(sdram.sum())
+    period_cycles = np.diff(s)
+    seconds = time.perf_counter() - started
+    return {
+        "timing": timing.asdict(),
+        "accesses": n,
+        "sdram_accesses": sdram_count,
+        "cycles": end_cycle,
+        "bus_time_ns": end_cycle * clock,
+        "cycles_per_access": stat(period_cycles, np.mean),
+        "strobe_cycles": stat(e - s, np.mean),
+        "init": init,
+        "commands": {
+            "activate": len(act_cycles),
+            "read_write": int(cas_count.sum()),
+            "refresh": int(in_trace.sum()),
+        },
+        "access": {
+            "uninitialized": int((active & (s < t0)).sum()),
+            "dropped": int((sdram & (cas_count == 0)).sum()),
+            "no_activate": int((sdram & ~act).sum()),
+            "extra_cas": int(np.maximum(cas_count[sdram] - 1, 0).sum()),
+            "late_reads": int((reads & (margin < 0)).sum()),
+            "min_read_margin_ns": stat(margin[reads], np.min),
+            "worst_cas_latency_cycles": stat(cas_latency[sdram & (first_cas >= 0)], np.max),
+            "worst_read_latency_ns": stat(read_latency[reads], np.max),
+            "mean_read_latency_ns": stat(read_latency[reads], np.mean),
+        },
+        "refresh": {
+            "requests": len(requests),
+            "issued": len(refresh_cycles),
+            "lost": int(lost.sum()),
+            "worst_latency_cycles": stat(latency, np.max),
+            "mean_latency_cycles": stat(latency, np.mean),
+            "max_interval_ns": stat(np.diff(refresh_cycles[in_trace]) * clock, np.max),
+            "collisions": int((act_to_ref | ref_to_act)[in_trace].sum()),
+            "act_to_ref": int(act_to_ref[in_trace].sum()),
+            "ref_to_act": int(ref_to_act[in_trace].sum()),
+        },
+        "violations": {
+            "act_to_act_same_bank": int(((act_gap < trc) & same_bank).sum()),
+            "act_to_act_other_bank": int(((act_gap < trrd) & ~same_bank).sum()),
+        },
+        "model": {"seconds": seconds, "accesses_per_second": n / seconds if seconds > 0 else None},
+    }
+
+def printReport(result):
+    """打印单次回放的结果"""
+    timing = result["timing"]
+    acc = result["access"]
+    ref = result["refresh"]
+    print(f"REFRESH_INTERVAL={timing['refresh_interval']}  计数器窗口<={timing['cas_window']}  "
+          f"tRC={timing['trc_ns']:.0f}ns  CL={timing['cas_latency']}")
+    print(f"  访问: {result['accesses']} (SDRAM {result['sdram_accesses']})，"
+          f"{result['cycles_per_access']:.2f}周期/次，选通{result['strobe_cycles']:.2f}周期")
+    print(f"  初始化: 预充电{result['init']['precharge_cycles']}周期，"
+          f"刷新{result['init']['refresh_cycles']}周期，IDLE起始周期{result['init']['idle_start']}")
+    print(f"  命令: ACTIVATE {result['commands']['activate']}，READ/WRITE {result['commands']['read_write']}，"
+          f"REFRESH {result['commands']['refresh']}")
+    margin = acc["min_read_margin_ns"]
+    print(f"  访问问题: 丢失{acc['dropped']}，无ACTIVATE {acc['no_activate']}，读数据过晚{acc['late_reads']}，"
+          f"重复CAS {acc['extra_cas']}，未初始化{acc['uninitialized']}")
+    if margin is not None:
+        print(f"  读延迟: 最差{acc['worst_read_latency_ns']:.1f}ns，平均{acc['mean_read_latency_ns']:.1f}ns，"
+              f"最小余量{margin:.1f}ns")
+    interval = ref["max_interval_ns"]
+    interval_text = f"{interval / 1000:.2f}us" if interval is not None else "-"
+    print(f"  刷新: 发出{ref['issued']}，丢失{ref['lost']}，最差延迟{ref['worst_latency_cycles'] or 0:.0f}周期，"
+          f"最大间隔{interval_text} (tREFI {timing['trefi_ns'] / 1000:.2f}us)，"
+          f"tRC冲突{ref['collisions']} (ACT→REF {ref['act_to_ref']}, REF→ACT {ref['ref_to_act']})")
+    violations = result["violations"]
+    print(f"  ACTIVATE间隔违例: 同Bank {violations['act_to_act_same_bank']}，"
+          f"不同Bank {violations['act_to_act_other_bank']}")
+    model = result["model"]
+    print(f"  模型: {model['seconds']:.2f}秒，{(model['accesses_per_second'] or 0) / 1e6:.2f}M次访问/秒")
+
+def parseInts(text):
+    """解析逗号分隔的整数列表"""
+    return [int(item) for item in text.split(",") if item.strip()]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SuperChis SDRAM控制器周期级性能模型")
+    parser.add_argument("--trace", metavar="PATH", help="回放保存的访问记录 (.npy，TRACE_DTYPE)")
+    parser.add_argument("--pattern", choices=("seq", "write", "random", "mixed"), default="seq",
+                        help="生成的访问模式")
+    parser.add_argument("--accesses", type=int, default=MODEL_ACCESSES, help="生成的访问次数")
+    parser.add_argument("--burst", type=int, default=MODEL_BURST, help="突发长度")
+    parser.add_argument("--n-wait", type=int, default=GBA_N_WAIT, help="第一次访问的等待周期 (WAITCNT)")
+    parser.add_argument("--s-wait", type=int, default=GBA_S_WAIT, help="连续访问的等待周期 (WAITCNT)")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子")
+    parser.add_argument("--no-unlock", action="store_true",
+                        help="记录不含上电和解锁序列，控制器从IDLE开始 (SDRAM映射、写使能)")
+    parser.add_argument("--save-trace", metavar="PATH", help="把生成的访问记录保存为.npy")
+    parser.add_argument("--refresh-interval", type=parseInts, default=[384], help="REFRESH_INTERVAL (逗号分隔)")
+    parser.add_argument("--cas-window", type=parseInts, default=[2], help="ddr_cycle_counter窗口上限 (逗号分隔)")
+    parser.add_argument("--trc", type=float, default=60.0, help="tRC (ns)")
+    parser.add_argument("--json", metavar="PATH", help="把结果写入JSON文件")
+    args = parser.parse_args()
+
+    if args.trace:
+        trace = np.load(args.trace)
+        if trace.dtype != TRACE_DTYPE:
+            parser.error(f"访问记录格式不符: {trace.dtype}")
+    else:
+        if not 0 < args.burst < MODEL_SPAN_WORDS:
+            parser.error(f"突发长度必须在1到{MODEL_SPAN_WORDS - 1}之间: {args.burst}")
+        trace = patternTrace(args.pattern, args.accesses, args.burst, n_wait=args.n_wait,
+                             s_wait=args.s_wait, seed=args.seed)
+        if not args.no_unlock:
+            trace = np.concatenate([unlockTrace(), trace])
+    if args.save_trace:
+        np.save(args.save_trace, trace)
+        print(f"访问记录已保存: {args.save_trace}")
+
+    results = []
+    for interval, window in itertools.product(args.refresh_interval, args.cas_window):
+        timing = SdramTiming(refresh_interval=interval, cas_window=window, trc_ns=args.trc)
+        result = simulate(trace, timing, initialized=args.no_unlock,
+                          config=CONFIG_MAP_DDR | CONFIG_WRITE_ENABLE if args.no_unlock else 0)
+        results.append(result)
+        printReport(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入: {args.json}")
@@ -0,0 +1,690 @@
+"""
+SuperChis 烧卡器与卡带模拟器
+
+在没有硬件的机器上代替烧卡器 (USB VID 0x0483, PID 0x0721) 运行testcart.py。
+模拟器使用与烧卡器相同的0xF5/0xF6/0xF7/0xF8命令帧格式，卡带部分按照
+superchis.vhd建模：
+- 0x09FFFFFE魔术解锁状态机 (两次0xA55A + 两次配置值)
+- Flash/SDRAM映射 (CONFIG_MAP_DDR) 与写使能门控
+- 内部16位地址计数器 (连续访问只递增低16位)
+- Flash高位Bank偏移 (config_bank_select) 与SRAM Bank切换
+- 32MB SDRAM后备存储
+- SD卡接口 (SimulatedSdCard，按时钟建模的SDHC卡)
+
+链路部分模拟USB延迟、带宽和每帧处理开销，使命令流水线等传输优化在
+模拟器上也能体现出真实的时间差异。
+"""
+import struct
+import time
+from collections import deque
+
+import sdproto
+
+# 卡带参数 (与superchis.vhd一致)
+SDRAM_SIZE = 32 * 1024**2           # 32MB SDRAM
+FLASH_SIZE = 64 * 1024**2           # 64MB Flash (FLASH_HIGH最多寻址128MB)
+SRAM_BANK_SIZE = 64 * 1024          # 每个SRAM Bank 64KB
+WINDOW_WORDS = 0x10000              # 内部地址计数器为16位，连续访问在128KB窗口内回绕
+
+MAGIC_ADDRESS_WORD = 0x00FFFFFF     # 魔术地址 (GBA字节地址0x09FFFFFE)
+BOOTLEG_SRAM_BANK_WORD = 0x00800000 # SRAM Bank切换地址 (GBA字节地址0x09000000)
+MAGIC_VALUE = 0xA55A
+
+# 烧卡器应答
+ACK = b"\x01"
+STATUS = b"\x00\x00"
+
+class PagedMemory:
+    """按128KB窗口分页的稀疏存储，未写入的页读出为填充值"""
+
+    PAGE_SIZE = WINDOW_WORDS * 2
+
+    def __init__(self, size, fill=0xFF):
+        self.size = size
+        self.fill = fill
+        self.pages = {}
+
+    def _page(self, index):
+        page = self.pages.get(index)
+        if page is None:
+            page = self.pages[index] = bytearray([self.fill]) * self.PAGE_SIZE
+        return page
+
+    def read(self, offset, length):
+        """读取不跨页的数据"""
+        offset %= self.size
+        index, start = divmod(offset, self.PAGE_SIZE)
+        page = self.pages.get(index)
+        if page is None:
+            return bytes([self.fill]) * length
+        return bytes(page[start:start + length])
+
+    def write(self, offset, data):
+        """写入不跨页的数据"""
+        offset %= self.size
+        index, start = divmod(offset, self.PAGE_SIZE)
+        self._page(index)[start:start + len(data)] = data
+
+class StuckBitFault:
+    """
+    SDRAM数据位固定故障 (用于故障注入)
+
+    字地址满足 (word & addr_mask) == addr_match 的字，读出时stuck_mask中的位
+    固定为stuck_value中对应的位。addr_mask为0表示所有地址。
+    """
+
+    def __init__(self, stuck_mask, stuck_value, addr_mask=0, addr_match=0):
+        self.stuck_mask = stuck_mask & 0xFFFF
+        self.stuck_value = stuck_value & self.stuck_mask
+        self.addr_mask = addr_mask
+        self.addr_match = addr_match & addr_mask
+        keep_lo, keep_hi = ~self.stuck_mask & 0xFF, (~self.stuck_mask >> 8) & 0xFF
+        self._lo = bytes((b & keep_lo) | (self.stuck_value & 0xFF) for b in range(256))
+        self._hi = bytes((b & keep_hi) | (self.stuck_value >> 8) for b in range(256))
+
+    def apply(self, word_addr, data):
+        """对从word_addr开始的连续字 (bytearray) 施加故障"""
+        if self.addr_mask == 0:
+            data[0::2] = data[0::2].translate(self._lo)
+            data[1::2] = data[1::2].translate(self._hi)
+            return
+        for k in range(len(data) // 2):
+            if ((word_addr + k) & self.addr_mask) == self.addr_match:
+                data[k * 2] = self._lo[data[k * 2]]
+                data[k * 2 + 1] = self._hi[data[k * 2 + 1]]
+
+class SimulatedSdCard:
+    """
+    SD卡模型 (SDHC，4位总线)，通过SimulatedCart.sd连接
+
+    主机一侧按superchis.vhd中的SD控制器建模，每次总线访问产生一个SD_CLK：
+    - CMD窗口 (GP_22=1): 写入在地址阶段锁存D7并驱动CMD；读取把CMD采样到D0
+    - DAT读窗口 (GP_19=1): 读取把DAT3..0采样到D11..D8，每次访问后寄存器循环左移4位
+    - DAT写窗口: 第一次访问输出地址阶段锁存的D7..D4，之后的访问输出D3..D0
+    卡一侧按时钟推进：命令在第48个时钟执行，应答、数据和忙信号从输出队列逐时钟送出，
+    命令后的时钟 (包括主机发送的时钟) 都会消耗输出队列。
+    """
+
+    IDLE, READY, IDENT, STBY, TRAN, DATA, RCV, PRG = range(8)
+
+    def __init__(self, size=1024**3, ncr=2, nac=8, busy_clocks=16, init_polls=2):
+        self.storage = PagedMemory(size, fill=0x00)
+        self.blocks = size // sdproto.SD_BLOCK_SIZE
+        self.ncr = ncr                  # 命令结束到应答起始位的时钟数
+        self.nac = nac                  # 应答结束 (或上一个数据块) 到数据起始位的时钟数
+        self.busy_clocks = busy_clocks  # 写入后DAT0保持忙的时钟数
+        self.init_polls = init_polls    # ACMD41返回上电完成前需要的轮询次数
+        self.read_buffer = 0            # CPLD中的sd_read_buffer
+        self.commands = []              # 执行过的命令编号 (调试用)
+        self.reset()
+
+    def reset(self):
+        """卡复位 (CMD0)"""
+        self.state = self.IDLE
+        self.app_cmd = False
+        self.rca = 0
+        self.bus_width = 1
+        self.init_count = 0
+        self.cmd_in = None          # 正在接收的命令位
+        self.cmd_out = bytearray()  # CMD输出队列 (每时钟一位)
+        self.cmd_pos = 0
+        self.dat_out = bytearray()  # DAT输出队列 (每时钟一个半字节)
+        self.dat_pos = 0
+        self.stream_lba = None      # CMD18连续读取的下一个块
+        self.rx = None              # 写入接收状态
+
+    # ---- 寄存器 ----
+
+    def _cid(self):
+        cid = bytearray(b"\x53SCSIMSD\x10\x12\x34\x56\x78\x01\x9A")
+        cid.append((sdproto.crc7(cid) << 1) | 1)
+        return bytes(cid)
+
+    def _csd(self):
+        c_size = self.blocks // 1024 - 1  # 单位512KB
+        value = (1 << 126) | (0x0E << 112) | (0x32 << 96) | (0x5B5 << 84) | (9 << 80)
+        value |= (c_size << 48) | (1 << 46) | (0x7F << 39) | (9 << 22)
+        csd = bytearray(value.to_bytes(16, "big"))
+        csd[15] = (sdproto.crc7(csd[:15]) << 1) | 1
+        return bytes(csd)
+
+    def _status(self):
+        return (self.state << 9) | (1 << 8) | (int(self.app_cmd) << 5)
+
+    # ---- 应答与输出队列 ----
+
+    def _shortResponse(self, index, value):
+        head = bytes([index & 0x3F]) + value.to_bytes(4, "big")
+        return sdproto.toBits(head + bytes([(sdproto.crc7(head) << 1) | 1]))
+
+    def _longResponse(self, register):
+        return b"\x00\x00" + b"\x01" * 6 + sdproto.toBits(register)[:127] + b"\x01"
+
+    def _respond(self, bits):
+        """应答在NCR个时钟后开始，返回应答结束时距现在的时钟数"""
+        self.cmd_out = bytearray(b"\x01" * self.ncr) + bits
+        self.cmd_pos = 0
+        return self.ncr + len(bits)
+
+    def _scheduleDat(self, delay, nibbles):
+        self.dat_out = bytearray(b"\x0f" * delay) + nibbles
+        self.dat_pos = 0
+
+    def _blockNibbles(self, lba):
+        data = self.storage.read(lba * sdproto.SD_BLOCK_SIZE, sdproto.SD_BLOCK_SIZE)
+        return b"\x00" + sdproto.toNibbles(data) + sdproto.dataCrcNibbles(data) + b"\x0f"
+
+    def _busy(self, delay):
+        self._scheduleDat(delay, b"\x0e" * self.busy_clocks + b"\x0f")
+
+    def _advance(self, n):
+        """推进n个时钟，返回 (CMD输出位, DAT输出半字节)"""
+        while self.stream_lba is not None and len(self.dat_out) - self.dat_pos < n:
+            if self.stream_lba >= self.blocks:
+                self.stream_lba = None
+                break
+            self.dat_out += b"\x0f" * self.nac + self._blockNibbles(self.stream_lba)
+            self.stream_lba += 1
+        cmd = self.cmd_out[self.cmd_pos:self.cmd_pos + n]
+        dat = self.dat_out[self.dat_pos:self.dat_pos + n]
+        self.cmd_pos += len(cmd)
+        self.dat_pos += len(dat)
+        if self.cmd_pos >= len(self.cmd_out):
+            self.cmd_out, self.cmd_pos = bytearray(), 0
+        if self.dat_pos >= len(self.dat_out):
+            self.dat_out, self.dat_pos = bytearray(), 0
+        elif self.dat_pos > 0x10000:
+            del self.dat_out[:self.dat_pos]
+            self.dat_pos = 0
+        return cmd + b"\x01" * (n - len(cmd)), dat + b"\x0f" * (n - len(dat))
+
+    # ---- 命令 ----
+
+    def _command(self, bits):
+        frame = sdproto.fromBits(bits).to_bytes(6, "big")
+        if bits[1] != 1 or frame[5] != (sdproto.crc7(frame[:5]) << 1) | 1:
+            return  # CRC错误的命令不应答
+        index = frame[0] & 0x3F
+        arg = int.from_bytes(frame[1:5], "big")
+        app = self.app_cmd
+        self.app_cmd = False
+        self.commands.append(index)
+
+        if index == sdproto.CMD_GO_IDLE_STATE:
+            self.reset()
+        elif index == sdproto.CMD_SEND_IF_COND:
+            self._respond(self._shortResponse(index, arg & 0xFFF))
+        elif index == sdproto.CMD_APP_CMD:
+            self.app_cmd = True
+            self._respond(self._shortResponse(index, self._status()))
+        elif app and index == sdproto.ACMD_SD_SEND_OP_COND:
+            ocr = 0x00FF8000
+            if arg & 0x00FF8000:
+                self.init_count += 1
+                if self.init_count > self.init_polls:
+                    ocr |= sdproto.OCR_BUSY | (arg & sdproto.OCR_CCS)
+                    self.state = self.READY
+            self._respond(b"\x00\x00" + b"\x01" * 6 + sdproto.toBits(ocr.to_bytes(4, "big")) + b"\x01" * 8)
+        elif index == sdproto.CMD_ALL_SEND_CID and self.state == self.READY:
+            self.state = self.IDENT
+            self._respond(self._longResponse(self._cid()))
+        elif index == sdproto.CMD_SEND_RELATIVE_ADDR and self.state in (self.IDENT, self.STBY):
+            self.state = self.STBY
+            self.rca = 0x5343
+            self._respond(self._shortResponse(index, (self.rca << 16) | (self._status() & 0x1FFF)))
+        elif index == sdproto.CMD_SEND_CSD and self.state == self.STBY and arg >> 16 == self.rca:
+            self._respond(self._longResponse(self._csd()))
+        elif index == sdproto.CMD_SELECT_CARD:
+            if arg >> 16 == self.rca and self.rca:
+                status = self._status()
+                self.state = self.TRAN
+                self._busy(self._respond(self._shortResponse(index, status)))
+            else:
+                self.state = self.STBY
+        elif self.state not in (self.TRAN, self.DATA, self.RCV):
+            return  # 其余命令只在传输状态有效
+        elif app and index == sdproto.ACMD_SET_BUS_WIDTH:
+            self.bus_width = 4 if arg & 3 == 2 else 1
+            self._respond(self._shortResponse(index, self._status()))
+        elif index in (sdproto.CMD_SET_BLOCKLEN, sdproto.CMD_SEND_STATUS):
+            self._respond(self._shortResponse(index, self._status()))
+        elif index == sdproto.CMD_STOP_TRANSMISSION:
+            status = self._status()
+            self.stream_lba = None
+            self.rx = None
+            self.state = self.TRAN
+            self._busy(self._respond(self._shortResponse(index, status)))
+        elif index in (sdproto.CMD_READ_SINGLE_BLOCK, sdproto.CMD_READ_MULTIPLE_BLOCK):
+            if arg >= self.blocks:
+                self._respond(self._shortResponse(index, self._status() | (1 << 31)))
+                return
+            end = self._respond(self._shortResponse(index, self._status()))
+            self._scheduleDat(end + self.nac, self._blockNibbles(arg))
+            if index == sdproto.CMD_READ_MULTIPLE_BLOCK:
+                self.state = self.DATA
+                self.stream_lba = arg + 1
+        elif index in (sdproto.CMD_WRITE_BLOCK, sdproto.CMD_WRITE_MULTIPLE_BLOCK):
+            if arg >= self.blocks:
+                self._respond(self._shortResponse(index, self._status() | (1 << 31)))
+                return
+            self._respond(self._shortResponse(index, self._status()))
+            self.state = self.RCV
+            self.rx = {"lba": arg, "multi": index == sdproto.CMD_WRITE_MULTIPLE_BLOCK, "nibbles": None}
+
+    def _receive(self, nibbles):
+        """接收主机在DAT线上发送的写入数据"""
+        rx = self.rx
+        for nibble in nibbles:
+            if rx["nibbles"] is None:
+                if nibble == 0:
+                    rx["nibbles"] = bytearray()  # 起始位
+                continue
+            rx["nibbles"].append(nibble)
+            if len(rx["nibbles"]) < sdproto.SD_BLOCK_NIBBLES + sdproto.SD_CRC_NIBBLES:
+                continue
+            received = rx["nibbles"]
+            data = sdproto.fromNibbles(received[:sdproto.SD_BLOCK_NIBBLES])
+            if received[sdproto.SD_BLOCK_NIBBLES:] == sdproto.dataCrcNibbles(data):
+                token = b"\x0e\x0e\x0f\x0e\x0f"  # 起始位 + 010 + 结束位
+                self.storage.write(rx["lba"] * sdproto.SD_BLOCK_SIZE, data)
+            else:
+                token = b"\x0e\x0f\x0e\x0f\x0f"  # 起始位 + 101 + 结束位
+            # 主机结束位之后2个时钟送出CRC状态，随后DAT0保持忙
+            self._scheduleDat(3, token + b"\x0e" * self.busy_clocks + b"\x0f")
+            if rx["multi"] and rx["lba"] + 1 < self.blocks:
+                rx["lba"] += 1
+                rx["nibbles"] = None
+            else:
+                self.rx = None
+                self.state = self.TRAN
+                return
+
+    # ---- 总线访问 ----
+
+    def busWrite(self, high, internal, data):
+        words = len(data) // 2
+        if high & 0x40:  # CMD
+            bit = (data[0] >> 7) & 1
+            done = 0
+            while done < words:
+                if self.cmd_in is None:
+                    if bit:
+                        self._advance(words - done)
+                        return
+                    self.cmd_in = bytearray()
+                take = min(words - done, 48 - len(self.cmd_in))
+                self.cmd_in += bytes([bit]) * take
+                self._advance(take)
+                done += take
+                if len(self.cmd_in) == 48:
+                    bits, self.cmd_in = self.cmd_in, None
+                    self._command(bits)
+        elif not high & 0x08:  # DAT写
+            nibbles = bytes([data[0] >> 4]) + bytes([data[0] & 0x0F]) * (words - 1)
+            self._advance(words)
+            if self.rx is not None:
+                self._receive(nibbles)
+        else:
+            self._advance(words)  # 写DAT读窗口只产生时钟
+
+    def busRead(self, high, internal, nwords):
+        cmd, dat = self._advance(nwords)
+        out = bytearray(nwords * 2)
+        reg = self.read_buffer
+        if high & 0x40:  # CMD采样到D0
+            for k, bit in enumerate(cmd):
+                reg = (reg & 0xFFFE) | bit
+                struct.pack_into("<H", out, k * 2, reg)
+        elif high & 0x08:  # DAT采样到D11..D8后循环左移4位
+            for k, nibble in enumerate(dat):
+                reg = (reg & 0xF0FF) | (nibble << 8)
+                struct.pack_into("<H", out, k * 2, reg)
+                reg = ((reg << 4) | (reg >> 12)) & 0xFFFF
+        else:  # DAT写窗口的读取只采样不移位
+            for k, nibble in enumerate(dat):
+                reg = (reg & 0xF0FF) | (nibble << 8)
+                struct.pack_into("<H", out, k * 2, reg)
+        self.read_buffer = reg
+        return bytes(out)
+
+class SimulatedCart:
+    """
+    SuperChis卡带模型
+
+    每个命令帧对应一次GBA总线地址阶段加若干次连续访问：
+    地址阶段锁存内部16位地址和GP_16..GP_23，随后每次访问内部地址加1。
+    """
+
+    def __init__(self, flash_size=FLASH_SIZE, flash_image=None, flash_writable=False):
+        self.sdram = PagedMemory(SDRAM_SIZE, fill=0x00)
+        self.flash = PagedMemory(flash_size, fill=0xFF)
+        self.sram = bytearray(SRAM_BANK_SIZE * 2)
+        self.flash_writable = flash_writable  # 为True时Flash按普通存储器写入 (不模拟编程命令)
+        self.sd = None                        # SD卡接口 (可选)
+        self.faults = []                      # SDRAM读出故障注入 (StuckBitFault等)
+        if flash_image:
+            for offset in range(0, len(flash_image), PagedMemory.PAGE_SIZE):
+                self.flash.write(offset, flash_image[offset:offset + PagedMemory.PAGE_SIZE])
+        self.reset()
+
+    def reset(self):
+        """上电复位"""
+        self.config_map_reg = 0
+        self.config_sd_enable = 0
+        self.config_write_enable = 0
+        self.config_sram_bank = 0
+        self.config_bank_select = 0
+        self.magic_write_count = 0
+        self.sdram_ready = False  # SDRAM模式寄存器在第一次魔术值写入时设置
+
+    @property
+    def sram_a16(self):
+        return self.config_write_enable | self.config_sram_bank
+
+    def _target(self, high):
+        """根据当前配置判断访问目标: 'sd', 'sdram' 或 'flash'"""
+        if self.config_sd_enable and high & 0x80:
+            return "sd"
+        if self.config_map_reg:
+            return "sdram"
+        return "flash"
+
+    def _flashOffset(self, high, internal):
+        flash_high = ((high >> 5) + self.config_bank_select) & 0x1F
+        word = (flash_high << 21) | ((high & 0x1F) << 16) | internal
+        return word * 2
+
+    def _magicWrite(self, value):
+        """魔术地址写入，按superchis.vhd中的状态机推进"""
+        if value == MAGIC_VALUE:
+            self.sdram_ready = True
+        count = self.magic_write_count
+        if count == 0:
+            self.magic_write_count = 1 if value == MAGIC_VALUE else 0
+        elif count == 1:
+            self.magic_write_count = 2 if value == MAGIC_VALUE else 0
+        elif count == 2:
+            self.magic_write_count = 3
+        else:
+            self.config_map_reg = value & 1
+            self.config_sd_enable = (value >> 1) & 1
+            self.config_write_enable = (value >> 2) & 1
+            self.config_bank_select = (value >> 3) & 0x1F
+            self.magic_write_count = 0
+
+    def _storeRun(self, high, internal, data):
+        """向当前映射写入一段不含特殊地址的连续数据"""
+        target = self._target(high)
+        if target == "sdram":
+            if self.config_write_enable and self.sdram_ready:
+                self.sdram.write(((high << 16) | internal) * 2, data)
+        elif target == "flash":
+            if self.flash_writable:
+                self.flash.write(self._flashOffset(high, internal), data)
+        elif self.sd is not None:
+            self.sd.busWrite(high, internal, data)
+
+    def busWrite(self, word_addr, data):
+        """
+        一次地址阶段加连续写入
+
+        Args:
+            word_addr: 24位字地址
+            data: 写入数据 (小端16位字)
+        """
+        high = (word_addr >> 16) & 0xFF
+        internal = word_addr & 0xFFFF
+        if high != 0xFF and self._target(high) == "sd":
+            # SD接口在地址阶段锁存写入值，整帧交给SD卡模型，不能在特殊地址处分段
+            bank_write = high == 0x80 and internal == 0
+            if bank_write and self.config_write_enable == 0:
+                self.config_sram_bank = data[0] & 1
+            if not bank_write or len(data) > 2:
+                # 与VHDL一致，SRAM Bank地址写入不复位魔术序列，之后的字写入其他地址才复位
+                self.magic_write_count = 0
+            if self.sd is not None:
+                self.sd.busWrite(high, internal, data)
+            return
+        words = len(data) // 2
+        pos = 0
+        while pos < words:
+            # 在下一个特殊地址 (魔术地址/SRAM Bank地址) 或窗口回绕处分段
+            run = min(words - pos, WINDOW_WORDS - internal)
+            special = None
+            if high == 0xFF:
+                special = 0xFFFF
+            elif high == 0x80:
+                special = 0x0000
+            if special is not None and internal <= special < internal + run:
+                run = special - internal
+
+            if run:
+                self._storeRun(high, internal, data[pos * 2:(pos + run) * 2])
+                self.magic_write_count = 0
+                pos += run
+                internal = (internal + run) & 0xFFFF
+                continue
+
+            # 特殊地址上的单字写入
+            value = struct.unpack_from("<H", data, pos * 2)[0]
+            word = (high << 16) | internal
+            if word == MAGIC_ADDRESS_WORD:
+                self._magicWrite(value)
+            else:
+                # SRAM Bank地址写入不复位魔术序列 (与superchis.vhd一致)
+                if self.config_write_enable == 0:
+                    self.config_sram_bank = value & 1
+            if not (word == MAGIC_ADDRESS_WORD and self._target(high) == "sd"):
+                self._storeRun(high, internal, data[pos * 2:pos * 2 + 2])
+            pos += 1
+            internal = (internal + 1) & 0xFFFF
+
+    def busRead(self, word_addr, length):
+        """
+        一次地址阶段加连续读取
+
+        Args:
+            word_addr: 24位字地址
+            length: 读取字节数
+        """
+        high = (word_addr >> 16) & 0xFF
+        internal = word_addr & 0xFFFF
+        out = bytearray()
+        while len(out) < length:
+            run = min((length - len(out) + 1) // 2, WINDOW_WORDS - internal)
+            target = self._target(high)
+            if target == "sdram":
+                if self.sdram_ready:
+                    word = (high << 16) | internal
+                    data = self.sdram.read(word * 2, run * 2)
+                    if self.faults:
+                        data = bytearray(data)
+                        for fault in self.faults:
+                            fault.apply(word, data)
+                    out += data
+                else:
+                    out += b"\xff" * (run * 2)
+            elif target == "flash":
+                out += self.flash.read(self._flashOffset(high, internal), run * 2)
+            elif self.sd is not None:
+                out += self.sd.busRead(high, internal, run)
+            else:
+                out += b"\xff" * (run * 2)
+            internal = (internal + run) & 0xFFFF
+        return bytes(out[:length])
+
+    def ramWrite(self, addr, data):
+        """SRAM写入 (字节地址，64KB内回绕，A16由SRAM_A16决定)"""
+        base = self.sram_a16 * SRAM_BANK_SIZE
+        start = addr & 0xFFFF
+        if start + len(data) <= SRAM_BANK_SIZE:
+            self.sram[base + start:base + start + len(data)] = data
+            return
+        for i, value in enumerate(data):
+            self.sram[base + ((addr + i) & 0xFFFF)] = value
+
+    def ramRead(self, addr, length):
+        """SRAM读取"""
+        base = self.sram_a16 * SRAM_BANK_SIZE
+        start = addr & 0xFFFF
+        if start + length <= SRAM_BANK_SIZE:
+            return bytes(self.sram[base + start:base + start + length])
+        return bytes(self.sram[base + ((addr + i) & 0xFFFF)] for i in range(length))
+
+class SimulatedBurner:
+    """
+    模拟烧卡器串口
+
+    接口与serial.Serial兼容 (write/read/readinto/close/is_open/dtr)。
+    时间模型：
+    - 上行/下行各占一半的round trip延迟
+    - 帧数据按带宽串行传输
+    - 烧卡器逐帧执行，每帧有固定开销，外加每个总线字的访问时间
+    time_scale为0时不做任何等待，适合快速回归测试。
+    """
+
+    def __init__(self, cart=None, latency=0.001, bandwidth=1_000_000,
+                 frame_overhead=20e-6, word_time=0.25e-6, time_scale=1.0, timeout=5):
+        self.cart = cart if cart is not None else SimulatedCart()
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.frame_overhead = frame_overhead
+        self.word_time = word_time
+        self.time_scale = time_scale
+        self.timeout = timeout
+        self.port = "sim://superchis"
+        self.baudrate = 115200
+        self.is_open = False
+        self._dtr = False
+        self._reset_link()
+
+    def _reset_link(self):
+        self._inbuf = bytearray()
+        self._outq = deque()  # (就绪时间, bytes)
+        self._out_busy = 0.0
+        self._dev_busy = 0.0
+        self._in_busy = 0.0
+        self.frames = 0
+
+    def open(self):
+        self.is_open = True
+
+    def close(self):
+        self.is_open = False
+
+    @property
+    def dtr(self):
+        return self._dtr
+
+    @dtr.setter
+    def dtr(self, value):
+        # DTR切换会复位烧卡器，丢弃未完成的命令
+        if value and not self._dtr:
+            self._reset_link()
+        self._dtr = value
+
+    def _now(self):
+        return time.perf_counter()
+
+    def _transfer(self, nbytes):
+        if not self.bandwidth:
+            return 0.0
+        return nbytes / self.bandwidth * self.time_scale
+
+    def write(self, data):
+        data = bytes(data)
+        now = self._now()
+        half = self.latency / 2 * self.time_scale
+        self._out_busy = max(now, self._out_busy) + self._transfer(len(data))
+        arrive = self._out_busy + half
+        self._inbuf += data
+
+        while len(self._inbuf) >= 2:
+            frame_len = struct.unpack_from("<H", self._inbuf)[0]
+            if len(self._inbuf) < frame_len:
+                break
+            frame = bytes(self._inbuf[:frame_len])
+            del self._inbuf[:frame_len]
+            response, words = self._execute(frame)
+            self.frames += 1
+            self._dev_busy = max(arrive, self._dev_busy) + \
+                (self.frame_overhead + words * self.word_time) * self.time_scale
+            if response:
+                self._in_busy = max(self._dev_busy, self._in_busy) + self._transfer(len(response))
+                self._outq.append((self._in_busy + half, response))
+        return len(data)
+
+    def _execute(self, frame):
+        """执行一帧命令，返回 (应答, 总线访问字数)"""
+        if len(frame) < 9:
+            return b"", 0
+        opcode = frame[2]
+        addr = struct.unpack_from("<I", frame, 3)[0]
+        cart = self.cart
+        if opcode == 0xF5:
+            data = frame[7:-2]
+            cart.busWrite(addr, data)
+            return ACK, len(data) // 2
+        if opcode == 0xF6:
+            length = struct.unpack_from("<H", frame, 7)[0]
+            return STATUS + cart.busRead(addr >> 1, length), (length + 1) // 2
+        if opcode == 0xF7:
+            data = frame[7:-2]
+            cart.ramWrite(addr, data)
+            return ACK, len(data)
+        if opcode == 0xF8:
+            length = struct.unpack_from("<H", frame, 7)[0]
+            return STATUS + cart.ramRead(addr, length), length
+        return b"", 0
+
+    @property
+    def in_waiting(self):
+        now = self._now()
+        return sum(len(data) for ready, data in self._outq if ready <= now)
+
+    def _wait(self, ready):
+        """等待到指定时间，短等待用忙等避免sleep的调度粒度"""
+        remaining = ready - self._now()
+        if remaining > 0.0005:
+            time.sleep(remaining - 0.0002)
+        while self._now() < ready:
+            pass
+
+    def _take(self, size):
+        """按就绪时间等待并取出最多size字节"""
+        deadline = None if self.timeout is None else self._now() + self.timeout
+        out = bytearray()
+        while len(out) < size and self._outq:
+            ready, data = self._outq[0]
+            now = self._now()
+            if ready > now:
+                if deadline is not None and ready > deadline:
+                    time.sleep(max(0.0, deadline - now))
+                    break
+                self._wait(ready)
+            need = size - len(out)
+            if len(data) <= need:
+                out += data
+                self._outq.popleft()
+            else:
+                out += data[:need]
+                self._outq[0] = (ready, data[need:])
+        if len(out) < size and not self._outq and self.timeout:
+            # 没有更多应答，模拟串口超时
+            time.sleep(self.timeout * self.time_scale)
+        return out
+
+    def read(self, size=1):
+        return bytes(self._take(size))
+
+    def readinto(self, buffer):
+        view = memoryview(buffer).cast("B")
+        data = self._take(len(view))
+        view[:len(data)] = data
+        return len(data)
+
+    def reset_input_buffer(self):
+        self._outq.clear()
+
+    def reset_output_buffer(self):
+        self._inbuf.clear()
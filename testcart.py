@@ -1,12 +1,26 @@
 
+import argparse
+import contextlib
+import json
+import multiprocessing
 import struct
+import threading
 import serial
 import random
 import time
 import math
+import zlib
+import mmap
+import os
+from collections import deque
 
 import serial.tools.list_ports
 
+try:
+    import numpy as np
+except ImportError:  # 没有NumPy时LCG序列退回逐个计算
+    np = None
+
 # 设备配置
 deviceSize = 32*1024**2  # 32MB
 
@@ -18,6 +32,530 @@ MAGIC_VALUE = 0xA55A        # 魔术解锁值
 CONFIG_MAP_DDR = 0x01       # Bit 0: 内存映射控制 (0=Flash, 1=DDR)
 CONFIG_SD_ENABLE = 0x02     # Bit 1: SD卡接口使能
 CONFIG_WRITE_ENABLE = 0x04  # Bit 2: 写使能控制
+CONFIG_BANK_SHIFT = 3       # Bit 7..3: Flash Bank选择 (config_bank_select)
+CONFIG_BANK_COUNT = 32
+
+# Flash Bank映射: FLASH_HIGH = GP_23..GP_21 + config_bank_select，单位4MB
+FLASH_BANK_BYTES = 4 * 1024**2                          # FLASH_HIGH每单位的字节数
+FLASH_WINDOW_BANKS = 8                                  # GBA ROM窗口 (32MB) 覆盖的单位数
+FLASH_MAX_BYTES = CONFIG_BANK_COUNT * FLASH_BANK_BYTES  # FLASH_HIGH为5位，最多寻址128MB
+
+# SRAM存档
+SRAM_BANK_BYTES = 64 * 1024     # 每个SRAM Bank 64KB (0xF7/0xF8地址在64KB内)
+SRAM_BANKS = 2                  # SRAM_A16 = config_write_enable or config_sram_bank
+SRAM_FRAME_BYTES = 32 * 1024    # SRAM读写的最大帧长度
+SRAM_BANK_ADDRESS = 0x01000000  # Bank切换地址 (GBA字节地址0x09000000，写使能关闭时写入D0)
+
+# 就绪检测
+HEADER_ADDR = 0xA0              # 用于区分Flash/SDRAM映射的ROM头地址 (游戏标题)
+HEADER_LENGTH = 10
+READY_TIMEOUT = 0.5             # 轮询就绪的超时 (秒)
+WRITE_SETTLE = 0.001            # 单字写入后轮询读回的时限 (秒)
+MODE_SETTLE = 0.01              # 诊断测试中切换写使能后的等待 (秒)，写使能无法读回确认
+SDRAM_RETENTION_WAIT = 0.6      # verifySDRAM写入后、读回前的保持时间 (秒)
+
+# 测试模式缓存
+PATTERN_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".patterncache")
+PATTERN_CACHE_VERSION = 1
+PATTERN_CACHE_MIN = 256 * 1024   # 小于该长度的模式直接在内存中生成
+PATTERN_CHUNK_SIZE = 1024 * 1024 # 流式生成的块大小 (必须是256和4的倍数)
+
+# 命令流水线配置
+PIPELINE_DEPTH = 16             # 同时在途的命令帧数量
+PIPELINE_MAX_BYTES = 128 * 1024 # 在途应答的最大字节数 (避免主机接收缓冲区溢出)
+RESYNC_DRAIN = 0.1              # 应答流失步后等待迟到应答到达的时间 (秒)
+
+FRAME_TRAILER = b"\x00\x00"  # 命令帧结尾的2个0字节
+ZERO_COPY_MIN = 512            # 写入数据不少于该长度时分段发送，不复制到帧缓冲区
+
+# ROM映像上传
+UPLOAD_PREFETCH_BYTES = 4 * 1024 * 1024  # 预读线程领先发送位置的最大字节数
+UPLOAD_PREFETCH_STEP = 256 * 1024        # 预读线程每次预读的字节数
+
+# 增量上传
+MANIFEST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".manifests")
+MANIFEST_VERSION = 1
+MANIFEST_BLOCK_SIZE = 4096      # 清单中每个哈希覆盖的字节数
+MANIFEST_SAMPLE_BLOCKS = 64     # 抽样检查时读回的块数
+
+# 长时间测试的断点
+CHECKPOINT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".checkpoints")
+CHECKPOINT_VERSION = 2
+CHECKPOINT_SEGMENT = 4 * 1024 * 1024  # 批量测试每完成该长度保存一次断点 (128KB窗口和校验块的整数倍)
+CHECKPOINT_MAX_ERRORS = 4096          # 断点中保存的差异字数量上限
+
+# 批量传输配置
+BUS_WINDOW_BYTES = 0x20000      # 内部地址计数器为16位，一帧连续访问不能跨越128KB窗口
+SDRAM_ROW_BYTES = 1024          # SDRAM行: 列地址为internal_address(8..0)，512字
+SDRAM_BANK_BYTES = 8 * 1024**2  # SDRAM Bank: GP_23..GP_22选择，每个8MB
+BULK_CHUNK_SIZES = (1024, 2048, 4096, 8192, 16384, 32768)  # 候选帧大小 (读长度字段为16位)
+BULK_ROUND_BYTES = 128 * 1024   # 每轮测量吞吐量的传输量
+BULK_REPROBE_BYTES = 16 * 1024 * 1024  # 使用选定帧大小传输该数据量后重新探测相邻帧大小
+
+# 流式校验配置
+VERIFY_BLOCK_SIZE = 4096        # CRC32校验块大小
+VERIFY_MAX_DETAIL = 10          # 最多打印的失败块数量
+VERIFY_DETAIL_WORDS = 8         # 每个失败块最多打印的差异字数量
+VERIFY_MAX_MISMATCHES = 1 << 20 # 最多记录的差异字数量
+
+# 命令统计
+OPCODE_NAMES = {0xf5: "writeRom", 0xf6: "readRom", 0xf7: "writeRam", 0xf8: "readRam"}
+
+class PipelineError(IOError):
+    """流水线中某一帧的应答超时或不完整"""
+
+    def __init__(self, index, opcode, addr, expected, received):
+        self.index = index
+        self.opcode = opcode
+        self.addr = addr
+        self.expected = expected
+        self.received = received
+        super().__init__(f"第 {index} 帧 (命令 0x{opcode:02X}, 地址 0x{addr:08X}) 应答失败: "
+                         f"期望 {expected} 字节, 收到 {received} 字节")
+
+class PendingFrame:
+    """已发送、等待应答的命令帧"""
+
+    def __init__(self, pipeline, index, opcode, addr, response_len, status_len, into=None, payload_len=None):
+        self.pipeline = pipeline
+        self.index = index
+        self.opcode = opcode
+        self.addr = addr
+        self.response_len = response_len
+        self.status_len = status_len
+        self.into = into
+        self.payload_len = payload_len
+        self.response = None
+        self.frame_len = 0
+        self.sent_time = 0.0
+
+    @property
+    def done(self):
+        return self.response is not None
+
+    def result(self):
+        """等待应答到达并返回数据 (读命令跳过状态字节；指定了into时返回into)"""
+        if self.response is None:
+            self.pipeline.waitFor(self)
+        if self.into is not None:
+            return self.into
+        return self.response[self.status_len:]
+
+class CommandStats:
+    """
+    命令统计
+    
+    按命令码记录帧数、帧大小分布、往返延迟分布和吞吐量，并记录模式切换和等待的耗时，
+    用于判断时间花在USB延迟、Python开销还是刻意的等待上。
+    
+    往返延迟从帧发出到应答收齐，包含在途帧排队的时间；占用时间从帧成为最早的在途帧
+    (前一帧应答收齐或本帧发出) 算起，各帧占用时间之和即等待链路的总时间。
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """清空所有统计"""
+        self.start_time = time.perf_counter()
+        self.opcodes = {}
+        self.timers = {}
+
+    def record(self, opcode, frame_len, payload_len, sent_time, start_time, done_time):
+        """记录一帧命令的完成"""
+        entry = self.opcodes.get(opcode)
+        if entry is None:
+            entry = self.opcodes[opcode] = {
+                "frames": 0, "frame_bytes": 0, "payload_bytes": 0,
+                "rtt_total": 0.0, "rtt_min": None, "rtt_max": 0.0, "busy_time": 0.0,
+                "frame_hist": {}, "rtt_hist": {},
+            }
+        rtt = done_time - sent_time
+        entry["frames"] += 1
+        entry["frame_bytes"] += frame_len
+        entry["payload_bytes"] += payload_len
+        entry["rtt_total"] += rtt
+        entry["rtt_max"] = max(entry["rtt_max"], rtt)
+        entry["rtt_min"] = rtt if entry["rtt_min"] is None else min(entry["rtt_min"], rtt)
+        entry["busy_time"] += done_time - start_time
+        # 按2的幂分桶：帧大小以字节计，延迟以微秒计
+        bucket = frame_len.bit_length()
+        entry["frame_hist"][bucket] = entry["frame_hist"].get(bucket, 0) + 1
+        bucket = int(rtt * 1e6).bit_length()
+        entry["rtt_hist"][bucket] = entry["rtt_hist"].get(bucket, 0) + 1
+
+    def addTime(self, name, seconds):
+        """记录一次命名操作的耗时"""
+        timer = self.timers.setdefault(name, {"count": 0, "time": 0.0})
+        timer["count"] += 1
+        timer["time"] += seconds
+
+    @contextlib.contextmanager
+    def timed(self, name):
+        """统计with块的耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.addTime(name, time.perf_counter() - start)
+
+    def summary(self):
+        """
+        返回可JSON序列化的统计汇总
+        
+        直方图的键为桶的上界 (不含；帧大小: 字节，延迟: 微秒)，值为帧数。
+        """
+        elapsed = time.perf_counter() - self.start_time
+        opcodes = {}
+        busy = 0.0
+        for opcode, entry in sorted(self.opcodes.items()):
+            busy += entry["busy_time"]
+            opcodes[f"0x{opcode:02X}"] = {
+                "name": OPCODE_NAMES.get(opcode, "?"),
+                "frames": entry["frames"],
+                "frame_bytes": entry["frame_bytes"],
+                "payload_bytes": entry["payload_bytes"],
+                "avg_frame_bytes": entry["frame_bytes"] / entry["frames"],
+                "rtt_avg": entry["rtt_total"] / entry["frames"],
+                "rtt_min": entry["rtt_min"],
+                "rtt_max": entry["rtt_max"],
+                "busy_time": entry["busy_time"],
+                "bytes_per_second": entry["payload_bytes"] / entry["busy_time"] if entry["busy_time"] else None,
+                "frame_hist": {str(1 << b): n for b, n in sorted(entry["frame_hist"].items())},
+                "rtt_hist_us": {str(1 << b): n for b, n in sorted(entry["rtt_hist"].items())},
+            }
+        timers = {name: dict(timer) for name, timer in sorted(self.timers.items())}
+        sleep_time = self.timers.get("sleep", {}).get("time", 0.0)
+        return {
+            "elapsed": elapsed,
+            "link_busy_time": busy,
+            "sleep_time": sleep_time,
+            "other_time": max(0.0, elapsed - busy - sleep_time),  # 主机侧处理 (Python开销等)
+            "opcodes": opcodes,
+            "timers": timers,
+        }
+
+    def dump(self, path):
+        """把统计汇总写入JSON文件"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+
+    def printSummary(self):
+        """打印统计汇总表"""
+        summary = self.summary()
+        print(f"\n=== 命令统计 (总用时 {summary['elapsed']:.2f}秒) ===")
+        print(f"{'命令':<12}{'帧数':>10}{'平均帧长':>10}{'平均延迟':>12}{'最大延迟':>12}{'吞吐量':>14}")
+        for opcode, entry in summary["opcodes"].items():
+            rate = entry["bytes_per_second"]
+            rate_text = f"{rate / 1024:.1f}KB/s" if rate else "-"
+            print(f"{opcode} {entry['name']:<7}{entry['frames']:>10}{entry['avg_frame_bytes']:>10.0f}"
+                  f"{entry['rtt_avg'] * 1000:>10.3f}ms{entry['rtt_max'] * 1000:>10.3f}ms{rate_text:>14}")
+        for name, timer in summary["timers"].items():
+            print(f"{name}: {timer['count']} 次, {timer['time']:.3f}秒")
+        print(f"等待链路: {summary['link_busy_time']:.3f}秒, 等待 (sleep): {summary['sleep_time']:.3f}秒, "
+              f"其他: {summary['other_time']:.3f}秒")
+
+commandStats = CommandStats()
+
+def pause(seconds):
+    """等待指定时间，计入命令统计的sleep耗时"""
+    start = time.perf_counter()
+    time.sleep(seconds)
+    commandStats.addTime("sleep", time.perf_counter() - start)
+
+class CommandPipeline:
+    """
+    命令流水线
+    
+    最多保持depth个命令帧在途，不必每帧等待应答再发送下一帧。
+    烧卡器按顺序执行并应答，因此应答按发送顺序逐一匹配。
+    """
+
+    def __init__(self, port, depth=PIPELINE_DEPTH, max_bytes=PIPELINE_MAX_BYTES, stats=None, on_error=None):
+        self.port = port
+        self.depth = max(1, depth)
+        self.max_bytes = max_bytes
+        self.stats = stats
+        self.on_error = on_error  # 串口出错或应答失步时调用
+        self.pending = deque()
+        self.pending_bytes = 0
+        self.sent = 0
+        self.last_done = 0.0
+
+    def submit(self, frame, opcode, addr, response_len, status_len=0, into=None, payload_len=None):
+        """
+        发送一帧命令，必要时先收取最早的应答以限制在途数量
+        
+        Args:
+            frame: 完整的命令帧，或依次发送的多段数据 (tuple，大块数据不复制)
+            opcode: 命令码 (0xF5~0xF8)
+            addr: 帧中的地址 (用于错误报告)
+            response_len: 应答字节数
+            status_len: 应答开头的状态字节数
+            into: 接收应答数据的可写缓冲区 (不含状态字节)，数据直接readinto到其中
+            payload_len: 命令统计中计入的数据字节数，默认由帧和应答长度推算 (读写混合的合并帧需要指定)
+            
+        Returns:
+            PendingFrame
+        """
+        while self.pending and (len(self.pending) >= self.depth or
+                                self.pending_bytes + response_len > self.max_bytes):
+            self._receive()
+
+        pending = PendingFrame(self, self.sent, opcode, addr, response_len, status_len, into, payload_len)
+        self.sent += 1
+        pending.sent_time = time.perf_counter()
+        try:
+            if isinstance(frame, tuple):
+                for part in frame:
+                    self.port.write(part)
+                    pending.frame_len += len(part)
+            else:
+                self.port.write(frame)
+                pending.frame_len = len(frame)
+        except OSError:
+            self._failed()
+            raise
+        self.pending.append(pending)
+        self.pending_bytes += response_len
+        return pending
+
+    def _readinto(self, view):
+        """读满view，超时返回实际读到的字节数"""
+        filled = 0
+        while filled < len(view):
+            n = self.port.readinto(view[filled:])
+            if not n:
+                break
+            filled += n
+        return filled
+
+    def _receive(self):
+        """收取最早一帧的应答"""
+        pending = self.pending.popleft()
+        self.pending_bytes -= pending.response_len
+        try:
+            if pending.into is None:
+                response = self.port.read(pending.response_len)
+                received = len(response)
+            else:
+                response = self.port.read(pending.status_len)
+                received = len(response)
+                if received == pending.status_len:
+                    received += self._readinto(pending.into)
+        except OSError:
+            self._failed()
+            raise
+        if received != pending.response_len:
+            self._failed()
+            raise PipelineError(pending.index, pending.opcode, pending.addr,
+                                pending.response_len, received)
+        pending.response = response
+        if self.stats is not None:
+            done = time.perf_counter()
+            if pending.payload_len is not None:
+                payload = pending.payload_len
+            elif pending.status_len:
+                payload = pending.response_len - pending.status_len
+            else:
+                payload = pending.frame_len - 9 * pending.response_len  # 合并发送的写帧每帧一个应答字节
+            self.stats.record(pending.opcode, pending.frame_len, payload, pending.sent_time,
+                              max(pending.sent_time, self.last_done), done)
+            self.last_done = done
+
+    def _failed(self):
+        """串口出错或应答流失步：丢弃在途帧 (它们的应答无法再匹配) 并通知所有者"""
+        self.pending.clear()
+        self.pending_bytes = 0
+        if self.on_error is not None:
+            self.on_error()
+
+    def waitFor(self, pending):
+        """收取应答直到指定帧完成"""
+        while not pending.done:
+            if not self.pending:
+                raise PipelineError(pending.index, pending.opcode, pending.addr,
+                                    pending.response_len, 0)
+            self._receive()
+
+    def flush(self):
+        """等待所有在途帧完成"""
+        while self.pending:
+            self._receive()
+
+class SuperChisCart:
+    """
+    SuperChis卡带客户端
+    
+    拥有烧卡器串口和命令流水线。命令帧在复用的缓冲区中用pack_into构造，
+    大块写入数据以memoryview分段发送，读应答可直接readinto到调用者提供的缓冲区，
+    单字读写的热循环中不再为每次调用分配和复制数据。
+    """
+
+    def __init__(self, port, depth=PIPELINE_DEPTH, max_bytes=PIPELINE_MAX_BYTES, stats=None):
+        self.port = port
+        self.pipeline = CommandPipeline(port, depth, max_bytes, stats, on_error=self._forgetState)
+        self._word_frame = bytearray(11)      # 单字ROM写入帧
+        self._byte_frame = bytearray(10)      # 单字节RAM写入帧
+        self._read_frame = bytearray(11)      # 读命令帧
+        self._header = bytearray(7)           # 分段发送时的帧头
+        self._small_frame = bytearray(7 + ZERO_COPY_MIN + 2)
+        self._small_view = memoryview(self._small_frame)
+        # 配置寄存器无法读回：记录的是最近一次得到应答的写入，链路出错后为None (未知)
+        self.mode = None                      # 最近一次解锁序列写入的配置值
+        self.sram_bank = None                 # 最近一次选择的SRAM Bank
+        self.burner_id = None                 # 烧卡器标识，第一次用到时查询 (burnerId)
+        self.manifests = {}                   # 已读取的卡带清单 {cart_id: CartManifest} (cartManifest)
+
+    def _forgetState(self):
+        """链路出错后卡带可能已被复位或断电，记录的配置和SRAM Bank不再可信"""
+        self.mode = None
+        self.sram_bank = None
+
+    def _writeFrame(self, opcode, addr, dat):
+        """构造并提交写命令帧 (dat为bytes类数据)"""
+        length = len(dat)
+        if length >= ZERO_COPY_MIN:
+            # 大块数据 (如memoryview切片) 直接交给串口，不拼接复制
+            struct.pack_into("<HBI", self._header, 0, 2 + 1 + 4 + length + 2, opcode, addr)
+            return self.pipeline.submit((self._header, dat, FRAME_TRAILER), opcode, addr, 1)
+        frame = self._small_frame
+        struct.pack_into("<HBI", frame, 0, 2 + 1 + 4 + length + 2, opcode, addr)
+        frame[7:7 + length] = dat
+        frame[7 + length:9 + length] = FRAME_TRAILER
+        return self.pipeline.submit(self._small_view[:9 + length], opcode, addr, 1)
+
+    def _readFrame(self, opcode, addr, frame_addr, length_byte, into):
+        """构造并提交读命令帧"""
+        struct.pack_into("<HBIH2x", self._read_frame, 0, 11, opcode, frame_addr, length_byte)
+        if into is not None:
+            into = memoryview(into).cast("B")[:length_byte]
+        return self.pipeline.submit(self._read_frame, opcode, addr, length_byte + 2, 2, into)  # 跳过前2字节状态
+
+    def writeRom(self, addr_word, dat):
+        """
+        向ROM地址写入数据
+        
+        Args:
+            addr_word: 字地址 (16位字)
+            dat: 要写入的数据 (可以是int或bytes类数据)
+            
+        Returns:
+            PendingFrame，写命令进入流水线后立即返回，result()为应答字节
+        """
+        if isinstance(dat, int):
+            struct.pack_into("<HBIH2x", self._word_frame, 0, 11, 0xf5, addr_word, dat)
+            return self.pipeline.submit(self._word_frame, 0xf5, addr_word, 1)
+        return self._writeFrame(0xf5, addr_word, dat)
+
+    def writeRomBurst(self, writes):
+        """
+        把多个单字ROM写入帧合并为一次串口写入发送
+        
+        Args:
+            writes: [(字地址, 值)]
+            
+        Returns:
+            PendingFrame，result()为所有帧的应答字节
+        """
+        frame = bytearray(11 * len(writes))
+        for i, (addr_word, value) in enumerate(writes):
+            struct.pack_into("<HBIH2x", frame, i * 11, 11, 0xf5, addr_word, value)
+        return self.pipeline.submit(frame, 0xf5, writes[0][0], len(writes))
+
+    def readRomAsync(self, addr_word, length_byte, into=None):
+        """
+        提交ROM读命令但不等待应答
+        
+        Args:
+            addr_word: 字地址 (16位字)
+            length_byte: 要读取的字节数
+            into: 接收数据的可写缓冲区，默认返回新的bytes
+            
+        Returns:
+            PendingFrame，result()返回读取到的数据
+        """
+        return self._readFrame(0xf6, addr_word, addr_word << 1, length_byte, into)  # 转换为字节地址
+
+    def readRom(self, addr_word, length_byte, into=None):
+        """从ROM地址读取数据，参数同readRomAsync"""
+        return self.readRomAsync(addr_word, length_byte, into).result()
+
+    def writeRam(self, addr, dat):
+        """
+        向RAM地址写入数据
+        
+        Args:
+            addr: 字节地址
+            dat: 要写入的数据 (可以是int或bytes类数据)
+            
+        Returns:
+            PendingFrame，写命令进入流水线后立即返回，result()为应答字节
+        """
+        if isinstance(dat, int):
+            struct.pack_into("<HBIB2x", self._byte_frame, 0, 10, 0xf7, addr, dat)
+            return self.pipeline.submit(self._byte_frame, 0xf7, addr, 1)
+        return self._writeFrame(0xf7, addr, dat)
+
+    def readRamAsync(self, addr, length_byte, into=None):
+        """
+        提交RAM读命令但不等待应答
+        
+        Args:
+            addr: 字节地址
+            length_byte: 要读取的字节数
+            into: 接收数据的可写缓冲区，默认返回新的bytes
+            
+        Returns:
+            PendingFrame，result()返回读取到的数据
+        """
+        return self._readFrame(0xf8, addr, addr, length_byte, into)
+
+    def readRam(self, addr, length_byte, into=None):
+        """从RAM地址读取数据，参数同readRamAsync"""
+        return self.readRamAsync(addr, length_byte, into).result()
+
+    def flush(self):
+        """等待所有在途命令完成"""
+        self.pipeline.flush()
+
+    def resync(self, drain=RESYNC_DRAIN):
+        """
+        应答流失步后重新同步
+
+        丢弃在途帧，等待drain秒让迟到的应答到达后清空输入缓冲区，再发送一个2字节的读命令探测：
+        应答完整且之后没有多余的字节时认为应答流已对齐。
+
+        Returns:
+            对齐时为True
+        """
+        self.pipeline.pending.clear()
+        self.pipeline.pending_bytes = 0
+        time.sleep(drain)
+        self.port.reset_input_buffer()
+        try:
+            self.readRom(0, 2)
+        except PipelineError:
+            return False
+        time.sleep(drain)
+        return not self.port.in_waiting
+
+_cart = None
+
+def getCart():
+    """返回绑定到当前烧卡器连接 (全局ser) 的卡带客户端"""
+    global _cart
+    if _cart is None or _cart.port is not ser:
+        _cart = SuperChisCart(ser, stats=commandStats)
+    return _cart
+
+def getPipeline():
+    """返回绑定到当前烧卡器连接的命令流水线"""
+    return getCart().pipeline
+
+def flushCommands():
+    """等待所有在途命令完成"""
+    getCart().flush()
 
 def writeRom(addr_word, dat):
     """
@@ -26,42 +564,39 @@ def writeRom(addr_word, dat):
     Args:
         addr_word: 字地址 (16位字)
         dat: 要写入的数据 (可以是int或bytes)
+        
+    Returns:
+        PendingFrame，写命令进入流水线后立即返回，result()为应答字节
     """
-    if isinstance(dat, int):
-        dat = struct.pack("<H", dat)
+    return getCart().writeRom(addr_word, dat)
 
-    cmd = []
-    cmd.extend(struct.pack("<H", 2 + 1 + 4 + len(dat) + 2))
-    cmd.append(0xf5)
-    cmd.extend(struct.pack("<I", addr_word))
-    cmd.extend(dat)
-    cmd.extend([0, 0])
-
-    ser.write(cmd)
-    ack = ser.read(1)
-    return ack
+def readRomAsync(addr_word, length_byte, into=None):
+    """
+    提交ROM读命令但不等待应答
+    
+    Args:
+        addr_word: 字地址 (16位字)
+        length_byte: 要读取的字节数
+        into: 接收数据的可写缓冲区，默认返回新的bytes
+        
+    Returns:
+        PendingFrame，result()返回读取到的数据
+    """
+    return getCart().readRomAsync(addr_word, length_byte, into)
 
-def readRom(addr_word, length_byte):
+def readRom(addr_word, length_byte, into=None):
     """
     从ROM地址读取数据
     
     Args:
         addr_word: 字地址 (16位字)
         length_byte: 要读取的字节数
+        into: 接收数据的可写缓冲区，默认返回新的bytes
         
     Returns:
-        读取到的数据 (bytes)
+        读取到的数据 (bytes，指定into时返回into)
     """
-    cmd = []
-    cmd.extend(struct.pack("<H", 2 + 1 + 4 + 2 + 2))
-    cmd.append(0xf6)
-    cmd.extend(struct.pack("<I", addr_word << 1))  # 转换为字节地址
-    cmd.extend(struct.pack("<H", length_byte))
-    cmd.extend([0, 0])
-
-    ser.write(cmd)
-    respon = ser.read(length_byte + 2)
-    return respon[2:]  # 跳过前2字节状态
+    return getCart().readRom(addr_word, length_byte, into)
 
 def writeRam(addr, dat):
     """
@@ -70,60 +605,438 @@ def writeRam(addr, dat):
     Args:
         addr: 字节地址
         dat: 要写入的数据
+        
+    Returns:
+        PendingFrame，写命令进入流水线后立即返回，result()为应答字节
     """
-    if isinstance(dat, int):
-        dat = struct.pack("B", dat)
+    return getCart().writeRam(addr, dat)
 
-    cmd = []
-    cmd.extend(struct.pack("<H", 2 + 1 + 4 + len(dat) + 2))
-    cmd.append(0xf7)
-    cmd.extend(struct.pack("<I", addr))
-    cmd.extend(dat)
-    cmd.extend([0, 0])
-
-    ser.write(cmd)
-    ack = ser.read(1)
-    return ack
+def readRamAsync(addr, length_byte, into=None):
+    """
+    提交RAM读命令但不等待应答
+    
+    Args:
+        addr: 字节地址
+        length_byte: 要读取的字节数
+        into: 接收数据的可写缓冲区，默认返回新的bytes
+        
+    Returns:
+        PendingFrame，result()返回读取到的数据
+    """
+    return getCart().readRamAsync(addr, length_byte, into)
 
-def readRam(addr, length_byte):
+def readRam(addr, length_byte, into=None):
     """
     从RAM地址读取数据
     
     Args:
         addr: 字节地址
         length_byte: 要读取的字节数
+        into: 接收数据的可写缓冲区，默认返回新的bytes
+        
+    Returns:
+        读取到的数据 (bytes，指定into时返回into)
+    """
+    return getCart().readRam(addr, length_byte, into)
+
+class ChunkTuner:
+    """
+    批量传输帧大小自适应调节
+    
+    启动时依次用每个候选帧大小传输一轮并测量吞吐量，之后固定使用最快的帧大小；
+    若吞吐量比选定时下降超过drop_ratio，或使用选定帧大小传输了reprobe_bytes，则重新探测
+    当前和相邻的帧大小。每次探测后只在刚测量的帧大小中选择，之前的测量结果作废，
+    因此链路状况变化后 (如其他设备占用USB带宽) 选择会逐步移动到新的最佳帧大小。
+    """
+
+    def __init__(self, sizes=BULK_CHUNK_SIZES, round_bytes=BULK_ROUND_BYTES,
+                 drop_ratio=0.75, alpha=0.3, reprobe_bytes=BULK_REPROBE_BYTES):
+        self.sizes = sorted(sizes)
+        self.round_bytes = round_bytes
+        self.drop_ratio = drop_ratio
+        self.alpha = alpha
+        self.reprobe_bytes = reprobe_bytes
+        self.rates = {}             # 帧大小 -> 吞吐量 (字节/秒，指数平均)，只含最近一次探测的帧大小
+        self.probe = list(self.sizes)
+        self.probed = {}            # 本次探测已测得的吞吐量
+        self.best = None
+        self.reference = 0.0        # 选定最佳帧大小时的吞吐量
+        self.since_probe = 0        # 选定后传输的字节数
+
+    def next(self):
+        """返回下一轮使用的帧大小"""
+        return self.probe[0] if self.probe else self.best
+
+    def record(self, size, nbytes, seconds):
+        """记录一轮传输的结果"""
+        if seconds <= 0:
+            return
+        rate = nbytes / seconds
+        if self.probe and self.probe[0] == size:
+            self.probed[size] = rate
+            self.probe.pop(0)
+            if not self.probe:
+                self.rates, self.probed = self.probed, {}
+                self.best = max(self.rates, key=self.rates.get)
+                self.reference = self.rates[self.best]
+                self.since_probe = 0
+            return
+
+        old = self.rates.get(size, rate)
+        self.rates[size] = old + self.alpha * (rate - old)
+        self.since_probe += nbytes
+        if size == self.best and (self.rates[size] < self.reference * self.drop_ratio or
+                                  self.since_probe >= self.reprobe_bytes):
+            # 吞吐量下降或距上次探测已久，重新探测相邻帧大小和当前帧大小
+            i = self.sizes.index(size)
+            self.probe = self.sizes[max(0, i - 1):i + 2]
+
+_chunk_tuners = {}
+
+def getChunkTuner(direction):
+    """返回当前连接上读或写方向 ('read'/'write') 的帧大小调节器"""
+    global _chunk_tuners
+    if _chunk_tuners.get("port") is not ser:
+        _chunk_tuners = {"port": ser, "read": ChunkTuner(), "write": ChunkTuner()}
+    return _chunk_tuners[direction]
+
+def _chunkLength(addr, size, remaining):
+    """
+    计算一帧的长度：不超过帧大小、剩余长度，且不跨越128KB窗口
+    
+    帧大小为1KB (SDRAM行) 的倍数时，帧的结尾对齐到帧大小的整数倍：起始地址未对齐时第一帧较短，
+    之后的帧都从行首开始，帧的划分与起始地址无关。128KB窗口是8MB Bank的约数，因此一帧也不会跨越Bank。
+    对齐并不减少SDRAM命令：superchis.vhd在每次总线访问开始时ACTIVATE，读写带自动预充电 (A10=1)，
+    不会在访问之间保持行打开，跨行本身没有额外代价 (可用 benchmark.py --layout 测量)。
+    """
+    limit = BUS_WINDOW_BYTES - addr % BUS_WINDOW_BYTES
+    if size % SDRAM_ROW_BYTES == 0:
+        limit = min(limit, size - addr % size)
+    return min(size, remaining, limit)
+
+def bulkWrite(start_addr, data, tuner=None, progress=None):
+    """
+    批量写入整个缓冲区，帧大小由吞吐量测量自动选择
+    
+    Args:
+        start_addr: 起始字节地址 (偶数)
+        data: 要写入的数据 (bytes/bytearray/memoryview)
+        tuner: ChunkTuner，默认使用当前连接写方向的调节器
+        progress: 进度回调 progress(已完成字节数, 总字节数)，返回True时中止传输
+    """
+    tuner = tuner or getChunkTuner("write")
+    view = memoryview(data).cast("B")
+    length = len(view)
+    offset = 0
+    while offset < length:
+        size = tuner.next()
+        round_start = offset
+        round_end = min(length, offset + max(size, tuner.round_bytes))
+        start_time = time.perf_counter()
+        while offset < round_end:
+            chunk = _chunkLength(start_addr + offset, size, round_end - offset)
+            writeRom((start_addr + offset) >> 1, view[offset:offset + chunk])
+            offset += chunk
+        flushCommands()
+        tuner.record(size, offset - round_start, time.perf_counter() - start_time)
+        if progress and progress(offset, length):
+            break
+
+def iterRead(start_addr, length, tuner=None, progress=None, into=None):
+    """
+    批量读取一段连续地址，按地址顺序逐段产出数据，不在内存中保留整段读回数据
+    
+    Args:
+        start_addr: 起始字节地址 (偶数)
+        length: 读取字节数
+        tuner: ChunkTuner，默认使用当前连接读方向的调节器
+        progress: 进度回调 progress(已完成字节数, 总字节数)，返回True时中止传输
+        into: 长度至少为length的可写缓冲区，应答直接读入其中，产出的数据为它的切片
+        
+    Yields:
+        (偏移, 数据)
+    """
+    tuner = tuner or getChunkTuner("read")
+    view = memoryview(into).cast("B") if into is not None else None
+    reads = deque()  # (偏移, PendingFrame)
+    
+    offset = 0
+    while offset < length:
+        size = tuner.next()
+        round_start = offset
+        round_end = min(length, offset + max(size, tuner.round_bytes))
+        start_time = time.perf_counter()
+        completed = []
+        while offset < round_end:
+            chunk = _chunkLength(start_addr + offset, size, round_end - offset)
+            target = view[offset:offset + chunk] if view is not None else None
+            reads.append((offset, readRomAsync((start_addr + offset) >> 1, chunk, target)))
+            offset += chunk
+            while reads and reads[0][1].done:
+                completed.append(reads.popleft())
+        completed.extend(reads)
+        reads.clear()
+        if completed:
+            completed[-1][1].pipeline.waitFor(completed[-1][1])  # 应答按顺序到达
+        tuner.record(size, offset - round_start, time.perf_counter() - start_time)
+        # 一轮结束后再交给调用者处理，避免处理时间计入吞吐量测量
+        for chunk_offset, pending in completed:
+            yield chunk_offset, pending.result()
+        if progress and progress(offset, length):
+            break
+
+def bulkRead(start_addr, length, tuner=None, progress=None):
+    """
+    批量读取一段连续地址，帧大小由吞吐量测量自动选择
+    
+    Args:
+        start_addr: 起始字节地址 (偶数)
+        length: 读取字节数
+        tuner: ChunkTuner，默认使用当前连接读方向的调节器
+        progress: 进度回调 progress(已完成字节数, 总字节数)，返回True时中止传输
+        
+    Returns:
+        读取到的数据 (bytearray)
+    """
+    out = bytearray(length)
+    for _ in iterRead(start_addr, length, tuner, progress, into=out):
+        pass
+    return out
+
+def findMismatchWords(expected, actual, block_size=4096):
+    """
+    返回两段数据中不相同的16位字的索引 (升序)
+    """
+    if np is not None:
+        exp = np.frombuffer(expected, dtype="<u2", count=len(expected) // 2)
+        act = np.frombuffer(actual, dtype="<u2", count=len(expected) // 2)
+        return np.flatnonzero(exp != act).tolist()
+    
+    mismatches = []
+    for offset in range(0, len(expected), block_size):
+        if expected[offset:offset + block_size] != actual[offset:offset + block_size]:
+            for word in range(offset // 2, min(offset + block_size, len(expected)) // 2):
+                if expected[word * 2:word * 2 + 2] != actual[word * 2:word * 2 + 2]:
+                    mismatches.append(word)
+    return mismatches
+
+class VerifyResult:
+    """流式校验结果"""
+
+    def __init__(self, start_addr, length, block_size):
+        self.start_addr = start_addr
+        self.length = length
+        self.block_size = block_size
+        self.bad_blocks = []   # 失败块的起始字节地址
+        self.mismatches = []   # 失败块中的 (字节地址, 期望值, 实际值)，最多max_mismatches个
+
+    @property
+    def ok(self):
+        return not self.bad_blocks
+
+def blockHashes(data, block_size=VERIFY_BLOCK_SIZE):
+    """计算数据每个块的CRC32"""
+    view = memoryview(data).cast("B")
+    return [zlib.crc32(view[offset:offset + block_size]) for offset in range(0, len(view), block_size)]
+
+def verifyStream(start_addr, length, expected_hashes, expected=None, block_size=VERIFY_BLOCK_SIZE,
+                 progress=None, max_mismatches=VERIFY_MAX_MISMATCHES):
+    """
+    流式读回并按块比较CRC32
+    
+    读回数据不做切片比较，只对每块累积CRC32并与预先计算的哈希比较；
+    只有CRC不匹配的块才逐字比较，得到具体的差异字。
+    
+    Args:
+        start_addr: 起始字节地址 (偶数)
+        length: 校验字节数
+        expected_hashes: 每块的期望CRC32 (blockHashes的结果)
+        expected: 期望数据，提供时为失败块生成逐字差异
+        block_size: 块大小
+        progress: 进度回调，同iterRead
+        max_mismatches: 最多记录的差异字数量
         
     Returns:
-        读取到的数据 (bytes)
+        VerifyResult
+    """
+    result = VerifyResult(start_addr, length, block_size)
+    block = 0
+    crc = 0
+    pieces = []
+    filled = 0
+    
+    for offset, data in iterRead(start_addr, length, progress=progress):
+        view = memoryview(data)
+        pos = 0
+        while pos < len(view):
+            take = min(block_size - filled, len(view) - pos)
+            piece = view[pos:pos + take]
+            crc = zlib.crc32(piece, crc)
+            pieces.append(piece)
+            filled += take
+            pos += take
+            block_offset = block * block_size
+            if filled == block_size or block_offset + filled == length:
+                if crc != expected_hashes[block]:
+                    result.bad_blocks.append(start_addr + block_offset)
+                    if expected is not None and len(result.mismatches) < max_mismatches:
+                        actual = b"".join(pieces)
+                        want = expected[block_offset:block_offset + len(actual)]
+                        for word in findMismatchWords(want, actual):
+                            if len(result.mismatches) >= max_mismatches:
+                                break
+                            result.mismatches.append((
+                                start_addr + block_offset + word * 2,
+                                struct.unpack_from("<H", want, word * 2)[0],
+                                struct.unpack_from("<H", actual, word * 2)[0]))
+                block += 1
+                crc = 0
+                pieces = []
+                filled = 0
+    return result
+
+def printVerifyResult(result, max_blocks=VERIFY_MAX_DETAIL, max_words=VERIFY_DETAIL_WORDS):
+    """打印校验失败的块，输出量有上限"""
+    by_block = {}
+    for addr, expected, actual in result.mismatches:
+        block_addr = result.start_addr + (addr - result.start_addr) // result.block_size * result.block_size
+        by_block.setdefault(block_addr, []).append((addr, expected, actual))
+    
+    for block_addr in result.bad_blocks[:max_blocks]:
+        words = by_block.get(block_addr, [])
+        print(f"地址 0x{block_addr:08X} 校验失败: {len(words) or '?'} 个字不同")
+        for addr, expected, actual in words[:max_words]:
+            print(f"  0x{addr:08X}: 期望 0x{expected:04X}, 实际 0x{actual:04X}, XOR 0x{expected ^ actual:04X}")
+        if len(words) > max_words:
+            print(f"  ... 另有 {len(words) - max_words} 个字不同")
+    if len(result.bad_blocks) > max_blocks:
+        print(f"... 另有 {len(result.bad_blocks) - max_blocks} 个块校验失败")
+
+def diagnoseMismatches(mismatches, start_addr=0, expected=None, pairs=None, retention=None):
     """
-    cmd = []
-    cmd.extend(struct.pack("<H", 2 + 1 + 4 + 2 + 2))
-    cmd.append(0xf8)
-    cmd.extend(struct.pack("<I", addr))
-    cmd.extend(struct.pack("<H", length_byte))
-    cmd.extend([0, 0])
+    对一次测试的全部差异字做批量故障定位 (数据位固定、地址线混叠、Bank/行/列故障、刷新衰减) 并打印结论
+
+    Args:
+        mismatches: (字节地址, 期望值, 实际值) 的列表，或 (地址数组, 期望值数组, 实际值数组)
+        start_addr: expected的起始字节地址
+        expected: 连续写入的测试数据
+        pairs: 离散写入的 (字节地址, 值)，与expected二选一
+        retention: 写入到读回之间的保持时间 (秒)
 
-    ser.write(cmd)
-    respon = ser.read(length_byte + 2)
-    return respon[2:]  # 跳过前2字节状态
+    Returns:
+        memdiag.analyzeMismatches的结果，没有NumPy时为None
+    """
+    if np is None:
+        print("未安装NumPy，跳过故障定位")
+        return None
+    import memdiag
+    image = None
+    if expected is not None:
+        image = memdiag.ExpectedImage.fromBytes(start_addr, expected)
+    elif pairs is not None:
+        image = memdiag.ExpectedImage.fromPairs(pairs)
+    diagnosis = memdiag.analyzeMismatches(mismatches, image, retention)
+    memdiag.printDiagnosis(diagnosis)
+    return diagnosis
 
-def set_sc_mode(sdram, sd_enable, write_enable):
+def set_sc_mode(sdram, sd_enable, write_enable, bank=0, force=False, settle=0):
     """
     执行SuperChis解锁序列
     
     解锁序列：
     1. 向魔术地址 0x00FFFFFF 写入两次 0xA55A
-    2. 向魔术地址 0x00FFFFFF 写入两次配置值 (sdram | (sd_enable << 1) | (write_enable << 2))
+    2. 向魔术地址 0x00FFFFFF 写入两次配置值 (sdram | (sd_enable << 1) | (write_enable << 2) | (bank << 3))
+    
+    卡带客户端记录最近一次得到应答的配置 (CPLD的配置寄存器无法读回)，请求的配置与记录相同时
+    不再发送解锁序列；任何命令出错 (串口错误或应答失步) 都会清除记录。卡带可能在没有出错的情况下
+    被重新上电时使用force。
+    
+    Args:
+        sdram: 映射SDRAM (1) 或Flash (0)
+        sd_enable: SD卡接口使能
+        write_enable: 写使能
+        bank: Flash Bank选择 (0~31，以4MB为单位加到Flash高位地址)
+        force: 即使配置已生效也重新发送 (如卡带可能被重新上电)
+        settle: 配置改变后额外等待的时间 (秒)；默认不等待，解锁序列的应答已确认配置写入
     """
+    if not 0 <= bank < CONFIG_BANK_COUNT:
+        raise ValueError(f"Flash Bank超出范围: {bank}")
     
+    cart = getCart()
     magic_addr_word = MAGIC_ADDRESS >> 1  # 转换为字地址
-    config1 = sdram | (sd_enable << 1) | (write_enable << 2)
-    writeRom(magic_addr_word, MAGIC_VALUE)
-    writeRom(magic_addr_word, MAGIC_VALUE)
-    writeRom(magic_addr_word, config1)
-    writeRom(magic_addr_word, config1)
+    config1 = sdram | (sd_enable << 1) | (write_enable << 2) | (bank << CONFIG_BANK_SHIFT)
+    if cart.mode == config1 and not force:
+        commandStats.addTime("set_sc_mode_skipped", 0.0)
+        return True
+    
+    cart.mode = None  # 序列中途失败时配置状态未知
+    with commandStats.timed("set_sc_mode"):
+        # 四次写入合并为一次发送，只等待一次往返
+        cart.writeRomBurst([(magic_addr_word, MAGIC_VALUE), (magic_addr_word, MAGIC_VALUE),
+                            (magic_addr_word, config1), (magic_addr_word, config1)])
+        # 模式切换是同步点：确认四次写入都已执行
+        cart.flush()
+    cart.mode = config1
+    if settle:
+        pause(settle)
     return True
 
+def pollUntil(check, timeout=READY_TIMEOUT):
+    """
+    反复执行check直到返回真值或超时
+    
+    每次check本身是一次USB往返，不额外等待，硬件就绪后立即返回。
+    
+    Args:
+        check: 无参数函数
+        timeout: 超时 (秒)
+        
+    Returns:
+        check的真值结果，超时返回None
+    """
+    with commandStats.timed("poll"):
+        deadline = time.perf_counter() + timeout
+        while True:
+            result = check()
+            if result:
+                return result
+            if time.perf_counter() >= deadline:
+                return None
+
+def readHeader():
+    """读取ROM头 (0xA0起的游戏标题)"""
+    return readRom(HEADER_ADDR >> 1, HEADER_LENGTH)
+
+def waitHeaderChange(old_header, timeout=READY_TIMEOUT):
+    """
+    轮询ROM头直到与old_header不同 (映射切换已生效)
+    
+    Returns:
+        新的ROM头，超时返回None
+    """
+    def changed():
+        header = readHeader()
+        return header if header != old_header else None
+    return pollUntil(changed, timeout)
+
+def readWordUntil(addr_word, check, timeout=WRITE_SETTLE):
+    """
+    单字写入后轮询读回，直到check(读回值)为真或超时
+    
+    期望写入生效时check为读回期望值，写入生效后立即返回；检查写保护时check为读回值改变，
+    轮询到超时，确认这段时间内数据没有被改写。
+    
+    Returns:
+        最后一次读回的值
+    """
+    value = None
+    def read():
+        nonlocal value
+        value = struct.unpack("<H", readRom(addr_word, 2))[0]
+        return check(value)
+    pollUntil(read, timeout)
+    return value
+
 def diagnoseSuperChis():
     """诊断SuperChis配置状态"""
     print("\n--- SuperChis诊断 ---")
@@ -136,17 +1049,16 @@ def diagnoseSuperChis():
         test_value = 0x1357
         
         # Flash模式测试
-        set_sc_mode(sdram=0, sd_enable=0, write_enable=1)
-        time.sleep(0.01)
+        set_sc_mode(sdram=0, sd_enable=0, write_enable=1, settle=MODE_SETTLE)
         
         addr_word = test_addr >> 1
+        invalidateManifest([(test_addr, 2)])
         writeRom(addr_word, test_value)
         flash_data = readRom(addr_word, 2)
         flash_value = struct.unpack("<H", flash_data)[0]
         
         # SDRAM模式测试  
-        set_sc_mode(sdram=1, sd_enable=0, write_enable=1)
-        time.sleep(0.01)
+        set_sc_mode(sdram=1, sd_enable=0, write_enable=1, settle=MODE_SETTLE)
         
         writeRom(addr_word, test_value)
         sdram_data = readRom(addr_word, 2)
@@ -164,8 +1076,7 @@ def diagnoseSuperChis():
         print("\n2. 测试写使能功能...")
         
         # 写使能关闭
-        set_sc_mode(sdram=1, sd_enable=0, write_enable=0)
-        time.sleep(0.01)
+        set_sc_mode(sdram=1, sd_enable=0, write_enable=0, settle=MODE_SETTLE)
         
         original_data = readRom(addr_word, 2)
         original_value = struct.unpack("<H", original_data)[0]
@@ -180,8 +1091,7 @@ def diagnoseSuperChis():
             print("✗ 写使能=0时写入未被阻止")
             
         # 写使能开启
-        set_sc_mode(sdram=1, sd_enable=0, write_enable=1)
-        time.sleep(0.01)
+        set_sc_mode(sdram=1, sd_enable=0, write_enable=1, settle=MODE_SETTLE)
         
         writeRom(addr_word, 0x6666)
         enabled_data = readRom(addr_word, 2) 
@@ -220,6 +1130,7 @@ def testBasicReadWrite(test_addr = 0x00000000):
     
     try:
         # 写入测试数据
+        invalidateManifest([(test_addr, len(test_data) * 2)])
         addr_word = test_addr >> 1
         for i, data in enumerate(test_data):
             writeRom(addr_word + i, data)
@@ -255,17 +1166,14 @@ def testWriteProtection(test_addr = 0x00002000):
     
     try:
         addr_word = test_addr >> 1
+        invalidateManifest([(test_addr, 2)])
         
         # 1. 首先确保写使能开启时可以正常写入
         print("1. 验证写使能状态下正常写入...")
-        set_sc_mode(sdram=1, sd_enable=0, write_enable=1)
-        time.sleep(0.01)
+        set_sc_mode(sdram=1, sd_enable=0, write_enable=1, settle=MODE_SETTLE)
         
         writeRom(addr_word, test_value1)
-        time.sleep(0.001)
-        
-        actual_bytes = readRom(addr_word, 2)
-        actual = struct.unpack("<H", actual_bytes)[0]
+        actual = readWordUntil(addr_word, lambda value: value == test_value1)
         
         if actual != test_value1:
             print(f"✗ 写使能状态下写入失败: 期望 0x{test_value1:04X}, 实际 0x{actual:04X}")
@@ -275,8 +1183,7 @@ def testWriteProtection(test_addr = 0x00002000):
         
         # 2. 关闭写使能，测试写保护
         print("2. 测试写保护功能...")
-        set_sc_mode(sdram=1, sd_enable=0, write_enable=0)
-        time.sleep(0.01)
+        set_sc_mode(sdram=1, sd_enable=0, write_enable=0, settle=MODE_SETTLE)
         
         # 记录写保护前的原始数据
         original_bytes = readRom(addr_word, 2)
@@ -286,11 +1193,9 @@ def testWriteProtection(test_addr = 0x00002000):
         # 尝试写入新数据
         print(f"   尝试写入新数据: 0x{test_value2:04X}")
         writeRom(addr_word, test_value2)
-        time.sleep(0.001)
         
-        # 读取数据，检查是否被写入
-        protected_bytes = readRom(addr_word, 2)
-        protected_value = struct.unpack("<H", protected_bytes)[0]
+        # 读取数据，检查是否被写入 (在WRITE_SETTLE内数据都不应改变)
+        protected_value = readWordUntil(addr_word, lambda value: value != original_value)
         
         if protected_value == original_value:
             print(f"✓ 写保护生效: 数据保持为 0x{protected_value:04X}")
@@ -303,14 +1208,10 @@ def testWriteProtection(test_addr = 0x00002000):
         
         # 3. 重新开启写使能，验证写入恢复正常
         print("3. 验证重新开启写使能后写入恢复...")
-        set_sc_mode(sdram=1, sd_enable=0, write_enable=1)
-        time.sleep(0.01)
+        set_sc_mode(sdram=1, sd_enable=0, write_enable=1, settle=MODE_SETTLE)
         
         writeRom(addr_word, test_value2)
-        time.sleep(0.001)
-        
-        final_bytes = readRom(addr_word, 2)
-        final_value = struct.unpack("<H", final_bytes)[0]
+        final_value = readWordUntil(addr_word, lambda value: value == test_value2)
         
         if final_value == test_value2:
             print(f"✓ 写使能恢复正常: 0x{final_value:04X}")
@@ -322,8 +1223,7 @@ def testWriteProtection(test_addr = 0x00002000):
         print("4. 测试多个地址的写保护...")
         test_addresses = [0x00003000, 0x00004000, 0x00005000]
         
-        set_sc_mode(sdram=1, sd_enable=0, write_enable=0)
-        time.sleep(0.01)
+        set_sc_mode(sdram=1, sd_enable=0, write_enable=0, settle=MODE_SETTLE)
         
         protection_errors = 0
         for addr in test_addresses:
@@ -336,11 +1236,9 @@ def testWriteProtection(test_addr = 0x00002000):
             # 尝试写入
             new_val = 0x9999
             writeRom(addr_word, new_val)
-            time.sleep(0.001)
             
             # 检查是否被保护
-            check_bytes = readRom(addr_word, 2)
-            check_val = struct.unpack("<H", check_bytes)[0]
+            check_val = readWordUntil(addr_word, lambda value: value != orig_val)
             
             if check_val == orig_val:
                 print(f"   ✓ 地址 0x{addr:08X} 写保护正常")
@@ -361,8 +1259,13 @@ def testWriteProtection(test_addr = 0x00002000):
         print(f"✗ 写保护测试异常: {e}")
         return False
 
-def verifySDRAM():
-    """验证SDRAM写入功能 - 详细诊断"""
+def verifySDRAM(retention=SDRAM_RETENTION_WAIT):
+    """
+    验证SDRAM写入功能 - 详细诊断
+    
+    Args:
+        retention: 写入后切换到Flash映射并保持的时间 (秒)，再读回检查数据是否保持；0表示不等待
+    """
     print("\n--- SDRAM写入验证测试 ---")
     
     # 测试多个地址和数据模式
@@ -408,6 +1311,7 @@ def verifySDRAM():
             test_cases.append((addr, val))
 
     print("测试多个地址和数据模式...")
+    invalidateManifest([(test_addr, 2) for test_addr, _ in test_cases])
     errors = 0
     
     for test_addr, test_value in test_cases:
@@ -422,13 +1326,16 @@ def verifySDRAM():
             errors += 1
     
     set_sc_mode(sdram=0, sd_enable=0, write_enable=0)
-    time.sleep(0.6)
+    if retention:
+        pause(retention)
     set_sc_mode(sdram=1, sd_enable=0, write_enable=1)
-    for test_addr, test_value in test_cases[::-1]:
+    reads = [(test_addr, test_value, readRomAsync(test_addr >> 1, 2))
+             for test_addr, test_value in test_cases[::-1]]
+    failures = []
+    for test_addr, test_value, pending in reads:
         try:
             # 读取并验证
-            addr_word = test_addr >> 1
-            actual_bytes = readRom(addr_word, 2)
+            actual_bytes = pending.result()
             actual = struct.unpack("<H", actual_bytes)[0]
             
             if actual == test_value:
@@ -438,10 +1345,13 @@ def verifySDRAM():
                 # 分析差异
                 xor_diff = test_value ^ actual
                 print(f"    XOR差异: 0x{xor_diff:04X} (二进制: {xor_diff:016b})")
+                failures.append((test_addr, test_value, actual))
                 errors += 1
         except Exception as e:
             print(f"✗ 地址 0x{test_addr:08X} 测试异常: {e}")
             errors += 1
+    if failures:
+        diagnoseMismatches(failures, pairs=test_cases, retention=retention)
 
     # 测试地址线
     print("\n测试地址线...")
@@ -455,10 +1365,7 @@ def verifySDRAM():
         try:
             addr_word = test_addr >> 1
             writeRom(addr_word, test_value)
-            time.sleep(0.001)
-            
-            actual_bytes = readRom(addr_word, 2)
-            actual = struct.unpack("<H", actual_bytes)[0]
+            actual = readWordUntil(addr_word, lambda value: value == test_value)
             
             if actual == test_value:
                 print(f"✓ A{bit}: 地址 0x{test_addr:08X} = 0x{actual:04X}")
@@ -481,10 +1388,7 @@ def verifySDRAM():
         try:
             addr_word = test_addr >> 1
             writeRom(addr_word, test_value)
-            time.sleep(0.001)
-            
-            actual_bytes = readRom(addr_word, 2)
-            actual = struct.unpack("<H", actual_bytes)[0]
+            actual = readWordUntil(addr_word, lambda value: value == test_value)
             
             if actual == test_value:
                 print(f"✓ D{bit}: 0x{test_value:04X} = 0x{actual:04X}")
@@ -511,7 +1415,18 @@ def verifySDRAM():
         print("✗ SDRAM验证失败!")
         return False
 
-def testMemoryPattern(start_addr, length, pattern_name, pattern_func):
+def _progressPrinter(label, step=25):
+    """返回每完成step%打印一次的进度回调"""
+    state = {"next": step}
+    def report(done, total):
+        progress = done / total * 100
+        if progress >= state["next"]:
+            print(f"{label}: {progress:.1f}%")
+            while state["next"] <= progress:
+                state["next"] += step
+    return report
+
+def testMemoryPattern(start_addr, length, pattern_name, pattern_func, checkpoint=None):
     """
     测试内存模式
     
@@ -519,80 +1434,71 @@ def testMemoryPattern(start_addr, length, pattern_name, pattern_func):
         start_addr: 起始地址
         length: 测试长度
         pattern_name: 模式名称
-        pattern_func: 生成模式数据的函数
+        pattern_func: 生成模式数据的函数，返回上下文管理器 (如loadPattern)，测试结束时关闭
+        checkpoint: TestCheckpoint，每写入或校验CHECKPOINT_SEGMENT字节保存一次进度和失败块
     """
     print(f"\n--- {pattern_name} 测试 ---")
     print(f"地址范围: 0x{start_addr:08X} - 0x{start_addr + length - 1:08X}")
     
     # 生成测试数据
-    test_data = pattern_func(length)
-    
-    # 写入数据
-    print("写入测试数据...")
-    start_time = time.time()
-    
-    write_size = 4096
-    for offset in range(0, length, write_size):
-        chunk_size = min(write_size, length - offset)
-        chunk_data = test_data[offset:offset + chunk_size]
-        
-        # 转换为16位字地址
-        addr_word = (start_addr + offset) >> 1
-        writeRom(addr_word, chunk_data)
-        if offset % (length // 4) == 0:
-            progress = (offset / length) * 100
-            print(f"写入进度: {progress:.1f}%")
-    
-    write_time = time.time() - start_time
-    print(f"写入完成，耗时: {write_time:.2f}秒")
-    
-    # 读取并校验数据
-    print("读取并校验数据...")
-    start_time = time.time()
-    
-    errors = 0
-    read_size = 4096
-
-    for offset in range(0, length, read_size):
-        chunk_size = min(read_size, length - offset)
-        expected_data = test_data[offset:offset + chunk_size]
-        
-        # 转换为16位字地址
-        addr_word = (start_addr + offset) >> 1
-        actual_data = readRom(addr_word, chunk_size)
-        
-        if actual_data != expected_data:
-            errors += 1
-            if errors <= 10:  # 只显示前10个错误
-                print(f"地址 0x{start_addr + offset:08X} 校验失败:")
-                print(f"  期望: {expected_data.hex()}")
-                print(f"  实际: {actual_data.hex()}")
+    with pattern_func(length) as test_data:
+        invalidateManifest([(start_addr, length)])
+        expected_hashes = blockHashes(test_data)
+        block_size = VERIFY_BLOCK_SIZE
+        result = VerifyResult(start_addr, length, block_size)
+        if checkpoint is not None:
+            # 续测时带上断点中已校验部分的失败块和差异字
+            result.bad_blocks = list(checkpoint.state.get("bad_blocks", []))
+            result.mismatches = [tuple(error) for error in checkpoint.errors]
         
-        if offset % (length // 4) == 0:
-            progress = (offset / length) * 100
-            print(f"校验进度: {progress:.1f}%")
-    
-    # 随机读1000次
-    print("随机读取1000次进行校验...")
-    random_errors = 0
-    for _ in range(1000):
-        # 生成一个随机的、偶数对齐的偏移量
-        offset = random.randint(0, length - 2) & ~1 
-        
-        addr_word = (start_addr + offset) >> 1
+        # 写入数据，再读取并校验
+        print("写入并校验测试数据...")
+        start_time = time.time()
+        printers = {"写入": _progressPrinter("写入进度"), "校验": _progressPrinter("校验进度")}
         
-        # 读取实际数据
-        actual_data = readRom(addr_word, 2)
+        def verify(offset, chunk, progress):
+            part = verifyStream(start_addr + offset, chunk,
+                                expected_hashes[offset // block_size:(offset + chunk + block_size - 1) // block_size],
+                                memoryview(test_data)[offset:offset + chunk], block_size, progress)
+            result.bad_blocks.extend(part.bad_blocks)
+            result.mismatches.extend(part.mismatches)
+            if checkpoint is not None:
+                checkpoint.state["bad_blocks"] = result.bad_blocks
+            return part.mismatches
         
-        # 获取期望数据
-        expected_data_chunk = test_data[offset:offset+2]
+        checkpointedWriteVerify(start_addr, test_data, verify, checkpoint,
+                                lambda label, done, total: printers[label](done, total))
+        print(f"写入和校验完成，耗时: {time.time() - start_time:.2f}秒")
+        start_time = time.time()
+        errors = len(result.bad_blocks)
+        printVerifyResult(result)
+        if result.mismatches:
+            diagnoseMismatches(result.mismatches, start_addr, test_data)
+
+        # 随机读1000次
+        print("随机读取1000次进行校验...")
+        random_errors = 0
+        random_reads = []
+        for _ in range(1000):
+            # 生成一个随机的、偶数对齐的偏移量
+            offset = random.randint(0, length - 2) & ~1 
+            
+            addr_word = (start_addr + offset) >> 1
+            random_reads.append((offset, readRomAsync(addr_word, 2)))
         
-        if actual_data != expected_data_chunk:
-            random_errors += 1
-            if random_errors <= 10: # 只显示前10个随机读错误
-                print(f"  ✗ 随机地址 0x{start_addr + offset:08X} 校验失败:")
-                print(f"    期望: {expected_data_chunk.hex()}")
-                print(f"    实际: {actual_data.hex()}")
+        for offset, pending in random_reads:
+            # 读取实际数据
+            actual_data = pending.result()
+            
+            # 获取期望数据
+            expected_data_chunk = test_data[offset:offset+2]
+            
+            if actual_data != expected_data_chunk:
+                random_errors += 1
+                if random_errors <= 10: # 只显示前10个随机读错误
+                    print(f"  ✗ 随机地址 0x{start_addr + offset:08X} 校验失败:")
+                    print(f"    期望: {expected_data_chunk.hex()}")
+                    print(f"    实际: {actual_data.hex()}")
 
     if random_errors > 0:
         print(f"✗ 随机读取测试发现 {random_errors} 个错误")
@@ -610,90 +1516,1060 @@ def testMemoryPattern(start_addr, length, pattern_name, pattern_func):
     
     return total_errors == 0
 def generatePatternFile(length):
-    data = bytearray()
-    with open("test.gba", 'rb') as f:
-        f.seek(0)
-        data = f.read(length)
-    return data
+    """读取test.gba的前length字节"""
+    with open("test.gba", "rb") as f:
+        return contextlib.nullcontext(f.read(length))
 
-def generatePatternAA55(length):
-    """生成0xAA55交替模式"""
-    data = bytearray()
-    for i in range(0, length, 2):
-        data.extend([0xAA, 0x55])
-    return data[:length]
+@contextlib.contextmanager
+def mapRomImage(path, length=None):
+    """
+    以只读内存映射方式打开ROM映像，退出时关闭映射
+    
+    Args:
+        path: 映像文件路径
+        length: 只使用前length字节，默认整个文件
+        
+    Yields:
+        memoryview (零拷贝切片)，退出后不可再使用
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            yield memoryview(b"")
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mm)
+    image = view if length is None else view[:min(length, size)]
+    try:
+        yield image
+    finally:
+        image.release()
+        view.release()
+        try:
+            mm.close()
+        except BufferError:
+            pass  # 仍有从映像切出的memoryview被引用 (如异常回溯中)，映射在它们释放后由垃圾回收关闭
 
-def generatePattern5500(length):
-    """生成0x5500交替模式"""
-    data = bytearray()
-    for i in range(0, length, 2):
-        data.extend([0x55, 0x00])
-    return data[:length]
+class _Prefetcher(threading.Thread):
+    """
+    ROM映像预读线程：在发送位置之前预先把文件读入页面缓存，使磁盘读取与串口发送重叠
+    
+    用普通的文件读取而不是访问映射的页面：文件读取在等待磁盘时释放GIL，
+    缺页则在持有GIL时发生，会阻塞发送线程。之后发送线程访问映射时页面已在缓存中。
+    """
 
-def generatePatternRandom(length):
-    """生成随机模式"""
-    random.seed(12345)  # 固定种子以便重现
-    return bytearray(random.randint(0, 255) for _ in range(length))
+    def __init__(self, path, length, ahead=UPLOAD_PREFETCH_BYTES, step=UPLOAD_PREFETCH_STEP):
+        super().__init__(daemon=True)
+        self.path = path
+        self.length = length
+        self.ahead = ahead
+        self.step = step
+        self.position = 0
+        self.stopped = False
+        self.cond = threading.Condition()
 
-def generatePatternIncremental(length):
-    """生成递增模式"""
-    return bytearray(i & 0xFF for i in range(length))
+    def advance(self, position):
+        """更新发送位置"""
+        with self.cond:
+            self.position = position
+            self.cond.notify()
 
-def lcg32(s):
-    """32位线性同余生成器"""
-    return (s * 1664525 + 1013904223) & 0xFFFFFFFF
+    def stop(self):
+        with self.cond:
+            self.stopped = True
+            self.cond.notify()
+
+    def run(self):
+        offset = 0
+        buffer = bytearray(self.step)
+        with open(self.path, "rb", buffering=0) as f:
+            while offset < self.length:
+                with self.cond:
+                    while not self.stopped and offset >= self.position + self.ahead:
+                        self.cond.wait()
+                    if self.stopped:
+                        return
+                n = f.readinto(buffer)
+                if not n:
+                    return
+                offset += n
 
-def sdram_stress_test(max_size_mb=4, progress_callback=None):
+def uploadRomFile(path, start_addr=0x00000000, verify=True, progress=None, cart_id=None):
+    """
+    将ROM映像文件上传到SDRAM
+    
+    映像以内存映射方式打开，按帧切出memoryview直接交给串口发送；
+    后台预读线程领先发送位置读入文件页面，磁盘读取与发送重叠进行。
+    调用前需设置为SDRAM模式并开启写使能。
+    
+    Args:
+        path: 映像文件路径
+        start_addr: 起始字节地址
+        verify: 上传后按块CRC32读回校验
+        progress: 进度回调，同bulkWrite
+        cart_id: 卡带标识，写入的内容记录到该卡带的清单 (供uploadRomDiff使用)，默认使用烧卡器标识 (burnerId())
+        
+    Returns:
+        校验通过 (或不校验) 返回True
+    """
+    with mapRomImage(path) as image:
+        length = len(image)
+        if start_addr + length > deviceSize:
+            raise ValueError(f"映像大小 {length} 字节超出 0x{start_addr:08X} 起的 {deviceSize // 1024**2}MB 窗口")
+        
+        print(f"上传 {path} ({length / 1024**2:.2f}MB) 到 0x{start_addr:08X}...")
+        prefetcher = _Prefetcher(path, length)
+        prefetcher.start()
+        
+        aborted = False
+        def report(done, total):
+            nonlocal aborted
+            prefetcher.advance(done)
+            aborted = bool(progress and progress(done, total))
+            return aborted
+        
+        manifest = cartManifest(cart_id)
+        start_time = time.time()
+        try:
+            bulkWrite(start_addr, image, progress=report)
+        finally:
+            prefetcher.stop()
+        if aborted:
+            print("上传已中止")
+            manifest.invalidate(start_addr, length)
+            manifest.save()
+            return False
+        elapsed = time.time() - start_time
+        print(f"上传完成，耗时: {elapsed:.2f}秒 ({length / 1024**2 / max(elapsed, 1e-9):.2f} MB/s)")
+        
+        hashes = blockHashes(image, manifest.block_size)
+        if not verify:
+            manifest.record(start_addr, hashes, length)
+            manifest.save()
+            return True
+        result = verifyStream(start_addr, length, hashes, image, block_size=manifest.block_size)
+        printVerifyResult(result)
+        if result.ok:
+            print("✓ 上传校验通过")
+        else:
+            print(f"✗ 上传校验失败: {len(result.bad_blocks)} 个块不一致")
+        manifest.record(start_addr, hashes, length, result.bad_blocks)
+        manifest.save()
+        return result.ok
+
+class CartManifest:
+    """
+    卡带内容清单：记录最近一次写入卡带的数据的块哈希
+    
+    以块的绝对字节地址为键、块的CRC32为值，只记录完整的块。清单按cart_id保存，
+    默认是烧卡器的标识 (burnerId)，而不是卡带本身的标识。
+    清单只反映本程序写入的内容：上传记录写入的块，测试在改写SDRAM前删除相应范围
+    (invalidateManifest，只修改每个连接缓存的清单，由saveManifests写入文件)；卡带断电、更换或被其他程序改写后清单会过时，
+    因此增量上传在使用清单前先读回抽样检查。
+    """
+
+    def __init__(self, cart_id, memory="sdram", block_size=MANIFEST_BLOCK_SIZE):
+        self.cart_id = cart_id
+        self.memory = memory
+        self.block_size = block_size
+        self.hashes = {}
+        self.dirty = False  # 有尚未写入文件的改动
+        safe_id = "".join(c if c.isalnum() or c in "-_." else "_" for c in cart_id)
+        self.path = os.path.join(MANIFEST_DIR, f"{safe_id}-{memory}.json")
+
+    @classmethod
+    def load(cls, cart_id, memory="sdram", block_size=MANIFEST_BLOCK_SIZE):
+        """读取卡带的清单，不存在或格式不符时返回空清单"""
+        manifest = cls(cart_id, memory, block_size)
+        try:
+            with open(manifest.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return manifest
+        if data.get("version") == MANIFEST_VERSION and data.get("block_size") == block_size:
+            manifest.hashes = {int(addr, 16): crc for addr, crc in data["hashes"].items()}
+        return manifest
+
+    def save(self):
+        """写入清单文件 (先写临时文件再替换)"""
+        os.makedirs(MANIFEST_DIR, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": MANIFEST_VERSION,
+                "cart": self.cart_id,
+                "memory": self.memory,
+                "block_size": self.block_size,
+                "hashes": {f"{addr:08X}": crc for addr, crc in sorted(self.hashes.items())},
+            }, f)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def invalidate(self, addr, length):
+        """删除与[addr, addr+length)重叠的所有块，返回删除的块数"""
+        stale = [a for a in self.hashes if a < addr + length and a + self.block_size > addr]
+        for block_addr in stale:
+            del self.hashes[block_addr]
+        if stale:
+            self.dirty = True
+        return len(stale)
+
+    def record(self, addr, hashes, length, bad_blocks=()):
+        """
+        记录从addr开始写入的数据
+        
+        Args:
+            addr: 起始字节地址
+            hashes: 每块的CRC32 (blockHashes的结果)
+            length: 数据长度，末尾不完整的块不记录
+            bad_blocks: 校验失败的块地址，不记录
+        """
+        self.invalidate(addr, length)
+        bad = set(bad_blocks)
+        for i in range(length // self.block_size):
+            block_addr = addr + i * self.block_size
+            if block_addr not in bad:
+                self.hashes[block_addr] = hashes[i]
+        self.dirty = True
+
+def burnerId(port_name=None):
+    """
+    返回烧卡器的标识，作为卡带清单和测试断点的默认标识
+    
+    即烧卡器的USB序列号 (没有时使用串口名)，并不区分插在烧卡器上的卡带：
+    同一烧卡器上更换卡带时，上传应通过cart_id (--cart-id) 显式指定卡带标识。
+    不指定port_name时返回当前连接的标识，每个连接只查询一次串口列表。
+    """
+    if port_name is None:
+        cart = getCart()
+        if cart.burner_id is None:
+            cart.burner_id = burnerId(ser.port)
+        return cart.burner_id
+    if not port_name.startswith(SIM_PORT_PREFIX):
+        for port in serial.tools.list_ports.comports():
+            if port.device == port_name and port.serial_number:
+                return port.serial_number
+    return port_name
+
+def cartManifest(cart_id=None):
+    """
+    返回当前连接缓存的卡带清单，第一次用到时从文件读取
+
+    Args:
+        cart_id: 卡带标识，默认使用烧卡器标识 (burnerId())
+    """
+    cart_id = cart_id or burnerId()
+    manifests = getCart().manifests
+    if cart_id not in manifests:
+        manifests[cart_id] = CartManifest.load(cart_id)
+    return manifests[cart_id]
+
+def saveManifests():
+    """把当前连接缓存的清单中有改动的写入文件，在运行结束时调用"""
+    if _cart is None:
+        return
+    for manifest in _cart.manifests.values():
+        if manifest.dirty:
+            manifest.save()
+
+def invalidateManifest(ranges, cart_id=None):
+    """
+    从卡带清单中删除将被改写的范围
+
+    测试等不经上传改写SDRAM的操作在写入前调用，避免增量上传按过时的清单跳过这些块。
+    只修改缓存的清单 (cartManifest)，运行结束时由saveManifests写入文件。
+
+    Args:
+        ranges: [(起始字节地址, 长度)]
+        cart_id: 卡带标识，默认使用烧卡器标识 (burnerId())
+    """
+    manifest = cartManifest(cart_id)
+    for addr, length in ranges:
+        manifest.invalidate(addr, length)
+
+def _blockRuns(blocks):
+    """把升序的块号合并为连续区间 [(起始块, 结束块)]"""
+    runs = []
+    for block in blocks:
+        if runs and runs[-1][1] == block:
+            runs[-1][1] = block + 1
+        else:
+            runs.append([block, block + 1])
+    return runs
+
+def _sampleManifest(start_addr, block_size, hashes, blocks, count=MANIFEST_SAMPLE_BLOCKS):
+    """
+    随机读回部分块并与期望哈希比较
+    
+    Returns:
+        全部一致返回True
+    """
+    sample = random.sample(blocks, min(count, len(blocks)))
+    reads = [(block, readRomAsync((start_addr + block * block_size) >> 1, block_size)) for block in sorted(sample)]
+    return all(zlib.crc32(pending.result()) == hashes[block] for block, pending in reads)
+
+def _sampleRetained(start_addr, expected, block_size=VERIFY_BLOCK_SIZE, count=MANIFEST_SAMPLE_BLOCKS):
+    """
+    断点续测前随机读回部分已写入、尚未校验的块，检查卡带在中断期间是否保持了这些数据 (没有断电)
+    
+    Returns:
+        全部一致 (或没有完整的块) 返回True
+    """
+    blocks = list(range(len(expected) // block_size))
+    hashes = {block: zlib.crc32(expected[block * block_size:(block + 1) * block_size])
+              for block in random.sample(blocks, min(count, len(blocks)))}
+    return _sampleManifest(start_addr, block_size, hashes, sorted(hashes), count)
+
+def _restoreMagicWord(start_addr, expected):
+    """
+    续测前写回魔术地址处的测试数据
+
+    续测时的解锁序列在写使能仍开启时会把配置值写入SDRAM的魔术地址 (0x01FFFFFE)，
+    该字在断点之后尚未校验的范围内时写回期望值，否则抽样检查或校验会报告这个字不一致。
+    """
+    offset = MAGIC_ADDRESS - start_addr
+    if 0 <= offset <= len(expected) - 2:
+        writeRom(MAGIC_ADDRESS >> 1, bytes(expected[offset:offset + 2]))
+        flushCommands()
+
+def checkpointedWriteVerify(start_addr, expected, verify, checkpoint=None, progress=None):
+    """
+    分段批量写入整段数据，再分段读回校验，每段完成后保存断点
+    
+    断点的state记录阶段 (phase: "write"/"verify") 和偏移 (offset)。续测时已校验的部分不再重复：
+    写入阶段中断时先抽样检查已写入的部分，仍在卡带上则从断点继续写入，否则从头写入；
+    校验阶段中断时抽样检查尚未校验的部分，不在卡带上则重新写入这部分再继续校验。
+    
+    Args:
+        start_addr: 起始字节地址
+        expected: 写入的数据
+        verify: verify(偏移, 长度, 进度回调) 读回并校验一段，返回该段的错误列表 (追加到断点)
+        checkpoint: TestCheckpoint，None时不保存断点
+        progress: 进度回调 progress(阶段名, 已完成字节数, 总字节数)，返回True时中止
+        
+    Returns:
+        中止时返回True
+    """
+    view = memoryview(expected).cast("B")
+    length = len(view)
+    phase, offset = "write", 0
+    if checkpoint is not None and "phase" in checkpoint.state:
+        phase, offset = checkpoint.state["phase"], checkpoint.state["offset"]
+        _restoreMagicWord(start_addr, view[:offset] if phase == "write" else view)
+        if phase == "write" and not _sampleRetained(start_addr, view[:offset]):
+            print("断点之前写入的数据已丢失 (卡带可能断电)，从头写入")
+            offset = 0
+        elif phase == "verify" and not _sampleRetained(start_addr + offset, view[offset:]):
+            print("尚未校验的数据已丢失 (卡带可能断电)，重新写入后继续校验")
+            bulkWrite(start_addr + offset, view[offset:])
+    aborted = [False]
+
+    def report(label, base):
+        if not progress:
+            return None
+        def callback(done, total):
+            aborted[0] = bool(progress(label, base + done, length))
+            return aborted[0]
+        return callback
+
+    def save(**state):
+        if checkpoint is not None:
+            checkpoint.update(**state)
+
+    if phase == "write":
+        while offset < length:
+            chunk = min(CHECKPOINT_SEGMENT, length - offset)
+            bulkWrite(start_addr + offset, view[offset:offset + chunk], progress=report("写入", offset))
+            if aborted[0]:
+                return True
+            offset += chunk
+            save(phase="write", offset=offset)
+        offset = 0
+        save(phase="verify", offset=0)
+    while offset < length:
+        chunk = min(CHECKPOINT_SEGMENT, length - offset)
+        errors = verify(offset, chunk, report("校验", offset))
+        if aborted[0]:
+            return True
+        offset += chunk
+        save(errors=errors, phase="verify", offset=offset)
+    return False
+
+class TestCheckpoint:
+    """
+    长时间测试的断点：测试进度 (state) 和已发现的错误 (errors)
+    
+    每个烧卡器 (burnerId，不区分卡带) 和测试一个文件，参数与断点不一致时不续测。测试正常结束 (无论通过与否) 后删除断点，
+    中途异常或被中断时保留最近一次保存的断点，供 --resume 继续。
+    """
+
+    def __init__(self, cart_id, test, params):
+        self.cart_id = cart_id
+        self.test = test
+        self.params = json.loads(json.dumps(params))
+        self.state = {}
+        self.errors = []
+        safe_id = "".join(c if c.isalnum() or c in "-_." else "_" for c in cart_id)
+        self.path = os.path.join(CHECKPOINT_DIR, f"{safe_id}-{test}.json")
+
+    @classmethod
+    def load(cls, cart_id, test, params, resume=True):
+        """读取断点；resume为False、断点不存在或参数不符时返回空断点 (从头开始)"""
+        checkpoint = cls(cart_id, test, params)
+        if not resume:
+            return checkpoint
+        try:
+            with open(checkpoint.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return checkpoint
+        if data.get("version") != CHECKPOINT_VERSION or data.get("params") != checkpoint.params:
+            print(f"断点 {checkpoint.path} 的测试参数不同，从头开始")
+            return checkpoint
+        checkpoint.state = data["state"]
+        checkpoint.errors = data["errors"]
+        print(f"从断点继续 {test}: {checkpoint.state} (已记录 {len(checkpoint.errors)} 个错误)")
+        return checkpoint
+
+    @property
+    def resumed(self):
+        return bool(self.state)
+
+    def update(self, errors=(), **state):
+        """更新进度、追加错误 (最多CHECKPOINT_MAX_ERRORS个) 并保存"""
+        self.state.update(state)
+        room = CHECKPOINT_MAX_ERRORS - len(self.errors)
+        if room > 0:
+            self.errors.extend(list(error) for error in list(errors)[:room])
+        self.save()
+
+    def save(self):
+        """写入断点文件 (先写临时文件再替换)"""
+        os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": CHECKPOINT_VERSION,
+                "cart": self.cart_id,
+                "test": self.test,
+                "params": self.params,
+                "state": self.state,
+                "errors": self.errors,
+            }, f)
+        os.replace(tmp_path, self.path)
+
+    def advance(self, **state):
+        """进入测试的下一部分: 以state替换进度、清空错误并保存"""
+        self.state = dict(state)
+        self.errors = []
+        self.save()
+
+    def clear(self):
+        """测试结束，删除断点"""
+        self.state = {}
+        self.errors = []
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.path)
+
+def uploadRomDiff(path, start_addr=0x00000000, check="sample", verify=True, progress=None, cart_id=None):
+    """
+    增量上传ROM映像：只写入与卡带清单记录不同的块
+    
+    清单认为未改变的块先按check检查：
+    - "sample": 随机读回少量块，任何一块不一致即认为清单过时，整个映像全部重写
+    - "full": 读回所有未改变的块，不一致的块加入写入列表
+    - "none": 完全信任清单
+    调用前需设置为SDRAM模式并开启写使能。
+    
+    Args:
+        path: 映像文件路径
+        start_addr: 起始字节地址
+        check: 未改变块的检查方式 ("sample"/"full"/"none")
+        verify: 写入后按块CRC32读回校验写入的块
+        progress: 进度回调，同bulkWrite (总量为需要写入的字节数)
+        cart_id: 卡带标识，默认使用烧卡器标识 (burnerId())
+        
+    Returns:
+        校验通过 (或不校验) 返回True
+    """
+    if check not in ("sample", "full", "none"):
+        raise ValueError(f"未知的检查方式: {check}")
+    with mapRomImage(path) as image:
+        length = len(image)
+        if start_addr + length > deviceSize:
+            raise ValueError(f"映像大小 {length} 字节超出 0x{start_addr:08X} 起的 {deviceSize // 1024**2}MB 窗口")
+        
+        manifest = cartManifest(cart_id)
+        block_size = manifest.block_size
+        hashes = blockHashes(image, block_size)
+        full_blocks = length // block_size
+        unchanged = [i for i in range(full_blocks)
+                     if manifest.hashes.get(start_addr + i * block_size) == hashes[i]]
+        print(f"增量上传 {path} ({length / 1024**2:.2f}MB) 到 0x{start_addr:08X}: "
+              f"清单记录 {len(unchanged)}/{len(hashes)} 个块未改变")
+        
+        start_time = time.time()
+        if unchanged and check == "sample" and not _sampleManifest(start_addr, block_size, hashes, unchanged):
+            print("抽样检查发现卡带内容与清单不一致，清单已过时，全部重写")
+            manifest.invalidate(start_addr, length)
+            unchanged = []
+        elif unchanged and check == "full":
+            stale = set()
+            for first, end in _blockRuns(unchanged):
+                result = verifyStream(start_addr + first * block_size, (end - first) * block_size,
+                                      hashes[first:end], block_size=block_size)
+                stale.update((addr - start_addr) // block_size for addr in result.bad_blocks)
+            if stale:
+                print(f"完整检查发现 {len(stale)} 个块与清单不一致")
+            unchanged = [i for i in unchanged if i not in stale]
+        
+        keep = set(unchanged)
+        runs = _blockRuns([i for i in range(len(hashes)) if i not in keep])
+        total = sum(min(end * block_size, length) - first * block_size for first, end in runs)
+        done = 0
+        aborted = False
+        for first, end in runs:
+            offset = first * block_size
+            stop = min(end * block_size, length)
+            def report(run_done, run_total, base=done):
+                nonlocal aborted
+                aborted = bool(progress and progress(base + run_done, total))
+                return aborted
+            bulkWrite(start_addr + offset, image[offset:stop], progress=report)
+            if aborted:
+                # 中止时写入的范围不确定，清单中不保留这段映像的任何记录
+                print("上传已中止")
+                manifest.invalidate(start_addr, length)
+                manifest.save()
+                return False
+            done += stop - offset
+        elapsed = time.time() - start_time
+        print(f"写入 {total / 1024**2:.2f}MB ({len(runs)} 段)，跳过 {(length - total) / 1024**2:.2f}MB，"
+              f"耗时: {elapsed:.2f}秒")
+        
+        ok = True
+        bad_blocks = []
+        if verify:
+            for first, end in runs:
+                offset = first * block_size
+                stop = min(end * block_size, length)
+                result = verifyStream(start_addr + offset, stop - offset, hashes[first:end], image[offset:stop],
+                                      block_size=block_size)
+                printVerifyResult(result)
+                bad_blocks.extend(result.bad_blocks)
+            ok = not bad_blocks
+            if ok:
+                print("✓ 上传校验通过")
+            else:
+                print(f"✗ 上传校验失败: {len(bad_blocks)} 个块不一致")
+        
+        manifest.record(start_addr, hashes, length, bad_blocks)
+        manifest.save()
+        return ok
+
+def flashBank():
+    """返回当前生效的Flash Bank偏移，配置未知时返回None"""
+    mode = getCart().mode
+    return None if mode is None else (mode >> CONFIG_BANK_SHIFT) & (CONFIG_BANK_COUNT - 1)
+
+def flashLocation(offset, bank=None):
+    """
+    把Flash线性字节偏移映射为 (Bank偏移, 窗口字节地址)
+    
+    bank给出的当前Bank能覆盖该偏移时沿用，否则选择覆盖该偏移的8单位对齐的Bank，
+    顺序访问整个Flash只需切换4次。
+    """
+    if not 0 <= offset < FLASH_MAX_BYTES:
+        raise ValueError(f"Flash偏移超出范围: 0x{offset:08X}")
+    unit = offset // FLASH_BANK_BYTES
+    if bank is None or not bank <= unit < bank + FLASH_WINDOW_BANKS:
+        bank = unit - unit % FLASH_WINDOW_BANKS
+    return bank, offset - bank * FLASH_BANK_BYTES
+
+def flashSegments(offset, length, bank=None):
+    """
+    把一段Flash线性地址拆分为各Bank窗口内的连续段
+    
+    Returns:
+        [(Bank偏移, 窗口字节地址, 段在数据中的偏移, 段长度)]
+    """
+    if offset + length > FLASH_MAX_BYTES:
+        raise ValueError(f"Flash范围超出 {FLASH_MAX_BYTES // 1024**2}MB: 0x{offset:08X}+0x{length:X}")
+    segments = []
+    done = 0
+    while done < length:
+        bank, window_addr = flashLocation(offset + done, bank)
+        seg_len = min(length - done, FLASH_WINDOW_BANKS * FLASH_BANK_BYTES - window_addr)
+        segments.append((bank, window_addr, done, seg_len))
+        done += seg_len
+    return segments
+
+def iterFlashRead(offset, length, progress=None, into=None):
+    """
+    跨Bank流式读取Flash，只在需要时切换Bank
+    
+    调用后卡带处于Flash映射、写使能关闭，Bank为最后一段的Bank。
+    
+    Args:
+        offset: Flash线性字节偏移 (偶数)
+        length: 读取字节数
+        progress: 进度回调，同iterRead (总量为length)
+        into: 同iterRead
+        
+    Yields:
+        (相对offset的偏移, 数据)
+    """
+    view = memoryview(into).cast("B") if into is not None else None
+    aborted = False
+    for bank, window_addr, seg_offset, seg_len in flashSegments(offset, length, flashBank()):
+        set_sc_mode(sdram=0, sd_enable=0, write_enable=0, bank=bank)
+        def report(done, total, base=seg_offset):
+            nonlocal aborted
+            aborted = bool(progress and progress(base + done, length))
+            return aborted
+        target = view[seg_offset:seg_offset + seg_len] if view is not None else None
+        for chunk_offset, data in iterRead(window_addr, seg_len, progress=report, into=target):
+            yield seg_offset + chunk_offset, data
+        if aborted:
+            return
+
+def readFlash(offset, length, progress=None):
+    """
+    跨Bank读取一段Flash
+    
+    Returns:
+        读取到的数据 (bytearray)
+    """
+    out = bytearray(length)
+    for _ in iterFlashRead(offset, length, progress, into=out):
+        pass
+    return out
+
+def writeFlash(offset, data, progress=None):
+    """
+    跨Bank向Flash发出连续写周期
+    
+    只是总线写入：NOR Flash需要由调用者按芯片的命令序列擦除和编程，
+    这里负责把线性偏移映射到Bank窗口并按需切换Bank。
+    调用后卡带处于Flash映射、写使能开启。
+    
+    Args:
+        offset: Flash线性字节偏移 (偶数)
+        data: 写入数据
+        progress: 进度回调，同bulkWrite (总量为数据长度)
+    """
+    view = memoryview(data).cast("B")
+    length = len(view)
+    aborted = False
+    for bank, window_addr, seg_offset, seg_len in flashSegments(offset, length, flashBank()):
+        set_sc_mode(sdram=0, sd_enable=0, write_enable=1, bank=bank)
+        def report(done, total, base=seg_offset):
+            nonlocal aborted
+            aborted = bool(progress and progress(base + done, length))
+            return aborted
+        bulkWrite(window_addr, view[seg_offset:seg_offset + seg_len], progress=report)
+        if aborted:
+            return
+
+def verifyFlash(offset, expected, block_size=VERIFY_BLOCK_SIZE, progress=None):
+    """
+    跨Bank按块CRC32校验Flash内容
+    
+    Returns:
+        VerifyResult，地址为Flash线性偏移
+    """
+    view = memoryview(expected).cast("B")
+    result = VerifyResult(offset, len(view), block_size)
+    for bank, window_addr, seg_offset, seg_len in flashSegments(offset, len(view), flashBank()):
+        set_sc_mode(sdram=0, sd_enable=0, write_enable=0, bank=bank)
+        segment = view[seg_offset:seg_offset + seg_len]
+        def report(done, total, base=seg_offset):
+            return progress(base + done, len(view)) if progress else False
+        part = verifyStream(window_addr, seg_len, blockHashes(segment, block_size), segment,
+                            block_size, progress=report)
+        shift = offset + seg_offset - window_addr
+        result.bad_blocks.extend(addr + shift for addr in part.bad_blocks)
+        result.mismatches.extend((addr + shift, want, got) for addr, want, got in part.mismatches)
+    return result
+
+def dumpFlash(path, length=FLASH_MAX_BYTES, offset=0, progress=None):
+    """
+    把Flash跨Bank连续读出到文件
+    
+    Returns:
+        写入的字节数
+    """
+    written = 0
+    with open(path, "wb") as f:
+        for _, data in iterFlashRead(offset, length, progress):
+            f.write(data)
+            written += len(data)
+    return written
+
+def selectSramBank(bank):
+    """
+    选择SRAM Bank (SRAM_A16)
+    
+    SRAM_A16 = config_write_enable or config_sram_bank，因此先关闭写使能，
+    再向0x09000000写入Bank号。使用SDRAM映射，写使能关闭时这次写入不会改写SDRAM或发往Flash。
+    """
+    if bank not in range(SRAM_BANKS):
+        raise ValueError(f"SRAM Bank超出范围: {bank}")
+    cart = getCart()
+    set_sc_mode(sdram=1, sd_enable=0, write_enable=0)
+    if cart.sram_bank != bank:
+        cart.sram_bank = None
+        writeRom(SRAM_BANK_ADDRESS >> 1, bank)
+        flushCommands()
+        cart.sram_bank = bank
+
+def readSram(bank, into=None):
+    """
+    读出一个SRAM Bank，按最大帧长度流水线读取
+    
+    Returns:
+        Bank内容 (bytearray，指定into时返回into)
+    """
+    out = into if into is not None else bytearray(SRAM_BANK_BYTES)
+    view = memoryview(out).cast("B")
+    selectSramBank(bank)
+    for offset in range(0, SRAM_BANK_BYTES, SRAM_FRAME_BYTES):
+        readRamAsync(offset, SRAM_FRAME_BYTES, view[offset:offset + SRAM_FRAME_BYTES])
+    flushCommands()
+    return out
+
+def writeSram(bank, offset, data):
+    """向一个SRAM Bank写入数据，按最大帧长度流水线发送"""
+    view = memoryview(data).cast("B")
+    if offset + len(view) > SRAM_BANK_BYTES:
+        raise ValueError(f"SRAM写入超出Bank: 0x{offset:04X}+0x{len(view):X}")
+    selectSramBank(bank)
+    for pos in range(0, len(view), SRAM_FRAME_BYTES):
+        writeRam(offset + pos, view[pos:pos + SRAM_FRAME_BYTES])
+    flushCommands()
+
+def readSramAll():
+    """读出所有SRAM Bank (128KB)"""
+    out = bytearray(SRAM_BANK_BYTES * SRAM_BANKS)
+    view = memoryview(out)
+    for bank in range(SRAM_BANKS):
+        readSram(bank, view[bank * SRAM_BANK_BYTES:(bank + 1) * SRAM_BANK_BYTES])
+    return out
+
+def backupSram(path, verify=True):
+    """
+    备份全部SRAM (两个Bank) 到文件
+    
+    Args:
+        path: 存档文件路径
+        verify: 再读一次并比较CRC32，确认读出的数据稳定
+        
+    Returns:
+        成功返回True
+    """
+    start_time = time.time()
+    data = readSramAll()
+    crc = zlib.crc32(data)
+    if verify:
+        again = zlib.crc32(readSramAll())
+        if again != crc:
+            print(f"✗ SRAM两次读出不一致: CRC32 0x{crc:08X} / 0x{again:08X}")
+            return False
+    with open(path, "wb") as f:
+        f.write(data)
+    print(f"✓ SRAM已备份到 {path} ({len(data) // 1024}KB, CRC32 0x{crc:08X})，耗时: {time.time() - start_time:.2f}秒")
+    return True
+
+def restoreSram(path, block_size=VERIFY_BLOCK_SIZE):
+    """
+    从文件恢复SRAM
+    
+    先读出卡带当前内容，只写入与文件不同的块；完全一致时不写入。
+    文件短于128KB时 (如32KB/64KB存档) 从Bank 0起恢复文件长度的内容。
+    写入后读回，按CRC32校验。
+    
+    Returns:
+        成功 (或无需写入) 返回True
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) > SRAM_BANK_BYTES * SRAM_BANKS:
+        raise ValueError(f"存档大小 {len(data)} 字节超过SRAM容量")
+    
+    start_time = time.time()
+    want = blockHashes(data, block_size)
+    current = readSramAll()[:len(data)]
+    changed = [i for i, crc in enumerate(blockHashes(current, block_size)) if crc != want[i]]
+    if not changed:
+        print(f"✓ 卡带SRAM已与 {path} 一致，跳过恢复")
+        return True
+    
+    view = memoryview(data)
+    for first, end in _blockRuns(changed):
+        pos = first * block_size
+        stop = min(end * block_size, len(data))
+        while pos < stop:
+            # 按Bank拆分 (块大小整除Bank大小，一块不会跨Bank)
+            bank, offset = divmod(pos, SRAM_BANK_BYTES)
+            run = min(stop, (bank + 1) * SRAM_BANK_BYTES) - pos
+            writeSram(bank, offset, view[pos:pos + run])
+            pos += run
+    
+    readback = readSramAll()[:len(data)]
+    if zlib.crc32(readback) != zlib.crc32(data):
+        bad = [i for i, crc in enumerate(blockHashes(readback, block_size)) if crc != want[i]]
+        print(f"✗ SRAM恢复校验失败: {len(bad)} 个块不一致 (首个位于0x{bad[0] * block_size:05X})")
+        return False
+    print(f"✓ SRAM已从 {path} 恢复: 写入 {len(changed)}/{len(want)} 个块，耗时: {time.time() - start_time:.2f}秒")
+    return True
+
+def generatePatternAA55(length):
+    """生成0xAA55交替模式"""
+    return loadPattern("aa55", length)
+
+def generatePattern5500(length):
+    """生成0x5500交替模式"""
+    return loadPattern("5500", length)
+
+def generatePatternRandom(length):
+    """生成随机模式"""
+    return loadPattern("random", length)
+
+def generatePatternIncremental(length):
+    """生成递增模式"""
+    return loadPattern("incremental", length)
+
+def generatePatternLCG(length):
+    """生成LCG序列模式 (与SDRAM压力测试相同的种子)"""
+    return loadPattern("lcg", length)
+
+LCG_A = 1664525
+LCG_C = 1013904223
+LCG_SEED = 0xdeadbeef
+LCG_BLOCK = 4096  # 向量化生成时每行的长度
+
+def lcg32(s):
+    """32位线性同余生成器"""
+    return (s * LCG_A + LCG_C) & 0xFFFFFFFF
+
+def lcgJump(n):
+    """
+    返回lcg32迭代n次的等价仿射变换系数 (a, c)，即 s_n = (a * s + c) mod 2^32
+    """
+    a, c = 1, 0
+    step_a, step_c = LCG_A, LCG_C
+    while n:
+        if n & 1:
+            a, c = (step_a * a) & 0xFFFFFFFF, (step_a * c + step_c) & 0xFFFFFFFF
+        step_a, step_c = (step_a * step_a) & 0xFFFFFFFF, (step_a * step_c + step_c) & 0xFFFFFFFF
+        n >>= 1
+    return a, c
+
+def lcgAdvance(s, n):
+    """返回lcg32从状态s迭代n次后的状态"""
+    a, c = lcgJump(n)
+    return (a * s + c) & 0xFFFFFFFF
+
+def lcgStream(seed, count):
+    """
+    批量生成LCG序列
+    
+    Args:
+        seed: 初始状态
+        count: 16位字数量
+        
+    Returns:
+        bytes，第i个小端16位字为lcg32从seed迭代i次后状态的低16位
+    """
+    if np is None:
+        out = bytearray(count * 2)
+        s = seed
+        for i in range(count):
+            struct.pack_into("<H", out, i * 2, s & 0xFFFF)
+            s = lcg32(s)
+        return bytes(out)
+    
+    # 先逐个计算第一行，之后每行由上一行整体跳跃LCG_BLOCK步得到
+    width = min(count, LCG_BLOCK)
+    rows = -(-count // width)
+    states = np.empty((rows, width), dtype=np.uint32)
+    s = seed
+    for i in range(width):
+        states[0, i] = s
+        s = lcg32(s)
+    a, c = lcgJump(width)
+    a, c = np.uint32(a), np.uint32(c)
+    for row in range(1, rows):
+        np.add(states[row - 1] * a, c, out=states[row])
+    return (states.ravel()[:count] & 0xFFFF).astype("<u2").tobytes()
+
+def _repeatChunks(unit, length, chunk_size):
+    """重复单元模式的分块生成"""
+    block = unit * (chunk_size // len(unit))
+    for offset in range(0, length, chunk_size):
+        yield block[:min(chunk_size, length - offset)]
+
+def _aa55Chunks(length, chunk_size):
+    return _repeatChunks(b"\xAA\x55", length, chunk_size)
+
+def _5500Chunks(length, chunk_size):
+    return _repeatChunks(b"\x55\x00", length, chunk_size)
+
+def _incrementalChunks(length, chunk_size):
+    return _repeatChunks(bytes(range(256)), length, chunk_size)
+
+def _randomChunks(length, chunk_size, seed=12345):
+    # 固定种子以便重现；块长为4的倍数时分块结果与一次生成相同
+    rng = random.Random(seed)
+    for offset in range(0, length, chunk_size):
+        yield rng.randbytes(min(chunk_size, length - offset))
+
+def _lcgChunks(length, chunk_size, seed=LCG_SEED):
+    state = seed
+    for offset in range(0, length, chunk_size):
+        n = min(chunk_size, length - offset)
+        words = (n + 1) // 2
+        yield lcgStream(state, words)[:n]
+        state = lcgAdvance(state, words)
+
+PATTERN_GENERATORS = {
+    "aa55": _aa55Chunks,
+    "5500": _5500Chunks,
+    "incremental": _incrementalChunks,
+    "random": _randomChunks,
+    "lcg": _lcgChunks,
+}
+
+def iterPattern(name, length, chunk_size=PATTERN_CHUNK_SIZE):
+    """
+    逐块生成测试模式，整个模式不需要同时驻留内存
+    
+    Args:
+        name: 模式名称 (PATTERN_GENERATORS中的键)
+        length: 总长度
+        chunk_size: 块大小 (256和4的倍数)
+    """
+    return PATTERN_GENERATORS[name](length, chunk_size)
+
+@contextlib.contextmanager
+def loadPattern(name, length):
+    """
+    打开测试模式数据，退出时关闭映射
+    
+    较大的模式按块生成后写入磁盘缓存，并以只读内存映射返回；
+    之后的运行直接映射缓存文件，无需重新生成。
+    
+    Yields:
+        bytearray (小模式) 或只读mmap (支持切片和memoryview)，退出后不可再使用
+    """
+    if length < PATTERN_CACHE_MIN:
+        yield bytearray().join(iterPattern(name, length))
+        return
+    
+    path = os.path.join(PATTERN_CACHE_DIR, f"{name}-{length}-v{PATTERN_CACHE_VERSION}.bin")
+    if not (os.path.exists(path) and os.path.getsize(path) == length):
+        os.makedirs(PATTERN_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            for chunk in iterPattern(name, length):
+                f.write(chunk)
+        os.replace(tmp_path, path)
+    
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        yield mm
+    finally:
+        try:
+            mm.close()
+        except BufferError:
+            pass  # 仍有从模式数据切出的memoryview被引用 (如异常回溯中)，映射在它们释放后由垃圾回收关闭
+
+STRESS_STRIDE = 22541  # 压力测试地址步长 (奇数，遍历所有字地址)
+STRESS_DELAY = 512     # 写入后延迟验证的字数
+
+def sdram_stress_test(max_size_mb=4, progress_callback=None, bulk=False, checkpoint=None):
     """
     SDRAM压力测试 - 简化版本，每次写入2字节，不恢复数据
     
     Args:
         max_size_mb: 最大测试大小(MB)，默认4MB
         progress_callback: 进度回调函数
+        bulk: 使用批量模式 (预先生成整个测试映像，按地址顺序分段批量写入，校验落后写入一段，见sdram_stress_test_bulk)
+        checkpoint: TestCheckpoint，每次打印进度时保存第一个尚未校验的写入序号、
+            该处的lcg32状态和步长排列中的位置；续测时只重新写入尚未校验的STRESS_DELAY个字
     
     Returns:
         测试结果: 成功返回True，失败返回负数表示失败位置
     """
+    invalidateManifest([(0, max_size_mb * 1024 * 1024)])
+    if bulk:
+        return sdram_stress_test_bulk(max_size_mb, progress_callback, checkpoint)
+    
     print(f"\n--- SDRAM压力测试 (测试范围: {max_size_mb}MB) ---")
     
-    start_seed = 0xdeadbeef
+    start_seed = LCG_SEED
     test_size_words = max_size_mb * 1024 * 1024 // 2  # 转换为16位字数量
     test_size_bytes = test_size_words * 2
-    buffer_size = 512  # 512个16位字的缓冲区
+    buffer_size = STRESS_DELAY  # 512个16位字的缓冲区
     
     # 临时缓冲区用于存储期望的数据
     tmp = bytearray(buffer_size * 2)  # 1KB缓冲区
     
     rndgen = start_seed
     pos = 0
+    first_index = 0
+    if checkpoint is not None and checkpoint.resumed:
+        first_index = checkpoint.state["index"]
+        rndgen = checkpoint.state["lcg"]
+        pos = checkpoint.state["pos"]
+        print(f"从第 {first_index} 次写入继续 (前 {first_index} 次写入已校验)")
     
     print(f"开始压力测试，测试{test_size_words}个16位字...")
     print("测试模式: 写入随机数据，延迟验证，简化版本")
     
     start_time = time.time()
     
+    # 在途的验证读: (i, prev_pos, expected_value, PendingFrame)
+    checks = deque()
+    
+    def verifyChecks(wait):
+        """校验已收到应答的验证读，wait为True时等待全部完成"""
+        while checks and (wait or checks[0][3].done):
+            i, prev_pos, expected_value, pending = checks.popleft()
+            actual_value = struct.unpack("<H", pending.result())[0]
+            
+            if actual_value != expected_value:
+                prev_addr = prev_pos * 2
+                print(f"✗ 验证失败在位置 {prev_pos} (0x{prev_addr:08X})")
+                print(f"    期望: 0x{expected_value:04X}, 实际: 0x{actual_value:04X}")
+                print(f"    XOR差异: 0x{expected_value ^ actual_value:04X}")
+                flushCommands()
+                return -i  # 返回负的失败位置
+        return None
+    
+    interrupted = False
+    
+    def finish(result):
+        if checkpoint is not None:
+            checkpoint.clear()
+        return result
+    
     try:
-        for i in range(test_size_words):
-            # 验证之前写入的数据 (延迟512个位置)
-            if i >= buffer_size:
-                prev_pos = (pos - 22541 * buffer_size) & (test_size_words - 1)
+        for i in range(first_index, test_size_words):
+            # 验证之前写入的数据 (延迟512个位置，续测后先重新写入尚未校验的部分)
+            if i >= first_index + buffer_size:
+                prev_pos = (pos - STRESS_STRIDE * buffer_size) & (test_size_words - 1)
                 prev_addr = prev_pos * 2  # 转换为字节地址
                 
-                # 读取SDRAM中的数据
-                addr_word = prev_addr >> 1  # 转换为16位字地址
-                actual_data = readRom(addr_word, 2)  # 读取2字节(16位)
-                actual_value = struct.unpack("<H", actual_data)[0]
-                
-                # 从tmp中获取期望的值
+                # 从tmp中获取期望的值 (本轮写入会覆盖该位置)
                 buf_idx = i & (buffer_size - 1)
                 expected_bytes = tmp[buf_idx*2:(buf_idx+1)*2]
                 expected_value = struct.unpack("<H", expected_bytes)[0]
                 
-                if actual_value != expected_value:
-                    print(f"✗ 验证失败在位置 {prev_pos} (0x{prev_addr:08X})")
-                    print(f"    期望: 0x{expected_value:04X}, 实际: 0x{actual_value:04X}")
-                    print(f"    XOR差异: 0x{expected_value ^ actual_value:04X}")
-                    return -i  # 返回负的失败位置
+                # 读取SDRAM中的数据，应答到达后再校验
+                addr_word = prev_addr >> 1  # 转换为16位字地址
+                checks.append((i, prev_pos, expected_value, readRomAsync(addr_word, 2)))
             
             # 生成随机值并存储到临时缓冲区
             current_addr = pos * 2  # 转换为字节地址
@@ -711,20 +2587,164 @@ def sdram_stress_test(max_size_mb=4, progress_callback=None):
             writeRom(addr_word, rnd_value)
             
             # 更新生成器和位置
-            pos = (pos + 22541) & (test_size_words - 1)
+            pos = (pos + STRESS_STRIDE) & (test_size_words - 1)
             rndgen = lcg32(rndgen)
             
+            failed = verifyChecks(wait=False)
+            if failed is not None:
+                return finish(failed)
+            
             # 更新进度
             if (i + 1) % 0x1000 == 0: 
                 progress = (i + 1) / test_size_words * 100
                 elapsed = time.time() - start_time
                 print(f"进度: {progress:.1f}% ({i+1}/{test_size_words}), 用时: {elapsed:.1f}秒")
                 
+                if checkpoint is not None:
+                    # 在途验证读中最早的一个对应第一个尚未校验的写入
+                    next_check = checks[0][0] if checks else i + 1
+                    index = max(first_index, next_check - buffer_size)
+                    checkpoint.update(index=index, lcg=lcgAdvance(start_seed, index),
+                                      pos=(index * STRESS_STRIDE) & (test_size_words - 1))
+                
                 if progress_callback:
                     if progress_callback(i >> 16, test_size_words >> 16):
                         print("测试被用户中断")
+                        interrupted = True
                         break
         
+        failed = verifyChecks(wait=True)
+        if failed is not None:
+            return finish(failed)
+        
+        elapsed_time = time.time() - start_time
+        print(f"✓ SDRAM压力测试完成! 用时: {elapsed_time:.1f}秒")
+        print(f"   测试了 {test_size_words} 个16位字 ({test_size_bytes/1024/1024:.1f}MB)")
+        print(f"   平均速度: {test_size_bytes/1024/1024/elapsed_time:.2f} MB/s")
+        
+        return True if interrupted else finish(True)
+        
+    except Exception as e:
+        print(f"✗ SDRAM压力测试异常: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def stressImage(test_size_words, seed=LCG_SEED):
+    """
+    生成压力测试映像：第i次写入的值 (lcg32迭代i次的低16位) 放在字地址 i*STRESS_STRIDE 处
+    
+    Returns:
+        bytes，按字地址排列的小端16位字
+    """
+    values = lcgStream(seed, test_size_words)
+    mask = test_size_words - 1
+    if np is not None:
+        positions = (np.arange(test_size_words, dtype=np.uint64) * STRESS_STRIDE) & mask
+        image = np.empty(test_size_words, dtype="<u2")
+        image[positions] = np.frombuffer(values, dtype="<u2")
+        return image.tobytes()
+    
+    image = bytearray(test_size_words * 2)
+    for i in range(test_size_words):
+        pos = (i * STRESS_STRIDE) & mask
+        image[pos * 2:pos * 2 + 2] = values[i * 2:i * 2 + 2]
+    return bytes(image)
+
+def sdram_stress_test_bulk(max_size_mb=4, progress_callback=None, checkpoint=None):
+    """
+    SDRAM压力测试 - 批量模式
+    
+    写入与逐字模式相同的测试映像 (步长22541的地址排列和lcg32数据序列)，但按地址顺序
+    以STRESS_DELAY个字 (1KB) 为一段批量写入，每写入一段就读回校验前一段：每个字在校验前
+    经过512到1023次其它写入，与逐字模式的512次延迟相当；全部写完后再校验最后一段。
+    失败时换算回逐字模式中的序号和地址，报告与逐字模式相同的结果：
+    逐字模式最后512次写入不做校验，批量模式同样忽略这些字。
+    
+    Args:
+        max_size_mb: 最大测试大小(MB)，默认4MB
+        progress_callback: 进度回调函数
+        checkpoint: TestCheckpoint，每CHECKPOINT_SEGMENT字节保存一次最后写入而尚未校验的段的偏移和差异字；
+            续测时重新写入这一段再继续
+    
+    Returns:
+        测试结果: 成功返回True，失败返回负数表示失败位置 (与逐字模式相同)
+    """
+    print(f"\n--- SDRAM压力测试 (测试范围: {max_size_mb}MB, 批量模式) ---")
+    
+    test_size_words = max_size_mb * 1024 * 1024 // 2  # 转换为16位字数量
+    test_size_bytes = test_size_words * 2
+    window = STRESS_DELAY * 2  # 每段字节数，校验落后写入一段
+    
+    print(f"开始压力测试，测试{test_size_words}个16位字...")
+    print("测试模式: 写入随机数据，延迟验证，批量传输")
+    
+    start_time = time.time()
+    
+    try:
+        image = stressImage(test_size_words)
+        addr = 0
+        # 续测时带上断点中保存的差异字
+        mismatches = [tuple(error) for error in checkpoint.errors] if checkpoint is not None else []
+        if checkpoint is not None and checkpoint.resumed:
+            addr = checkpoint.state["offset"]
+            print(f"从 0x{addr:08X} 继续 (之前的数据已校验，重新写入这一段)")
+        verified = addr  # 续测时这之前的段已校验
+        
+        def checkReads(reads):
+            """等待验证读的应答，返回差异字 (字节地址, 期望值, 实际值)"""
+            found = []
+            for offset, pending in reads:
+                actual = pending.result()
+                for word in findMismatchWords(memoryview(image)[offset:offset + window], actual):
+                    found.append((offset + word * 2, struct.unpack_from("<H", image, offset + word * 2)[0],
+                                  struct.unpack_from("<H", actual, word * 2)[0]))
+            return found
+        
+        while addr < test_size_bytes:
+            end = min((addr // CHECKPOINT_SEGMENT + 1) * CHECKPOINT_SEGMENT, test_size_bytes)
+            reads = []
+            for offset in range(addr, end, window):
+                writeRom(offset >> 1, image[offset:offset + window])
+                if offset - window >= verified:
+                    reads.append((offset - window, readRomAsync((offset - window) >> 1, window)))
+            flushCommands()
+            
+            found = checkReads(reads)
+            mismatches.extend(found)
+            addr = end
+            if checkpoint is not None:
+                checkpoint.update(errors=found, offset=addr - window)
+            
+            elapsed = time.time() - start_time
+            print(f"进度: {addr / test_size_bytes * 100:.1f}% ({addr // 2}/{test_size_words}), 用时: {elapsed:.1f}秒")
+            if progress_callback and progress_callback(addr >> 17, test_size_bytes >> 17):
+                print("测试被用户中断")
+                return True
+        
+        # 最后一段没有后续写入触发校验，写完后单独读回
+        last = test_size_bytes - window
+        mismatches.extend(checkReads([(last, readRomAsync(last >> 1, window))]))
+        if checkpoint is not None:
+            checkpoint.clear()
+        
+        # 逐字模式中只有前 (N - 512) 次写入被校验，取序号最小的失败
+        inverse = pow(STRESS_STRIDE, -1, test_size_words)
+        failures = []
+        for prev_addr, expected_value, actual_value in mismatches:
+            index = ((prev_addr // 2) * inverse) & (test_size_words - 1)
+            if index < test_size_words - STRESS_DELAY:
+                failures.append((index, prev_addr, expected_value, actual_value))
+        
+        if failures:
+            index, prev_addr, expected_value, actual_value = min(failures)
+            prev_pos = prev_addr // 2
+            print(f"✗ 验证失败在位置 {prev_pos} (0x{prev_addr:08X})")
+            print(f"    期望: 0x{expected_value:04X}, 实际: 0x{actual_value:04X}")
+            print(f"    XOR差异: 0x{expected_value ^ actual_value:04X}")
+            diagnoseMismatches([failure[1:] for failure in failures], 0, image)
+            return -(index + STRESS_DELAY)  # 返回负的失败位置 (逐字模式中校验该字时的写入序号)
+        
         elapsed_time = time.time() - start_time
         print(f"✓ SDRAM压力测试完成! 用时: {elapsed_time:.1f}秒")
         print(f"   测试了 {test_size_words} 个16位字 ({test_size_bytes/1024/1024:.1f}MB)")
@@ -738,8 +2758,14 @@ def sdram_stress_test(max_size_mb=4, progress_callback=None):
         traceback.print_exc()
         return False
 
-def runMemoryTests(start_addr = 0x00000000):
-    """运行完整的内存测试"""
+def runMemoryTests(start_addr = 0x00000000, checkpoint=None):
+    """
+    运行完整的内存测试
+    
+    Args:
+        start_addr: 起始地址
+        checkpoint: TestCheckpoint，记录已完成的模式数和通过数，以及当前模式的进度 (见testMemoryPattern)
+    """
     print("\n=== SuperChis SDRAM 测试 ===")
     
     test_size = 1 * 1024 * 1024  # 测试1MB
@@ -754,10 +2780,18 @@ def runMemoryTests(start_addr = 0x00000000):
     
     passed = 0
     total = len(tests)
+    first = 0
+    if checkpoint is not None and checkpoint.resumed:
+        first, passed = checkpoint.state.get("pattern", 0), checkpoint.state.get("passed", 0)
+        print(f"跳过已完成的 {first} 个模式 (通过 {passed} 个)")
     
-    for pattern_name, pattern_func in tests:
-        if testMemoryPattern(start_addr, test_size, pattern_name, pattern_func):
+    for i, (pattern_name, pattern_func) in enumerate(tests[first:], first):
+        if testMemoryPattern(start_addr, test_size, pattern_name, pattern_func, checkpoint):
             passed += 1
+        if checkpoint is not None:
+            checkpoint.advance(pattern=i + 1, passed=passed)
+    if checkpoint is not None:
+        checkpoint.clear()
     
     print(f"\n=== 测试结果 ===")
     print(f"通过: {passed}/{total}")
@@ -769,16 +2803,456 @@ def runMemoryTests(start_addr = 0x00000000):
     
     return passed == total
 
-def connectDevice():
-    """连接烧卡器设备"""
-    print("正在寻找烧卡器...")
-    portName = None
-    comports = serial.tools.list_ports.comports()
-    
-    for port in comports:
-        if port.vid == 0x0483 and port.pid == 0x0721:
-            portName = port.device
+# March测试: 每个元素为 "顺序(操作,...)"，⇑地址递增、⇓地址递减、⇕任意顺序 (按递增执行)；
+# r0/r1为读出并校验背景/反背景，w0/w1为写入背景/反背景。
+# 读写混合的元素逐字执行全部操作后再处理下一个字 (见marchElement)
+MARCH_ELEMENTS = {
+    "mats+": ("⇕(w0)", "⇑(r0,w1)", "⇓(r1,w0)"),
+    "march-c-": ("⇕(w0)", "⇑(r0,w1)", "⇑(r1,w0)", "⇓(r0,w1)", "⇓(r1,w0)", "⇕(r0)"),
+    "checkerboard": ("⇕(w0)", "⇕(r0)", "⇕(w1)", "⇕(r1)"),
+}
+# 背景: (行列奇偶相同的字, 奇偶不同的字)；-inv变体为取反的背景
+MARCH_BACKGROUNDS = {
+    "mats+": (0x0000, 0x0000),
+    "march-c-": (0x0000, 0x0000),
+    "checkerboard": (0x5555, 0xAAAA),
+}
+MARCH_TESTS = tuple(name + suffix for name in MARCH_ELEMENTS for suffix in ("", "-inv"))
+MARCH_DEFAULT = ("march-c-", "checkerboard")
+MARCH_PROGRESS_INTERVAL = 5.0  # 进度和预计剩余时间的打印间隔 (秒)
+MARCH_WORD_BATCH = 2048        # 读写混合元素每次提交的字数 (每字每个操作一个单字帧)
+
+def parseMarchElement(text):
+    """
+    解析March元素
+
+    Returns:
+        (是否递减, [(操作 'r'/'w', 是否反背景), ...])
+    """
+    order, ops = text[0], text[2:-1].split(",")
+    return order == "⇓", [(op[0], op[1] == "1") for op in ops]
+
+def marchBackground(name, inverted=False):
+    """
+    March测试背景在一个128KB窗口内的数据
+
+    窗口是SDRAM行 (1KB) 的整数倍，帧不跨越窗口，因此任意帧的期望数据都是模板的一个切片。
+    棋盘背景按 (列 ^ 行) 的奇偶交替，相邻的字在行内和行间都相反。
+    """
+    base = name[:-4] if name.endswith("-inv") else name
+    even, odd = MARCH_BACKGROUNDS[base]
+    if name.endswith("-inv") != inverted:
+        even, odd = even ^ 0xFFFF, odd ^ 0xFFFF
+    row_words = SDRAM_ROW_BYTES // 2
+    row_even = struct.pack("<HH", even, odd) * (row_words // 2)
+    row_odd = struct.pack("<HH", odd, even) * (row_words // 2)
+    return (row_even + row_odd) * (BUS_WINDOW_BYTES // (2 * SDRAM_ROW_BYTES))
+
+def marchImage(name, start_addr, length, inverted=False):
+    """March测试背景 (或反背景) 在一段地址上的期望数据"""
+    template = marchBackground(name, inverted)
+    offset = start_addr % BUS_WINDOW_BYTES
+    return (template * -(-(offset + length) // BUS_WINDOW_BYTES))[offset:offset + length]
+
+def _marchWindows(start_addr, length, descending=False):
+    """按执行顺序返回测试范围内的128KB窗口 [(起始地址, 结束地址)]"""
+    end_addr = start_addr + length
+    windows = []
+    addr = start_addr
+    while addr < end_addr:
+        window_end = min(end_addr, addr - addr % BUS_WINDOW_BYTES + BUS_WINDOW_BYTES)
+        windows.append((addr, window_end))
+        addr = window_end
+    if descending:
+        windows.reverse()
+    return windows
+
+def _marchWords(addr, words, descending):
+    """一段逐字读写的字地址 (按执行顺序) 和它们在128KB背景模板中的字节偏移"""
+    if np is not None:
+        word = np.arange(addr >> 1, (addr >> 1) + words, dtype=np.uint32)
+        if descending:
+            word = word[::-1]
+        return word, (word.astype(np.int64) * 2) % BUS_WINDOW_BYTES
+    word = range(addr >> 1, (addr >> 1) + words)
+    if descending:
+        word = word[::-1]
+    return word, [w * 2 % BUS_WINDOW_BYTES for w in word]
+
+def _marchWordFrames(addr, words, ops, backgrounds, descending):
+    """
+    构造读写混合元素的逐字命令帧
+
+    每个字依次是元素中每个操作的单字帧 (读帧的应答为2字节状态和2字节数据，写帧的应答为1字节)，
+    递减元素的字按地址从高到低排列。所有帧合并为一次提交，与writeRomBurst相同。
+
+    Returns:
+        (命令帧, 应答字节数, 数据字节数)
+    """
+    word, offsets = _marchWords(addr, words, descending)
+    if np is not None:
+        frames = np.zeros((words, len(ops), 11), dtype=np.uint8)
+        frames[:, :, 0] = 11
+        for k, (op, inverted) in enumerate(ops):
+            if op == "r":
+                frames[:, k, 2] = 0xf6
+                frames[:, k, 3:7] = (word << 1).astype("<u4").view(np.uint8).reshape(-1, 4)
+                frames[:, k, 7] = 2
+            else:
+                template = np.frombuffer(backgrounds[inverted], dtype=np.uint8)
+                frames[:, k, 2] = 0xf5
+                frames[:, k, 3:7] = word.astype("<u4").view(np.uint8).reshape(-1, 4)
+                frames[:, k, 7] = template[offsets]
+                frames[:, k, 8] = template[offsets + 1]
+        frame = frames.tobytes()
+    else:
+        frame = bytearray(words * len(ops) * 11)
+        pos = 0
+        for w, offset in zip(word, offsets):
+            for op, inverted in ops:
+                if op == "r":
+                    struct.pack_into("<HBIH2x", frame, pos, 11, 0xf6, w << 1, 2)
+                else:
+                    struct.pack_into("<HBI2s2x", frame, pos, 11, 0xf5, w, backgrounds[inverted][offset:offset + 2])
+                pos += 11
+    reads = sum(op == "r" for op, _ in ops)
+    return frame, words * (4 * reads + len(ops) - reads), words * len(ops) * 2
+
+def _marchWordCheck(response, addr, words, ops, backgrounds, descending, mismatches):
+    """
+    校验逐字读写的应答 (布局见_marchWordFrames)
+
+    Returns:
+        出错的字数
+    """
+    word, offsets = _marchWords(addr, words, descending)
+    per_word = sum(4 if op == "r" else 1 for op, _ in ops)
+    errors = 0
+    pos = 0
+    for op, inverted in ops:
+        if op == "w":
+            pos += 1
+            continue
+        found = mismatches[inverted]
+        if np is not None:
+            data = np.frombuffer(response, dtype=np.uint8).reshape(words, per_word)
+            got = data[:, pos + 2].astype(np.uint16) | (data[:, pos + 3].astype(np.uint16) << 8)
+            want = np.frombuffer(backgrounds[inverted], dtype="<u2")[offsets // 2]
+            bad = np.flatnonzero(got != want)
+            errors += len(bad)
+            for i in bad[:max(0, VERIFY_MAX_MISMATCHES - len(found))]:
+                found.append((int(word[i]) * 2, int(want[i]), int(got[i])))
+        else:
+            for i, (w, offset) in enumerate(zip(word, offsets)):
+                got = struct.unpack_from("<H", response, i * per_word + pos + 2)[0]
+                want = struct.unpack_from("<H", backgrounds[inverted], offset)[0]
+                if got != want:
+                    errors += 1
+                    if len(found) < VERIFY_MAX_MISMATCHES:
+                        found.append((w * 2, want, got))
+        pos += 4
+    return errors
+
+def marchElement(start_addr, length, element, backgrounds, tuner, mismatches, progress=None, skip=0):
+    """
+    执行一个March元素
+
+    同时有读和写的元素逐字执行：每个字依次发送元素中每个操作的单字帧 (如 ⇑(r0,w1) 对每个字先读后写，
+    再处理下一个字)，递减元素的字地址从高到低，与March记法一致，能检测同一行内字之间的耦合故障。
+    多个字的帧合并为一次提交，读出的应答到达后再校验，不需要逐字往返；代价是每个字的每个操作
+    约16字节的帧头和应答，比批量帧慢数倍。
+    只读或只写的元素中各字之间没有依赖，按批量帧传输，帧大小由调节器选择，帧内地址递增。
+    测试范围按128KB窗口推进，递减元素从高地址的窗口开始。
+
+    Args:
+        element: MARCH_ELEMENTS中的元素文本
+        backgrounds: (背景模板, 反背景模板)，marchBackground的结果
+        tuner: ChunkTuner (批量帧使用)
+        mismatches: (背景读出的差异, 反背景读出的差异) 两个列表，追加 (字节地址, 期望值, 实际值)，
+            每个最多VERIFY_MAX_MISMATCHES个
+        progress: 进度回调 progress(本元素已完成的字节数, 本次出错的字数)，每个窗口后调用，返回True时中止
+        skip: 按执行顺序跳过的字节数 (断点续测时已完成的窗口)
+
+    Returns:
+        本次出错的字数，中止时为None
+    """
+    descending, ops = parseMarchElement(element)
+    per_word = len({op for op, _ in ops}) > 1
+    errors = 0
+    done = 0
+
+    for window_start, window_end in _marchWindows(start_addr, length, descending):
+        if done < skip:
+            done += window_end - window_start
+            continue
+        size = MARCH_WORD_BATCH * 2 if per_word else tuner.next()
+        chunks = []
+        addr = window_start
+        while addr < window_end:
+            chunk = min(size, window_end - addr) if per_word else _chunkLength(addr, size, window_end - addr)
+            chunks.append((addr, chunk))
+            addr += chunk
+        if descending:
+            chunks.reverse()
+
+        start_time = time.perf_counter()
+        reads = []  # (差异列表, 字节地址, 期望数据, PendingFrame)
+        batches = []  # (字节地址, 长度, PendingFrame)
+        for addr, chunk in chunks:
+            if per_word:
+                frame, response_len, payload_len = _marchWordFrames(addr, chunk // 2, ops, backgrounds, descending)
+                batches.append((addr, chunk, getPipeline().submit(frame, 0xf6, addr >> 1, response_len,
+                                                                  payload_len=payload_len)))
+                continue
+            offset = addr % BUS_WINDOW_BYTES
+            for op, inverted in ops:
+                want = backgrounds[inverted][offset:offset + chunk]
+                if op == "r":
+                    reads.append((mismatches[inverted], addr, want, readRomAsync(addr >> 1, chunk)))
+                else:
+                    writeRom(addr >> 1, want)
+        flushCommands()
+        if not per_word:
+            tuner.record(size, (window_end - window_start) * len(ops), time.perf_counter() - start_time)
+
+        for addr, chunk, pending in batches:
+            errors += _marchWordCheck(pending.result(), addr, chunk // 2, ops, backgrounds, descending, mismatches)
+        for found, addr, want, pending in reads:
+            actual = pending.result()
+            if actual == want:
+                continue
+            words = findMismatchWords(want, actual)
+            errors += len(words)
+            for word in words[:max(0, VERIFY_MAX_MISMATCHES - len(found))]:
+                found.append((addr + word * 2, struct.unpack_from("<H", want, word * 2)[0],
+                              struct.unpack_from("<H", actual, word * 2)[0]))
+        done += window_end - window_start
+        if progress and progress(done, errors):
+            return None
+    return errors
+
+def _marchRetained(name, element, done, start_addr, length):
+    """
+    断点续测前恢复中断时正在执行的窗口，并抽样检查卡带上的数据是否仍是中断时的状态
+
+    断点在每个窗口后保存，中断时只有下一个窗口可能执行了一部分，把它重新写为该元素执行前的背景。
+    当前元素已完成的部分应为该元素最后写入的背景，其余部分为之前元素最后写入的背景。
+    """
+    base = name[:-4] if name.endswith("-inv") else name
+    elements = MARCH_ELEMENTS[base]
+    if element >= len(elements):
+        return True
+    before = None
+    for text in elements[:element]:
+        for op, inverted in parseMarchElement(text)[1]:
+            if op == "w":
+                before = inverted
+    descending, ops = parseMarchElement(elements[element])
+    if before is not None and done < length:
+        window_start, window_end = _marchWindows(start_addr + done if not descending else start_addr,
+                                                 length - done, descending)[0]
+        bulkWrite(window_start, marchImage(name, window_start, window_end - window_start, before))
+    after = before
+    for op, inverted in ops:
+        if op == "w":
+            after = inverted
+    if descending:
+        regions = ((start_addr + length - done, done, after), (start_addr, length - done, before))
+    else:
+        regions = ((start_addr, done, after), (start_addr + done, length - done, before))
+    for addr, size, inverted in regions:
+        if size and inverted is not None:
+            expected = marchImage(name, addr, size, inverted)
+            _restoreMagicWord(addr, expected)
+            if not _sampleRetained(addr, expected):
+                return False
+    return True
+
+def marchTest(name, start_addr=0, length=deviceSize, tuner=None, progress=None, checkpoint=None):
+    """
+    对一段SDRAM运行一个March测试
+
+    Args:
+        name: MARCH_TESTS中的测试名
+        start_addr: 起始字节地址 (偶数)
+        length: 测试字节数
+        tuner: ChunkTuner，默认新建 (读写混合流量单独测量帧大小)
+        progress: 进度回调 progress(已完成的操作字节数, 总操作字节数)，返回True时中止
+        checkpoint: TestCheckpoint，每个窗口后在state["march"]中保存元素序号、元素内的进度和
+            每个元素的错误数；续测时从中断的窗口继续
+
+    Returns:
+        dict: name、errors (每个元素出错的字数)、mismatches (背景和反背景读出的差异，见marchElement)、
+              bytes (本次传输的数据量)、seconds、aborted
+    """
+    base = name[:-4] if name.endswith("-inv") else name
+    elements = MARCH_ELEMENTS[base]
+    backgrounds = (marchBackground(name), marchBackground(name, inverted=True))
+    tuner = tuner or ChunkTuner()
+    invalidateManifest([(start_addr, length)])
+    counts = [len(parseMarchElement(element)[1]) for element in elements]
+    total = sum(counts) * length
+    result = {"name": name, "errors": [], "mismatches": ([], []), "bytes": 0, "seconds": 0.0, "aborted": False}
+    first, skip, prior = 0, 0, 0
+
+    state = checkpoint.state.get("march") if checkpoint is not None else None
+    if state is not None:
+        if _marchRetained(name, state["element"], state["done"], start_addr, length):
+            first, skip, prior = state["element"], state["done"], state["element_errors"]
+            result["errors"] = list(state["errors"])
+            for addr, want, got, inverted in checkpoint.errors:
+                result["mismatches"][inverted].append((addr, want, got))
+            print(f"从第 {first + 1} 个元素 {elements[first] if first < len(elements) else ''} "
+                  f"的 {skip / 1024**2:.1f}MB 处继续")
+        else:
+            print("卡带上的数据与断点不一致 (卡带可能断电)，从第一个元素重新开始")
+            checkpoint.state.pop("march")
+            checkpoint.errors = []
+    saved = [len(found) for found in result["mismatches"]]
+
+    def save(element, done, element_errors):
+        new = [(*error, inverted) for inverted, found in enumerate(result["mismatches"])
+               for error in found[saved[inverted]:]]
+        saved[:] = [len(found) for found in result["mismatches"]]
+        checkpoint.update(errors=new, march={"element": element, "done": done, "element_errors": element_errors,
+                                             "errors": result["errors"]})
+
+    start_time = time.time()
+    if progress:
+        progress(sum(counts[:first]) * length + skip * counts[first] if first < len(elements) else total, total)
+    for index in range(first, len(elements)):
+        ops = counts[index]
+        base_done = sum(counts[:index]) * length
+        before = prior
+
+        def report(done, errors):
+            if checkpoint is not None:
+                save(index, done, before + errors)
+            return progress(base_done + done * ops, total) if progress else False
+
+        errors = marchElement(start_addr, length, elements[index], backgrounds, tuner, result["mismatches"],
+                              report, skip)
+        if errors is None:
+            result["aborted"] = True
             break
+        result["errors"].append(prior + errors)
+        result["bytes"] += (length - skip) * ops
+        skip = prior = 0
+        if checkpoint is not None:
+            save(index + 1, 0, 0)
+    result["seconds"] = time.time() - start_time
+    return result
+
+def _etaPrinter(label, interval=MARCH_PROGRESS_INTERVAL):
+    """
+    返回每隔interval秒打印进度和预计剩余时间的回调
+
+    第一次调用的进度作为起点 (续测时跳过的部分不计入速度)。
+    """
+    state = {"start": None, "base": 0, "next": 0.0}
+    def report(done, total):
+        now = time.time()
+        if state["start"] is None:
+            state.update(start=now, base=done, next=now + interval)
+            return
+        if now >= state["next"] or done >= total:
+            elapsed = now - state["start"]
+            rate = (done - state["base"]) / max(elapsed, 1e-9)
+            eta = (total - done) / rate if rate else 0
+            print(f"{label}: {done / total * 100:.1f}%，已用 {elapsed:.1f}秒，预计剩余 {eta:.1f}秒，"
+                  f"{rate / 1024**2:.2f} MB/s")
+            state["next"] = now + interval
+    return report
+
+def runMarchTests(names=MARCH_DEFAULT, start_addr=0, length=None, checkpoint=None):
+    """
+    运行March测试 (读写混合的元素逐字执行，只读或只写的元素批量流读写)
+
+    Args:
+        names: MARCH_TESTS中的测试名列表
+        start_addr: 起始字节地址
+        length: 测试字节数，默认到deviceSize结束
+        checkpoint: TestCheckpoint，记录已完成的测试数和通过数，以及当前测试的进度 (见marchTest)
+
+    Returns:
+        全部通过时为True
+    """
+    if length is None:
+        length = deviceSize - start_addr
+    if start_addr % 2 or length % 2 or length <= 0 or start_addr + length > deviceSize:
+        raise ValueError(f"March测试范围无效: 0x{start_addr:08X} + 0x{length:X}")
+
+    print("\n=== SuperChis SDRAM March测试 ===")
+    print(f"地址范围: 0x{start_addr:08X} - 0x{start_addr + length - 1:08X} ({length / 1024**2:.2f}MB)")
+    tuner = ChunkTuner()
+    passed = 0
+    first = 0
+    if checkpoint is not None and checkpoint.resumed:
+        first, passed = checkpoint.state.get("test", 0), checkpoint.state.get("passed", 0)
+        print(f"跳过已完成的 {first} 个测试 (通过 {passed} 个)")
+    for i, name in enumerate(names[first:], first):
+        base = name[:-4] if name.endswith("-inv") else name
+        print(f"\n--- {name}: {{{'; '.join(MARCH_ELEMENTS[base])}}} ---")
+        result = marchTest(name, start_addr, length, tuner, _etaPrinter(f"{name} 进度"), checkpoint)
+        for element, errors in zip(MARCH_ELEMENTS[base], result["errors"]):
+            print(f"  {'✓' if not errors else '✗'} {element}" + (f": {errors} 个字出错" if errors else ""))
+        rate = result["bytes"] / max(result["seconds"], 1e-9) / 1024**2
+        print(f"用时: {result['seconds']:.1f}秒，传输 {result['bytes'] / 1024**2:.1f}MB，{rate:.2f} MB/s")
+        inverted = len(result["mismatches"][1]) > len(result["mismatches"][0])
+        if result["mismatches"][inverted]:
+            # 同一个字在多个元素中读出，每个地址只取一次；两种背景下的故障表现不同，取差异较多的一种
+            found = {addr: (addr, want, got) for addr, want, got in result["mismatches"][inverted]}
+            diagnoseMismatches(list(found.values()), start_addr, marchImage(name, start_addr, length, inverted))
+        if not result["aborted"] and not any(result["errors"]):
+            print(f"✓ {name} 测试通过!")
+            passed += 1
+        else:
+            print(f"✗ {name} 测试失败! 发现 {sum(result['errors'])} 个错误")
+        if checkpoint is not None:
+            checkpoint.advance(test=i + 1, passed=passed)
+    if checkpoint is not None:
+        checkpoint.clear()
+
+    print(f"\n=== March测试结果 ===")
+    print(f"通过: {passed}/{len(names)}")
+    return passed == len(names)
+
+BURNER_VID = 0x0483  # 烧卡器USB VID
+BURNER_PID = 0x0721  # 烧卡器USB PID
+SIM_PORT_PREFIX = "sim://"
+
+def findDevices():
+    """返回所有已连接烧卡器的串口名"""
+    return [port.device for port in serial.tools.list_ports.comports()
+            if port.vid == BURNER_VID and port.pid == BURNER_PID]
+
+def connectDevice(simulate=False, sim_latency=0.001, sim_bandwidth=1_000_000, port_name=None):
+    """
+    连接烧卡器设备
+    
+    Args:
+        simulate: 使用simcart模拟的烧卡器和卡带代替真实硬件
+        sim_latency: 模拟的USB往返延迟 (秒)
+        sim_bandwidth: 模拟的链路带宽 (字节/秒)
+        port_name: 指定串口 (以sim://开头表示模拟设备)，默认使用找到的第一个烧卡器
+    """
+    if simulate or (port_name and port_name.startswith(SIM_PORT_PREFIX)):
+        import simcart
+        ser = simcart.SimulatedBurner(latency=sim_latency, bandwidth=sim_bandwidth)
+        ser.cart.sd = simcart.SimulatedSdCard()
+        if port_name:
+            ser.port = port_name
+        ser.open()
+        ser.dtr = True
+        ser.dtr = False
+        print(f"使用模拟烧卡器: {ser.port}")
+        return ser
+    
+    portName = port_name
+    if portName is None:
+        print("正在寻找烧卡器...")
+        devices = findDevices()
+        portName = devices[0] if devices else None
     
     if portName is None:
         print("找不到烧卡器")
@@ -800,84 +3274,314 @@ def connectDevice():
         print(f"连接烧卡器失败: {e}")
         return None
 
-# 主程序
-if __name__ == "__main__":
-    print("=== SuperChis 烧卡器测试程序 ===")
-    print("功能:")
-    print("1. 解锁SuperChis芯片")
-    print("2. 配置SDRAM模式")
-    print("3. 基础读写测试")
-    print("4. 完整SDRAM测试")
-    print("5. 数据完整性校验")
-    print()
+def runCartTests(stress=None, full=None, stress_mb=1, stress_bulk=False, retention=SDRAM_RETENTION_WAIT,
+                 march=None, march_start=0, march_length=None, resume=False):
+    """
+    对当前连接的卡带运行完整测试流程：解锁、SDRAM验证、基础读写、写保护、
+    SDRAM压力测试、March测试和完整内存测试
     
-    # 连接设备
-    ser = connectDevice()
-    if ser is None:
-        exit()
+    Args:
+        stress: 是否运行SDRAM压力测试，None时交互询问
+        full: 是否运行完整内存测试，None时交互询问
+        stress_mb: SDRAM压力测试范围 (MB)
+        stress_bulk: SDRAM压力测试使用批量模式
+        retention: SDRAM验证的数据保持时间 (秒)
+        march: March测试名列表 (MARCH_TESTS)，None或空表示不运行
+        march_start: March测试的起始字节地址
+        march_length: March测试的字节数，默认到deviceSize结束
+        resume: 压力测试、March测试和完整内存测试从上次中断时保存的断点继续 (参数相同时)；
+            续测时跳过会改写SDRAM的SDRAM验证、基础读写和写保护测试，以免破坏断点之后尚未校验的数据
+        
+    Returns:
+        各阶段结果 {阶段名: True/False}，按执行顺序排列；前置阶段失败时后续阶段不运行
+    """
+    results = {}
     
-    try:
-        # 执行解锁序列
-        set_sc_mode(sdram=0, sd_enable=0, write_enable=0)
-        header = readRom(0xA0>>1, 10)
-        set_sc_mode(sdram=1, sd_enable=0, write_enable=1)
-        headerSDRAM = readRom(0xA0>>1, 10)
-        print(header, headerSDRAM)
-        if header == headerSDRAM:
+    # 执行解锁序列
+    set_sc_mode(sdram=0, sd_enable=0, write_enable=0, force=True)
+    header = readHeader()
+    set_sc_mode(sdram=1, sd_enable=0, write_enable=1)
+    # 轮询直到SDRAM映射下的ROM头与Flash不同，而不是固定等待
+    headerSDRAM = waitHeaderChange(header)
+    print(header, headerSDRAM)
+    if headerSDRAM is None and resume:
+        # 上次测试留在SDRAM中的数据可能恰好与Flash的ROM头相同，由断点的抽样检查确认卡带上的数据
+        print("续测: SDRAM映射下的ROM头与Flash相同，无法据此确认解锁，由断点的抽样检查确认数据")
+    else:
+        results["解锁"] = headerSDRAM is not None
+        if not results["解锁"]:
             print("配置未生效，可能烧卡器未正确连接或配置")
-            exit(-1)
-        else:
-            print("SuperChis SDRAM解锁成功，配置已生效")
-        print("\n等待配置生效...")
-        time.sleep(0.1)
-        
+            return results
+        print("SuperChis SDRAM解锁成功，配置已生效")
+    
+    if resume:
+        print("续测: 跳过SDRAM验证、基础读写和写保护测试 (它们会改写断点之后尚未校验的数据)")
+    else:
         # 验证解锁是否成功
-        if not verifySDRAM():
+        results["SDRAM验证"] = verifySDRAM(retention)
+        if not results["SDRAM验证"]:
             print("\n解锁验证失败，运行详细诊断...")
             diagnoseSuperChis()
-            exit(-1)
+            return results
         
         # 基础读写测试
-        if not testBasicReadWrite(0x0000000) or not testBasicReadWrite(0x1000000):
+        results["基础读写"] = testBasicReadWrite(0x0000000) and testBasicReadWrite(0x1000000)
+        if not results["基础读写"]:
             print("基础测试失败，跳过完整测试")
-            exit(-1)
+            return results
         
         # 测试写保护
-        if not testWriteProtection(0x00002000) or not testWriteProtection(0x1002000):
+        results["写保护"] = testWriteProtection(0x00002000) and testWriteProtection(0x1002000)
+        if not results["写保护"]:
             print("写保护测试失败")
-            exit(-1)
-            
-        # SDRAM压力测试
-        print("\n准备运行SDRAM压力测试...")
+            return results
+        
+    # SDRAM压力测试
+    print("\n准备运行SDRAM压力测试...")
+    if stress is None:
         choice = input("是否运行SDRAM压力测试? (推荐，验证数据完整性) [Y/n]: ").lower()
+        stress = choice in ['y', 'yes']
+    
+    if stress:
+        # 运行SDRAM压力测试
+        set_sc_mode(sdram=1, sd_enable=0, write_enable=1, settle=MODE_SETTLE)
         
-        if choice in ['y', 'yes']:
-            # 运行SDRAM压力测试
-            set_sc_mode(sdram=1, sd_enable=0, write_enable=1)
-            time.sleep(0.1)
-            
-            stress_result = sdram_stress_test(max_size_mb=1)
+        checkpoint = TestCheckpoint.load(burnerId(), "stress", {"mb": stress_mb, "bulk": stress_bulk}, resume)
+        stress_result = sdram_stress_test(max_size_mb=stress_mb, bulk=stress_bulk, checkpoint=checkpoint)
+        results["压力测试"] = stress_result == True
+        
+        if stress_result == True:
+            print("✓ SDRAM压力测试通过！数据完整性良好。")
+        else:
+            print(f"✗ SDRAM压力测试失败！问题位置: {stress_result}")
+    
+    if march:
+        set_sc_mode(sdram=1, sd_enable=0, write_enable=1)
+        checkpoint = TestCheckpoint.load(burnerId(), "march", {"names": list(march), "start": march_start,
+                                                              "length": march_length}, resume)
+        results["March测试"] = runMarchTests(march, march_start, march_length, checkpoint)
             
-            if stress_result == True:
-                print("✓ SDRAM压力测试通过！数据完整性良好。")
-            else:
-                print(f"✗ SDRAM压力测试失败！问题位置: {stress_result}")
-                
-        # 询问是否运行完整测试
-        print("\n基础测试通过!")
+    # 询问是否运行完整测试
+    print("\n基础测试通过!")
+    if full is None:
         choice = input("是否运行完整的内存测试? (可能需要几分钟) [y/N]: ").lower()
+        full = choice in ['y', 'yes']
+    
+    if full:
+        # 运行完整内存测试
+        set_sc_mode(sdram=1, sd_enable=0, write_enable=1)
+        success = runMemoryTests(checkpoint=TestCheckpoint.load(burnerId(), "memory", {"start": 0}, resume))
+        results["完整内存测试"] = success
         
-        if choice in ['y', 'yes']:
-            # 运行完整内存测试
+        if success:
+            print("\n🎉 所有测试通过！SuperChis工作正常。")
+        else:
+            print("\n❌ 完整测试失败，请检查硬件连接。")
+    else:
+        print("\n跳过完整测试。基础功能正常。")
+    
+    return results
+
+def _fleetWorker(port_name, options):
+    """
+    批量测试子进程：在独立进程中连接一个烧卡器并运行完整测试
+    
+    每个进程有自己的模块全局状态 (ser、命令流水线等)，输出写入该端口的日志文件。
+    """
+    global ser
+    os.makedirs(options["log_dir"], exist_ok=True)
+    log_name = port_name.replace(SIM_PORT_PREFIX, "sim_").replace("/", "_").replace("\\", "_").strip("_")
+    log_path = os.path.join(options["log_dir"], f"{log_name}.log")
+    report = {"port": port_name, "results": {}, "error": None, "log": log_path}
+    start_time = time.time()
+    commandStats.reset()
+    
+    with open(log_path, "w", encoding="utf-8") as log, contextlib.redirect_stdout(log):
+        ser = None
+        try:
+            ser = connectDevice(options["simulate"], options["sim_latency"],
+                                options["sim_bandwidth"], port_name=port_name)
+            if ser is None:
+                report["results"]["连接"] = False
+            else:
+                report["results"] = runCartTests(stress=options["stress"], full=options["full"],
+                                                 stress_mb=options["stress_mb"],
+                                                 stress_bulk=options["stress_bulk"],
+                                                 retention=options["retention"],
+                                                 march=options["march"],
+                                                 march_start=options["march_start"],
+                                                 march_length=options["march_length"],
+                                                 resume=options["resume"])
+        except Exception as e:
+            import traceback
+            traceback.print_exc(file=log)
+            report["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            if ser is not None:
+                saveManifests()
+                if ser.is_open:
+                    ser.close()
+    
+    report["elapsed"] = time.time() - start_time
+    report["stats"] = commandStats.summary()
+    report["passed"] = report["error"] is None and bool(report["results"]) and all(report["results"].values())
+    return report
+
+def runFleet(ports, stress=False, full=False, stress_mb=1, stress_bulk=False, simulate=False,
+             sim_latency=0.001, sim_bandwidth=1_000_000, log_dir="fleet_logs",
+             retention=SDRAM_RETENTION_WAIT, march=None, march_start=0, march_length=None, resume=False):
+    """
+    同时测试多个烧卡器上的卡带，每个端口一个独立的工作进程
+    
+    Args:
+        ports: 串口名列表
+        stress/full/stress_mb/stress_bulk/retention/march/march_start/march_length/resume: 同runCartTests (不交互询问)
+        simulate/sim_latency/sim_bandwidth: 同connectDevice
+        log_dir: 每个端口的日志和汇总报告 (report.json，含各端口的命令统计) 的输出目录
+        
+    Returns:
+        每个端口的报告列表
+    """
+    options = {
+        "stress": stress, "full": full, "stress_mb": stress_mb, "stress_bulk": stress_bulk,
+        "simulate": simulate, "sim_latency": sim_latency, "sim_bandwidth": sim_bandwidth,
+        "log_dir": log_dir, "retention": retention,
+        "march": march, "march_start": march_start, "march_length": march_length, "resume": resume,
+    }
+    print(f"\n=== 批量测试: {len(ports)} 个烧卡器 ===")
+    for port_name in ports:
+        print(f"  {port_name}")
+    
+    start_time = time.time()
+    with multiprocessing.Pool(len(ports)) as pool:
+        reports = pool.starmap(_fleetWorker, [(port_name, options) for port_name in ports])
+    elapsed = time.time() - start_time
+    
+    print(f"\n=== 批量测试报告 (总用时 {elapsed:.1f}秒) ===")
+    for report in reports:
+        status = "✓ 通过" if report["passed"] else "✗ 失败"
+        failed = [name for name, ok in report["results"].items() if not ok]
+        detail = report["error"] or (", ".join(failed) if failed else "")
+        print(f"{status}  {report['port']:<20} {report['elapsed']:7.1f}秒  {detail}")
+        print(f"        日志: {report['log']}")
+    passed = sum(report["passed"] for report in reports)
+    print(f"通过: {passed}/{len(reports)}")
+    
+    os.makedirs(log_dir, exist_ok=True)
+    with open(os.path.join(log_dir, "report.json"), "w", encoding="utf-8") as f:
+        json.dump(reports, f, ensure_ascii=False, indent=2)
+    return reports
+
+# 主程序
+if __name__ == "__main__":
+    print("=== SuperChis 烧卡器测试程序 ===")
+    print("功能:")
+    print("1. 解锁SuperChis芯片")
+    print("2. 配置SDRAM模式")
+    print("3. 基础读写测试")
+    print("4. 完整SDRAM测试")
+    print("5. 数据完整性校验")
+    print()
+    
+    parser = argparse.ArgumentParser(description="SuperChis 烧卡器测试程序")
+    parser.add_argument("--sim", action="store_true", help="使用模拟烧卡器 (无需硬件)")
+    parser.add_argument("--sim-latency", type=float, default=0.001, help="模拟USB往返延迟 (秒)")
+    parser.add_argument("--sim-bandwidth", type=float, default=1_000_000, help="模拟链路带宽 (字节/秒)")
+    parser.add_argument("--stress-mb", type=int, default=1, help="SDRAM压力测试范围 (MB，2的幂)")
+    parser.add_argument("--stress-bulk", action="store_true", help="SDRAM压力测试使用批量模式")
+    parser.add_argument("--retention", type=float, default=SDRAM_RETENTION_WAIT,
+                        help="SDRAM验证写入后的数据保持时间 (秒，0表示不等待)")
+    parser.add_argument("--stress", action="store_true", default=None, help="运行SDRAM压力测试 (不询问)")
+    parser.add_argument("--full", action="store_true", default=None, help="运行完整内存测试 (不询问)")
+    parser.add_argument("--march", nargs="?", const=",".join(MARCH_DEFAULT),
+                        help=f"运行March测试，逗号分隔 ({', '.join(MARCH_TESTS)}; all为全部)，"
+                             f"不指定时为 {','.join(MARCH_DEFAULT)}")
+    parser.add_argument("--march-start", type=lambda x: int(x, 0), default=0, help="March测试的起始字节地址")
+    parser.add_argument("--march-length", type=lambda x: int(x, 0), help="March测试的字节数 (默认到32MB结束)")
+    parser.add_argument("--resume", action="store_true", help="从上次中断的断点继续长时间测试 (压力、March和完整内存测试)")
+    parser.add_argument("--fleet", action="store_true", help="同时测试所有已连接的烧卡器")
+    parser.add_argument("--sim-carts", type=int, default=2, help="批量模式下模拟的烧卡器数量")
+    parser.add_argument("--fleet-logs", default="fleet_logs", help="批量模式的日志目录")
+    parser.add_argument("--upload", metavar="ROM", help="上传ROM映像到SDRAM后退出")
+    parser.add_argument("--upload-addr", type=lambda x: int(x, 0), default=0, help="ROM映像上传的起始字节地址")
+    parser.add_argument("--incremental", action="store_true", help="增量上传：只写入与卡带清单不同的块")
+    parser.add_argument("--check", choices=["sample", "full", "none"], default="sample",
+                        help="增量上传时未改变块的检查方式")
+    parser.add_argument("--cart-id", help="卡带清单标识 (默认使用烧卡器序列号，同一烧卡器上更换卡带时应指定)")
+    parser.add_argument("--backup-sram", metavar="PATH", help="备份全部SRAM (128KB) 到文件后退出")
+    parser.add_argument("--restore-sram", metavar="PATH", help="从文件恢复SRAM后退出 (内容一致时跳过)")
+    parser.add_argument("--dump-flash", metavar="PATH", help="跨Bank读出Flash到文件后退出")
+    parser.add_argument("--verify-flash", metavar="ROM", help="跨Bank校验Flash内容与映像文件一致后退出")
+    parser.add_argument("--flash-offset", type=lambda x: int(x, 0), default=0, help="Flash起始字节偏移")
+    parser.add_argument("--flash-size", type=lambda x: int(x, 0), default=FLASH_MAX_BYTES,
+                        help="读出的Flash字节数 (默认128MB)")
+    parser.add_argument("--stats", action="store_true", help="结束时打印命令延迟和吞吐量统计")
+    parser.add_argument("--stats-json", metavar="PATH", help="结束时把命令统计写入JSON文件")
+    args = parser.parse_args()
+    march = None
+    if args.march:
+        march = MARCH_TESTS if args.march == "all" else tuple(args.march.split(","))
+        unknown = [name for name in march if name not in MARCH_TESTS]
+        if unknown:
+            parser.error(f"未知的March测试: {', '.join(unknown)}")
+    
+    if args.fleet:
+        if args.sim:
+            ports = [f"{SIM_PORT_PREFIX}{i}" for i in range(args.sim_carts)]
+        else:
+            ports = findDevices()
+        if not ports:
+            print("找不到烧卡器")
+            exit()
+        reports = runFleet(ports, stress=bool(args.stress), full=bool(args.full),
+                           stress_mb=args.stress_mb, stress_bulk=args.stress_bulk,
+                           simulate=args.sim, sim_latency=args.sim_latency,
+                           sim_bandwidth=args.sim_bandwidth, log_dir=args.fleet_logs,
+                           retention=args.retention, march=march, march_start=args.march_start,
+                           march_length=args.march_length, resume=args.resume)
+        exit(0 if all(report["passed"] for report in reports) else -1)
+    
+    # 连接设备
+    ser = connectDevice(args.sim, args.sim_latency, args.sim_bandwidth)
+    if ser is None:
+        exit()
+    commandStats.reset()
+    
+    exit_code = 0
+    try:
+        if args.backup_sram or args.restore_sram:
+            if args.backup_sram and not backupSram(args.backup_sram):
+                exit_code = -1
+            if args.restore_sram and not restoreSram(args.restore_sram):
+                exit_code = -1
+        elif args.dump_flash:
+            start_time = time.time()
+            written = dumpFlash(args.dump_flash, args.flash_size, args.flash_offset,
+                                progress=_progressPrinter("读出进度"))
+            print(f"已读出 {written / 1024**2:.2f}MB 到 {args.dump_flash}，耗时: {time.time() - start_time:.2f}秒")
+        elif args.verify_flash:
+            with mapRomImage(args.verify_flash) as image:
+                result = verifyFlash(args.flash_offset, image, progress=_progressPrinter("校验进度"))
+            printVerifyResult(result)
+            print("✓ Flash校验通过" if result.ok else f"✗ Flash校验失败: {len(result.bad_blocks)} 个块不一致")
+            if not result.ok:
+                exit_code = -1
+        elif args.upload:
             set_sc_mode(sdram=1, sd_enable=0, write_enable=1)
-            success = runMemoryTests()
-            
-            if success:
-                print("\n🎉 所有测试通过！SuperChis工作正常。")
+            if args.incremental:
+                ok = uploadRomDiff(args.upload, args.upload_addr, check=args.check, cart_id=args.cart_id)
             else:
-                print("\n❌ 完整测试失败，请检查硬件连接。")
+                ok = uploadRomFile(args.upload, args.upload_addr, cart_id=args.cart_id)
+            if not ok:
+                exit_code = -1
         else:
-            print("\n跳过完整测试。基础功能正常。")
+            results = runCartTests(stress=args.stress, full=args.full,
+                                   stress_mb=args.stress_mb, stress_bulk=args.stress_bulk,
+                                   retention=args.retention, march=march,
+                                   march_start=args.march_start, march_length=args.march_length,
+                                   resume=args.resume)
+            if not all(results.values()):
+                exit_code = -1
         
     except KeyboardInterrupt:
         print("\n测试被用户中断")
@@ -887,7 +3591,14 @@ if __name__ == "__main__":
         traceback.print_exc()
     finally:
         # 关闭连接
+        saveManifests()
         print("\n关闭烧卡器连接...")
         if 'ser' in locals() and ser.is_open:
             ser.close()
+        if args.stats:
+            commandStats.printSummary()
+        if args.stats_json:
+            commandStats.dump(args.stats_json)
+            print(f"命令统计已写入: {args.stats_json}")
         print("测试完成")
+    exit(exit_code)